@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GitHub Trending 机器人离线性能基准
+功能：在本地启动 GitHub Trending / README / OpenAI 兼容接口 / 飞书 Webhook 替身服务，
+      端到端运行完整流程，输出总耗时、吞吐量与各阶段延迟，可作为性能回归门禁
+用法：
+    python benchmark.py pipeline --repos 25 --concurrency 5 --runs 3
+    python benchmark.py pipeline --llm-latency 0.5 --llm-error-rate 0.1 --max-wall-time 10
+    python benchmark.py pipeline --slow-rate 0.1 --fallback-models Qwen/Qwen2.5-72B-Instruct
+    python benchmark.py parse --repos 25
+    python benchmark.py startup --runs 10 --max-import-time 0.2
+    python benchmark.py counts --samples 20000
+    python benchmark.py render --digests 50
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# ==============================================================================
+# 测试数据
+# ==============================================================================
+
+LANGUAGES = ['Python', 'Rust', 'Go', 'TypeScript', 'C++', '']
+TOPIC_WORDS = ('agent', 'database', 'compiler', 'browser', 'terminal', 'editor', 'proxy', 'queue', 'cache',
+               'scheduler', 'renderer', 'parser', 'shell', 'kernel', 'router', 'crawler', 'notebook', 'tracker',
+               'vector', 'graph', 'image', 'audio', 'video', 'game', 'blockchain', 'wallet', 'chat', 'search')
+
+def make_description(topic, language):
+    """每个主题生成不同的描述（同主题的 fork 描述相同）"""
+    words = random.Random(topic).sample(TOPIC_WORDS, 3)
+    return f"A fast {words[0]} {words[1]} for {words[2]} workloads, written in {language or 'code'}"
+
+def make_trending_html(count, seed=0, duplicate_rate=0.0):
+    """生成与 GitHub Trending 页面结构一致的 HTML
+
+    duplicate_rate 为 fork/克隆项目的比例：与之前某个项目同名同描述，owner 不同。
+    """
+    rng = random.Random(seed)
+    dup_rng = random.Random(seed + 1)
+    rows = []
+    for i in range(count):
+        owner, repo, topic = f"owner{i}", f"repo{i}", i
+        if i and dup_rng.random() < duplicate_rate:
+            topic = dup_rng.randrange(i)
+            owner, repo = f"fork{i}", f"repo{topic}"
+        language = LANGUAGES[topic % len(LANGUAGES)]
+        language_html = (
+            '<span class="d-inline-block ml-0 mr-3"><span class="repo-language-color"></span>\n'
+            f'  <span itemprop="programmingLanguage">{language}</span></span>'
+        ) if language else ''
+        stars = rng.randint(100, 90000)
+        forks = rng.randint(10, 9000)
+        today = rng.randint(10, 3000)
+        rows.append(f'''<article class="Box-row">
+  <div class="float-right d-flex"><a href="/login?return_to=%2F{owner}%2F{repo}" class="btn-sm btn">Star</a></div>
+  <h2 class="h3 lh-condensed">
+    <a href="/{owner}/{repo}" class="Link">
+      <svg></svg>
+      <span class="text-normal">
+        {owner} /
+</span>
+      {repo}
+</a>  </h2>
+  <p class="col-9 color-fg-muted my-1 pr-4">
+    {make_description(topic, language)}.
+  </p>
+  <div class="f6 color-fg-muted mt-2">
+    {language_html}
+    <a href="/{owner}/{repo}/stargazers" class="Link--muted d-inline-block mr-3"><svg></svg>
+      {stars:,}</a>
+    <a href="/{owner}/{repo}/forks" class="Link--muted d-inline-block mr-3"><svg></svg>
+      {forks:,}</a>
+    <span class="d-inline-block mr-3">Built by <a href="/u"><img/></a></span>
+    <span class="d-inline-block float-sm-right"><svg></svg>
+      {today:,} stars today</span>
+  </div>
+</article>''')
+    return '<html><body><div class="Box">' + '\n'.join(rows) + '</div></body></html>'
+
+def make_readme(name, size):
+    """生成带徽章、目录、代码块的 README 原文，约 size 字节"""
+    head = f'''<p align="center"><img src="logo.png"></p>
+
+# {name} [![CI](https://img.shields.io/ci.svg)](https://ci) ![stars](https://img.shields.io/stars.svg)
+
+{name} is a blazing fast, batteries-included toolkit for developers.
+
+## Table of Contents
+- [Features](#features)
+- [Installation](#installation)
+
+## Features
+- Zero-config setup
+- Pluggable backends
+
+## Installation
+```bash
+pip install {name}
+```
+
+## Details
+'''
+    filler = 'This project provides many useful capabilities for everyday engineering work. '
+    body = filler * max(0, (size - len(head)) // len(filler) + 1)
+    return (head + body)[:max(size, len(head))]
+
+# ==============================================================================
+# 替身服务
+# ==============================================================================
+
+class StandInState:
+    """替身服务的配置与统计"""
+
+    def __init__(self, repos, readme_size, llm_latency, llm_error_rate, seed, duplicate_rate=0.0,
+                 slow_rate=0.0, slow_latency=0.0):
+        self.trending_html = make_trending_html(repos, seed, duplicate_rate).encode('utf-8')
+        self.readme_size = readme_size
+        self.llm_latency = llm_latency
+        self.llm_error_rate = llm_error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.primary_model = None  # 只有主模型出现长尾延迟，导入机器人模块后设置
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.webhook_payloads = []
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def should_fail(self):
+        with self.lock:
+            return self.rng.random() < self.llm_error_rate
+
+    def should_stall(self, model):
+        with self.lock:
+            return model == self.primary_model and self.rng.random() < self.slow_rate
+
+def make_handler(state):
+    """构建请求处理器：按路径分发到各替身接口"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/trending':
+                state.count('trending')
+                self._send(200, state.trending_html, 'text/html; charset=utf-8')
+                return
+            match = re.match(r'^/api/repos/([^/]+)/([^/]+)/readme$', path)
+            if match:
+                state.count('readme')
+                body = make_readme(match.group(2), state.readme_size).encode('utf-8')
+                self._send(200, body, 'text/plain; charset=utf-8')
+                return
+            state.count('not_found')
+            self._send(404, b'not found', 'text/plain')
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+
+            if path == '/feishu':
+                state.count('webhook')
+                with state.lock:
+                    state.webhook_payloads.append(payload)
+                self._send(200, json.dumps({'code': 0, 'msg': 'success'}).encode(), 'application/json')
+                return
+
+            if path == '/v1/chat/completions':
+                state.count('chat')
+                self._chat(payload)
+                return
+
+            if path == '/v1/embeddings':
+                state.count('embeddings')
+                self._embeddings(payload)
+                return
+
+            self._send(404, b'not found', 'text/plain')
+
+        def _embeddings(self, payload):
+            """OpenAI 兼容的向量接口：词袋哈希到 512 维，相同文本得到相同向量"""
+            texts = payload['input'] if isinstance(payload['input'], list) else [payload['input']]
+            data = []
+            for index, text in enumerate(texts):
+                vector = [0.0] * 512
+                for word in re.findall(r'\w+', text.lower()):
+                    vector[zlib.crc32(word.encode('utf-8')) % 512] += 1.0
+                data.append({'object': 'embedding', 'index': index, 'embedding': vector})
+            body = {'object': 'list', 'data': data, 'model': payload.get('model', ''),
+                    'usage': {'prompt_tokens': 0, 'total_tokens': 0}}
+            self._send(200, json.dumps(body).encode(), 'application/json')
+
+        def _chat(self, payload):
+            """OpenAI 兼容的对话接口：按配置延迟返回分析结果或 429"""
+            if payload.get('model') != state.primary_model:
+                state.count('chat_fallback')
+            if state.should_stall(payload.get('model')):
+                state.count('chat_stalled')
+                time.sleep(state.slow_latency)
+            if state.llm_latency:
+                time.sleep(state.llm_latency * (0.5 + state.rng.random()))
+            if state.should_fail():
+                state.count('chat_429')
+                body = json.dumps({'error': {'message': 'rate limited', 'type': 'rate_limit'}}).encode()
+                self._send(429, body, 'application/json', {'Retry-After': '0.1'})
+                return
+
+            prompt = payload['messages'][-1]['content']
+            names = re.findall(r'项目名称: (\S+)', prompt)
+            if 'JSON 数组' in prompt:
+                content = json.dumps([
+                    {'name': name, 'chinese_description': f'{name} 的中文描述', 'highlight': '亮点'}
+                    for name in names
+                ], ensure_ascii=False)
+            else:
+                name = names[0] if names else 'unknown'
+                content = json.dumps(
+                    {'chinese_description': f'{name} 的中文描述', 'highlight': '亮点'},
+                    ensure_ascii=False
+                )
+            # 模拟模型在 JSON 之后继续输出
+            content = '好的，结果如下：\n' + content + '\n以上内容仅供参考。' * 5
+
+            if payload.get('stream'):
+                self._stream(content)
+                return
+
+            body = json.dumps({
+                'id': 'bench', 'object': 'chat.completion', 'created': int(time.time()),
+                'model': payload.get('model', ''),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': content}}],
+                'usage': {'prompt_tokens': len(prompt) // 3, 'completion_tokens': len(content) // 3,
+                          'total_tokens': (len(prompt) + len(content)) // 3}
+            }, ensure_ascii=False).encode('utf-8')
+            self._send(200, body, 'application/json')
+
+        def _stream(self, content):
+            """SSE 流式输出，每段 8 个字符"""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for i in range(0, len(content), 8):
+                    chunk = {
+                        'id': 'bench', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'bench',
+                        'choices': [{'index': 0, 'delta': {'content': content[i:i + 8]}, 'finish_reason': None}]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    time.sleep(0.002)
+                self.wfile.write(b'data: [DONE]\n\n')
+            except (BrokenPipeError, ConnectionResetError):
+                state.count('chat_stream_closed_early')
+
+        def _send(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def start_stand_in(state):
+    """在随机端口启动替身服务，返回 (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+# ==============================================================================
+# 基准测试
+# ==============================================================================
+
+def configure_env(args, cache_dir):
+    """在导入机器人模块前设置环境变量（模块在导入时读取配置）"""
+    os.environ.update({
+        'SILICONFLOW_API_KEY': 'bench-key',
+        'FEISHU_WEBHOOK_URL': 'placeholder',
+        'LOG_ENABLED': 'true' if args.verbose else 'false',
+        'ANALYZE_LIMIT': str(args.repos),
+        'ANALYZE_CONCURRENCY': str(args.concurrency),
+        'ANALYZE_BATCH_SIZE': str(args.batch_size),
+        'SILICONFLOW_STREAM': 'true' if args.stream else 'false',
+        'SILICONFLOW_MAX_RETRIES': '5',
+        'MAX_RETRIES': '2',
+        'RETRY_DELAY': '0',
+        'HTTP_CACHE_DIR': os.path.join(cache_dir, 'http') if args.warm_cache else '',
+        'ANALYSIS_CACHE_PATH': os.path.join(cache_dir, 'analysis.sqlite3') if args.warm_cache else '',
+        'HISTORY_DB_PATH': os.path.join(cache_dir, 'history.sqlite3'),
+        'CHECKPOINT_DIR': '',
+        'DEDUP_MODE': args.dedup,
+        'DEDUP_THRESHOLD': str(args.dedup_threshold),
+        'SILICONFLOW_FALLBACK_MODELS': args.fallback_models,
+        'SILICONFLOW_HEDGE_DELAY': str(args.hedge_delay),
+        'RUN_REPORT_PATH': '',
+    })
+
+def run_pipeline_benchmark(args):
+    """端到端运行完整流程并汇总指标"""
+    state = StandInState(args.repos, args.readme_size, args.llm_latency, args.llm_error_rate, args.seed,
+                         args.duplicate_rate, args.slow_rate, args.slow_latency)
+    server, base_url = start_stand_in(state)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        configure_env(args, cache_dir)
+        import github_trending_bot as bot
+
+        bot.GITHUB_TRENDING_URL = f"{base_url}/trending"
+        bot.GITHUB_API_URL = f"{base_url}/api"
+        bot.SILICONFLOW_BASE_URL = f"{base_url}/v1"
+        bot.FEISHU_WEBHOOK_URL = f"{base_url}/feishu"
+        state.primary_model = bot.SILICONFLOW_MODEL
+
+        wall_times = []
+        stage_durations = {}
+        for run in range(args.runs):
+            bot.tracer.reset()
+            start = time.perf_counter()
+            success = bot.run_pipeline()
+            wall = time.perf_counter() - start
+            wall_times.append(wall)
+            if not success:
+                print(f"第 {run + 1} 次运行失败", file=sys.stderr)
+                server.shutdown()
+                return 1
+            for span in bot.tracer.report()['spans']:
+                stage_durations.setdefault(span['stage'], []).append(span['duration'])
+
+    server.shutdown()
+
+    result = {
+        'repos': args.repos,
+        'concurrency': args.concurrency,
+        'batch_size': args.batch_size,
+        'stream': args.stream,
+        'runs': args.runs,
+        'wall_time_mean': statistics.mean(wall_times),
+        'wall_time_min': min(wall_times),
+        'throughput_repos_per_s': args.repos / statistics.mean(wall_times),
+        'stages': {
+            stage: {
+                'count': len(values),
+                'p50': _percentile(values, 50),
+                'p95': _percentile(values, 95),
+                'max': max(values),
+            }
+            for stage, values in stage_durations.items()
+        },
+        'server_requests': dict(state.counts),
+    }
+    _print_result(result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.max_wall_time and result['wall_time_mean'] > args.max_wall_time:
+        print(f"回归：平均耗时 {result['wall_time_mean']:.2f}s 超过阈值 {args.max_wall_time:.2f}s", file=sys.stderr)
+        return 1
+    return 0
+
+def run_parse_benchmark(args):
+    """对比 Trending 页面两种解析器的耗时，并校验结果一致"""
+    os.environ.setdefault('LOG_ENABLED', 'false')
+    import github_trending_bot as bot
+
+    html = make_trending_html(args.repos, args.seed)
+    crawler = bot.GitHubTrendingCrawler(http_cache=bot.HttpCache(''))
+    results = {}
+    for parser in ('bs4', 'lxml'):
+        crawler.parser = parser
+        parsed = crawler._parse_html(html)
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            crawler._parse_html(html)
+            timings.append(time.perf_counter() - start)
+        results[parser] = (parsed, timings)
+
+    identical = results['bs4'][0] == results['lxml'][0]
+    print(f"解析 {args.repos} 个仓库，{args.iterations} 次迭代，结果一致：{identical}")
+    for parser, (_, timings) in results.items():
+        print(f"  {parser:<6} p50 {_percentile(timings, 50) * 1000:8.2f} ms   "
+              f"min {min(timings) * 1000:8.2f} ms")
+    return 0 if identical else 1
+
+def make_count_texts(count, seed=0):
+    """生成 GitHub 页面风格的计数文本及其真实值：千分位、k/M 缩写（一位小数）和 "stars today" 后缀"""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        value = int(10 ** rng.uniform(0, 7))
+        style = rng.randrange(4)
+        if style == 0:
+            text = f"{value:,}"
+        elif style == 1:
+            text = f"{value:,} stars today"
+        elif style == 2 and value >= 1000:
+            text = f"{value / 1000:.1f}k"
+        elif style == 3 and value >= 1000000:
+            text = f"{value / 1000000:.1f}M"
+        else:
+            text = f"\n      {value}\n"
+        samples.append((text, value))
+    return samples
+
+def legacy_format_number(num_str):
+    """旧版实现（对比基线）：缩写计数会被解析为 0"""
+    num_str = num_str.strip()
+    if not num_str:
+        return 0
+    num_str = num_str.replace(',', '').replace('k', '000').replace('K', '000')
+    try:
+        if '.' in num_str:
+            parts = num_str.split('.')
+            if len(parts) == 2 and parts[1] == '000':
+                return int(float(num_str))
+        return int(num_str)
+    except Exception:
+        return 0
+
+def run_counts_benchmark(args):
+    """计数解析正确性（往返校验）与逐个/批量解析耗时"""
+    os.environ.setdefault('LOG_ENABLED', 'false')
+    os.environ.setdefault('SILICONFLOW_API_KEY', 'bench-key')
+    import github_trending_bot as bot
+
+    samples = make_count_texts(args.samples, args.seed)
+    texts = [text for text, _ in samples]
+
+    def tolerance(text, value):
+        # 一位小数的缩写最多有半个末位的舍入误差
+        if text.endswith('k'):
+            return 50
+        if text.endswith('M'):
+            return 50000
+        return 0
+
+    parsers = {
+        # 旧版调用方会先去掉 "stars today" 后缀
+        'legacy': lambda: [legacy_format_number(text.split('stars')[0]) for text in texts],
+        'single': lambda: [bot.format_number(text) for text in texts],
+        'bulk': lambda: bot.parse_counts(texts),
+    }
+    print(f"解析 {len(texts)} 个计数文本，{args.iterations} 次迭代")
+    failed = False
+    for name, parse in parsers.items():
+        parsed = parse()
+        wrong = sum(1 for (text, value), result in zip(samples, parsed)
+                    if abs(result - value) > tolerance(text, value))
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            parse()
+            timings.append(time.perf_counter() - start)
+        print(f"  {name:<7} p50 {_percentile(timings, 50) * 1000:8.2f} ms   "
+              f"min {min(timings) * 1000:8.2f} ms   错误 {wrong}/{len(texts)}")
+        if name != 'legacy' and wrong:
+            failed = True
+
+    if bot.parse_counts(texts) != [bot.format_number(text) for text in texts]:
+        print("批量解析与逐个解析结果不一致", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+def make_analyzed_repos(count, seed=0):
+    """已分析的仓库记录（渲染基准用）"""
+    rng = random.Random(seed)
+    repos = []
+    for i in range(count):
+        topic = TOPIC_WORDS[i % len(TOPIC_WORDS)]
+        language = rng.choice(LANGUAGES)
+        repos.append({
+            'name': f"owner{i}/{topic}-{i}", 'url': f"https://github.com/owner{i}/{topic}-{i}",
+            'description': make_description(topic, language), 'language': language,
+            'stars': rng.randint(100, 200000), 'forks': rng.randint(10, 20000), 'today_stars': rng.randint(10, 3000),
+            'ai_analysis': {'chinese_description': f"一个{topic}项目，" + "提供高性能与易用的接口。" * rng.randint(1, 4)},
+        })
+    return repos
+
+def run_render_benchmark(args):
+    """多份摘要（每个推送目标一份）共用渲染器与每份新建渲染器的耗时对比，并校验输出一致"""
+    os.environ.setdefault('LOG_ENABLED', 'false')
+    os.environ.setdefault('SILICONFLOW_API_KEY', 'bench-key')
+    import github_trending_bot as bot
+
+    repos = bot.TrendingRepo.load_many(make_analyzed_repos(args.repos, args.seed))
+    rng = random.Random(args.seed)
+    digests = [rng.sample(repos, min(args.digest_size, len(repos))) for _ in range(args.digests)]
+    factories = {
+        'markdown': bot.MarkdownRenderer,
+        'html': bot.HtmlRenderer,
+        'feishu': bot.FeishuCardBuilder,
+    }
+    print(f"{args.repos} 个仓库，{args.digests} 份摘要，每份 {args.digest_size} 个项目，{args.iterations} 次迭代")
+    failed = False
+    for name, factory in factories.items():
+        outputs = {}
+        timings = {'fresh': [], 'shared': []}
+        for _ in range(args.iterations):
+            for mode in timings:
+                bot.tracer.reset()
+                shared = factory()
+                start = time.perf_counter()
+                outputs[mode] = [(shared if mode == 'shared' else factory()).render(digest, '2024-01-01')
+                                 for digest in digests]
+                timings[mode].append(time.perf_counter() - start)
+            hits = bot.tracer.counters.get('fragment_hits', 0)
+            built = bot.tracer.counters.get('fragments', 0)
+        identical = outputs['fresh'] == outputs['shared']
+        failed = failed or not identical
+        print(f"  {name:<9}" + "   ".join(
+            f"{mode} p50 {_percentile(values, 50) * 1000:7.2f} ms" for mode, values in timings.items()
+        ) + f"   片段 渲染 {built} 复用 {hits}   一致：{identical}")
+    return 1 if failed else 0
+
+# 启动基准：每个场景在新的解释器中执行，输出加载了哪些重依赖
+HEAVY_MODULES = ('openai', 'requests', 'bs4', 'lxml')
+STARTUP_SCENARIOS = {
+    'import': "import github_trending_bot",
+    'dry-run': "import github_trending_bot as bot\ntry:\n    bot.main(['dry-run'])\nexcept SystemExit:\n    pass",
+    'eager-deps': "import github_trending_bot, openai, requests, bs4, lxml.html",
+}
+
+def run_startup_benchmark(args):
+    """在独立子进程中测量模块导入与 dry-run 的启动耗时"""
+    env = dict(os.environ, SILICONFLOW_API_KEY='bench-key', FEISHU_WEBHOOK_URL='https://example.invalid/hook',
+               LOG_ENABLED='false', RUN_REPORT_PATH='')
+    probe = f"\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    results = {}
+    for name, code in STARTUP_SCENARIOS.items():
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', code + probe], cwd=cwd, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            timings.append(time.perf_counter() - start)
+        results[name] = (timings, output.strip().splitlines()[-1] if output.strip() else '')
+
+    print(f"启动耗时（{args.runs} 次，含解释器启动）")
+    for name, (timings, loaded) in results.items():
+        print(f"  {name:<11} p50 {_percentile(timings, 50) * 1000:8.1f} ms   "
+              f"min {min(timings) * 1000:8.1f} ms   已加载：{loaded or '无'}")
+
+    import_time = _percentile(results['import'][0], 50)
+    if args.max_import_time and import_time > args.max_import_time:
+        print(f"回归：导入耗时 {import_time:.3f}s 超过阈值 {args.max_import_time:.3f}s", file=sys.stderr)
+        return 1
+    return 0
+
+def _percentile(values, percent):
+    """最近秩法分位数"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+def _print_result(result):
+    """打印基准结果"""
+    print(f"仓库数 {result['repos']}  并发 {result['concurrency']}  合并 {result['batch_size']}  "
+          f"流式 {result['stream']}  运行 {result['runs']} 次")
+    print(f"总耗时 平均 {result['wall_time_mean']:.3f}s  最快 {result['wall_time_min']:.3f}s  "
+          f"吞吐 {result['throughput_repos_per_s']:.2f} 仓库/秒")
+    print(f"{'stage':<18}{'count':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}")
+    for stage, stats in result['stages'].items():
+        print(f"{stage:<18}{stats['count']:>6}{stats['p50'] * 1000:>10.1f}"
+              f"{stats['p95'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}")
+    print(f"替身服务请求数：{result['server_requests']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub Trending 机器人离线性能基准")
+    subparsers = parser.add_subparsers(dest='command')
+
+    pipeline = subparsers.add_parser('pipeline', help="端到端流程基准（默认）")
+    pipeline.add_argument('--repos', type=int, default=25, help="Trending 仓库数（全部参与分析）")
+    pipeline.add_argument('--concurrency', type=int, default=5, help="分析并发数")
+    pipeline.add_argument('--batch-size', type=int, default=1, help="合并分析的项目数")
+    pipeline.add_argument('--stream', action=argparse.BooleanOptionalAction, default=True, help="流式输出")
+    pipeline.add_argument('--llm-latency', type=float, default=0.2, help="模型接口平均延迟（秒）")
+    pipeline.add_argument('--llm-error-rate', type=float, default=0.0, help="模型接口返回 429 的比例")
+    pipeline.add_argument('--readme-size', type=int, default=8000, help="README 字节数")
+    pipeline.add_argument('--duplicate-rate', type=float, default=0.0, help="fork/克隆项目的比例")
+    pipeline.add_argument('--dedup', choices=('off', 'tfidf', 'embedding'), default='off', help="近似重复项目合并方式")
+    pipeline.add_argument('--dedup-threshold', type=float, default=0.8, help="合并的余弦相似度阈值")
+    pipeline.add_argument('--slow-rate', type=float, default=0.0, help="主模型请求出现长尾延迟的比例")
+    pipeline.add_argument('--slow-latency', type=float, default=5.0, help="长尾请求的额外延迟（秒）")
+    pipeline.add_argument('--fallback-models', default='', help="备用模型（SILICONFLOW_FALLBACK_MODELS），启用对冲请求")
+    pipeline.add_argument('--hedge-delay', type=float, default=1.0, help="延迟样本不足时的对冲等待时间（秒）")
+    pipeline.add_argument('--warm-cache', action='store_true', help="多次运行间保留 HTTP 与分析缓存")
+    pipeline.add_argument('--runs', type=int, default=1, help="运行次数")
+    pipeline.add_argument('--max-wall-time', type=float, default=0, help="平均耗时超过该值（秒）时返回非零")
+    pipeline.add_argument('--json', help="结果输出为 JSON 文件")
+    pipeline.add_argument('--seed', type=int, default=0)
+    pipeline.add_argument('--verbose', action='store_true', help="输出机器人日志")
+
+    parse = subparsers.add_parser('parse', help="Trending 页面解析器基准")
+    parse.add_argument('--repos', type=int, default=25)
+    parse.add_argument('--iterations', type=int, default=50)
+    parse.add_argument('--seed', type=int, default=0)
+
+    startup = subparsers.add_parser('startup', help="启动与导入耗时基准")
+    startup.add_argument('--runs', type=int, default=10)
+    startup.add_argument('--max-import-time', type=float, default=0, help="导入耗时 p50 超过该值（秒）时返回非零")
+
+    counts = subparsers.add_parser('counts', help="星数/Fork 数解析基准与往返校验")
+    counts.add_argument('--samples', type=int, default=20000)
+    counts.add_argument('--iterations', type=int, default=5)
+    counts.add_argument('--seed', type=int, default=0)
+
+    render = subparsers.add_parser('render', help="摘要渲染基准（Markdown / HTML / 飞书卡片）")
+    render.add_argument('--repos', type=int, default=50, help="已分析的仓库数")
+    render.add_argument('--digests', type=int, default=50, help="摘要份数（推送目标数）")
+    render.add_argument('--digest-size', type=int, default=25, help="每份摘要的项目数")
+    render.add_argument('--iterations', type=int, default=5)
+    render.add_argument('--seed', type=int, default=0)
+
+    argv = sys.argv[1:]
+    if not argv or argv[0].startswith('-'):
+        argv = ['pipeline'] + argv
+    args = parser.parse_args(argv)
+
+    if args.command == 'parse':
+        return run_parse_benchmark(args)
+    if args.command == 'startup':
+        return run_startup_benchmark(args)
+    if args.command == 'counts':
+        return run_counts_benchmark(args)
+    if args.command == 'render':
+        return run_render_benchmark(args)
+    return run_pipeline_benchmark(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,35 @@
 """
 GitHub Trending 每日推送机器人
 功能：每日爬取 GitHub Trending，使用硅基流动 AI 总结，通过飞书机器人推送
-部署：GitHub Actions 定时任务（每天早上 8 点）
+部署：GitHub Actions 定时任务（每天早上 8 点），或以常驻进程运行（python github_trending_bot.py daemon）
 """
 
-import requests
-from bs4 import BeautifulSoup
-from openai import OpenAI
-from datetime import datetime
+# requests、bs4、lxml、openai 导入较慢，在首次使用时才导入（见各函数内部），
+# 使 dry-run 等不需要它们的子命令快速启动
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from html import escape
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+import argparse
+import functools
+import base64
+import hashlib
+import hmac
 import json
+import math
+import operator
+import queue
+import re
+import signal
+import sqlite3
 import sys
+import threading
+import time
 
 # ==============================================================================
 # 配置区域 - 通过环境变量读取
@@ -24,20 +44,92 @@ SILICONFLOW_API_KEY = os.getenv("SILICONFLOW_API_KEY", "")
 SILICONFLOW_BASE_URL = "https://api.siliconflow.cn/v1"
 SILICONFLOW_MODEL = os.getenv("SILICONFLOW_MODEL", "deepseek-ai/DeepSeek-V3")
 SILICONFLOW_TIMEOUT = int(os.getenv("SILICONFLOW_TIMEOUT", "60"))
+SILICONFLOW_RPM = int(os.getenv("SILICONFLOW_RPM", "0"))  # 每分钟请求数上限，0 表示不限
+SILICONFLOW_TPM = int(os.getenv("SILICONFLOW_TPM", "0"))  # 每分钟 token 数上限，0 表示不限
+SILICONFLOW_MAX_RETRIES = int(os.getenv("SILICONFLOW_MAX_RETRIES", "3"))  # 限流/服务端错误时的最大重试次数
+SILICONFLOW_STREAM = os.getenv("SILICONFLOW_STREAM", "true").lower() == "true"  # 流式输出，JSON 完整后提前结束
+
+# 多模型对冲请求：主模型超过历史 p95 延迟仍未返回时，向下一个备用模型发出相同请求，取先返回的有效结果
+# 格式 "模型" 或 "模型@接口地址"（其他 OpenAI 兼容接口，使用同一 API Key），逗号分隔，按优先级排列；为空时不对冲
+SILICONFLOW_FALLBACK_MODELS = os.getenv("SILICONFLOW_FALLBACK_MODELS", "")
+SILICONFLOW_HEDGE_PERCENTILE = float(os.getenv("SILICONFLOW_HEDGE_PERCENTILE", "95"))  # 按该分位数的历史延迟确定对冲等待时间
+SILICONFLOW_HEDGE_DELAY = float(os.getenv("SILICONFLOW_HEDGE_DELAY", "10"))  # 延迟样本不足时的对冲等待时间（秒）
+
+# AI 分析配置
+ANALYZE_LIMIT = int(os.getenv("ANALYZE_LIMIT", "10"))  # 分析的项目数量
+ANALYZE_CONCURRENCY = int(os.getenv("ANALYZE_CONCURRENCY", "5"))  # 并发分析的项目数，1 表示串行
+ANALYZE_BATCH_SIZE = int(os.getenv("ANALYZE_BATCH_SIZE", "1"))  # 每次请求合并分析的项目数，1 表示逐个分析
+
+# 排序配置：按加权特征对仓库打分，选出得分最高的 ANALYZE_LIMIT 个进行分析
+# 格式 "特征:权重"，逗号分隔，例如 "today_stars:1,novelty:0.5,keyword:0.5"；为空时保持页面原顺序
+RANK_WEIGHTS = os.getenv("RANK_WEIGHTS", "")
+RANK_LANGUAGES = os.getenv("RANK_LANGUAGES", "")  # language 特征的语言白名单，逗号分隔
+RANK_KEYWORDS = os.getenv("RANK_KEYWORDS", "")  # keyword 特征匹配的关键词，逗号分隔
+
+# 去重配置：按名称 + 描述的相似度合并近似重复的项目，每组只分析得分最高的一个
+DEDUP_MODE = os.getenv("DEDUP_MODE", "off")  # off、tfidf（本地计算）或 embedding（硅基流动向量接口）
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))  # 余弦相似度不低于该值视为重复
+SILICONFLOW_EMBEDDING_MODEL = os.getenv("SILICONFLOW_EMBEDDING_MODEL", "BAAI/bge-m3")
+
+# 分析结果缓存配置
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", ".cache/analysis_cache.sqlite3")  # 空字符串表示禁用缓存
+ANALYSIS_CACHE_TTL_DAYS = int(os.getenv("ANALYSIS_CACHE_TTL_DAYS", "14"))  # 缓存有效期（天）
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "5000"))  # 最多缓存条目数
+PROMPT_VERSION = "2"  # 修改 prompt 后递增，使旧缓存失效
+
+# 历史榜单配置
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", ".cache/trending_history.sqlite3")  # 历史榜单数据库，空字符串表示禁用
+HISTORY_NEW_ONLY = os.getenv("HISTORY_NEW_ONLY", "false").lower() == "true"  # 只分析和推送今日新上榜的项目
 
 # 飞书机器人配置
 FEISHU_WEBHOOK_URL = os.getenv("FEISHU_WEBHOOK_URL", "")
+FEISHU_WEBHOOK_SECRET = os.getenv("FEISHU_WEBHOOK_SECRET", "")  # 可选，机器人开启签名校验时的密钥
 FEISHU_MESSAGE_TYPE = "interactive"  # 使用富文本卡片
+# 多群推送配置（JSON 数组），配置后替代 FEISHU_WEBHOOK_URL，每项支持：
+# name、url、secret、languages、lists、keywords、min_today_stars、limit
+FEISHU_TARGETS = os.getenv("FEISHU_TARGETS", "")
+FEISHU_TIMEOUT = int(os.getenv("FEISHU_TIMEOUT", "10"))  # 推送请求超时（秒）
+FEISHU_CARD_MAX_BYTES = int(os.getenv("FEISHU_CARD_MAX_BYTES", "28000"))  # 单条卡片消息的最大字节数，超出自动拆分
 
 # GitHub Trending 配置
 GITHUB_TRENDING_URL = "https://github.com/trending"
 GITHUB_SINCE = os.getenv("GITHUB_SINCE", "daily")  # daily, weekly, monthly
 GITHUB_LANGUAGE = os.getenv("GITHUB_LANGUAGE", "")  # 空字符串表示所有语言
+# 多榜单配置，格式 "语言:周期"，逗号分隔，例如 "python:daily,rust:daily,:weekly"（语言留空表示所有语言）
+# 未配置时使用 GITHUB_LANGUAGE + GITHUB_SINCE 对应的单个榜单
+GITHUB_TRENDING_LISTS = os.getenv("GITHUB_TRENDING_LISTS", "")
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "")  # 可选，提高 GitHub API 限额（Actions 中自动提供）
+README_MAX_BYTES = int(os.getenv("README_MAX_BYTES", "20000"))  # README 最多下载的字节数
+README_TOKEN_BUDGET = int(os.getenv("README_TOKEN_BUDGET", "600"))  # 写入 prompt 的 README 最多 token 数（估算）
 
 # 爬虫配置
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))  # 请求超时时间（秒）
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "5"))  # 最大重试次数
 RETRY_DELAY = int(os.getenv("RETRY_DELAY", "5"))  # 重试间隔（秒）
+TRENDING_PARSER = os.getenv("TRENDING_PARSER", "lxml")  # Trending 页面解析器：lxml（XPath，更快）或 bs4
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".cache/http")  # 条件请求缓存目录，空字符串表示禁用
+HTTP_CACHE_TTL_DAYS = int(os.getenv("HTTP_CACHE_TTL_DAYS", "30"))  # 超过该天数未使用的缓存条目被删除
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "2000"))  # 最多缓存条目数，超出时删除最久未使用的
+EXTRACT_VERSION = "3"  # 修改页面提取逻辑（仓库字段、README 提取）后递增，使已缓存的提取结果失效
+
+# 断点续跑配置
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", ".cache/runs")  # 断点目录（按日期 + 配置区分），空字符串表示禁用
+CHECKPOINT_RESUME = os.getenv("CHECKPOINT_RESUME", "true").lower() == "true"  # 从断点恢复已完成的阶段
+CHECKPOINT_KEEP_DAYS = int(os.getenv("CHECKPOINT_KEEP_DAYS", "7"))  # 断点保留天数
+# 运行标识（GitHub Actions 中为 github.run_id）：配置后断点按运行区分，只有同一次运行的 Re-run 会续跑，
+# 当天再次手动触发时重新执行；未配置时按日期区分
+CHECKPOINT_RUN_ID = os.getenv("CHECKPOINT_RUN_ID", "")
+
+# 常驻进程配置（python github_trending_bot.py daemon）
+# 多个定时计划（JSON 数组），每项支持：name、every（间隔分钟）或 at（"HH:MM"）+ weekday（mon…sun）、
+# lists、limit、targets（推送目标名称列表）；未配置时每天 DAEMON_AT 按默认配置运行一次
+SCHEDULES = os.getenv("SCHEDULES", "")
+DAEMON_AT = os.getenv("DAEMON_AT", "08:00")  # 未配置 SCHEDULES 时的每日运行时间
+
+# 运行报告配置
+RUN_REPORT_PATH = os.getenv("RUN_REPORT_PATH", "run_report.json")  # 运行报告（JSON）输出路径，空字符串表示不输出
+HTML_ARCHIVE_DIR = os.getenv("HTML_ARCHIVE_DIR", "")  # 每次运行输出 HTML 归档页的目录，空字符串表示不输出
 
 # 日志配置
 LOG_ENABLED = os.getenv("LOG_ENABLED", "true").lower() == "true"
@@ -47,16 +139,39 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # DEBUG, INFO, WARNING, ERROR
 # 环境变量验证
 # ==============================================================================
 
-def validate_env():
-    """验证必要的环境变量是否配置"""
+def validate_env(ai=True, feishu=True):
+    """验证必要的环境变量是否配置（ai/feishu 为 False 时不检查对应的必填项）"""
     errors = []
 
-    if not SILICONFLOW_API_KEY:
+    if ai and not SILICONFLOW_API_KEY:
         errors.append("未配置 SILICONFLOW_API_KEY 环境变量")
 
-    if not FEISHU_WEBHOOK_URL:
+    if FEISHU_TARGETS:
+        try:
+            parse_feishu_targets(FEISHU_TARGETS)
+        except ValueError as e:
+            errors.append(f"FEISHU_TARGETS 配置无效：{str(e)}")
+    elif feishu and not FEISHU_WEBHOOK_URL:
         errors.append("未配置 FEISHU_WEBHOOK_URL 环境变量")
 
+    if ai and SILICONFLOW_FALLBACK_MODELS:
+        try:
+            parse_model_routes(SILICONFLOW_FALLBACK_MODELS)
+        except ValueError as e:
+            errors.append(f"SILICONFLOW_FALLBACK_MODELS 配置无效：{str(e)}")
+
+    if RANK_WEIGHTS:
+        try:
+            RepoRanker()
+        except ValueError as e:
+            errors.append(f"RANK_WEIGHTS 配置无效：{str(e)}")
+
+    if SCHEDULES:
+        try:
+            parse_schedules(SCHEDULES)
+        except ValueError as e:
+            errors.append(f"SCHEDULES 配置无效：{str(e)}")
+
     if errors:
         log("环境变量配置错误：", "ERROR")
         for error in errors:
@@ -76,23 +191,126 @@ def log(message, level="INFO"):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] [{level}] {message}", flush=True)
 
-def format_number(num_str):
-    """格式化数字（例如：1.2k -> 1200）"""
-    num_str = num_str.strip()
-    if not num_str:
+def parse_trending_lists(value):
+    """解析 GITHUB_TRENDING_LISTS，返回 [(language, since), ...]，自动去重"""
+    combos = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        language, _, since = item.partition(':')
+        combo = (language.strip(), since.strip() or GITHUB_SINCE)
+        if combo not in combos:
+            combos.append(combo)
+    return combos or [(GITHUB_LANGUAGE, GITHUB_SINCE)]
+
+def create_http_session(pool_size=None):
+    """创建共享的 HTTP 会话：连接池 + keep-alive + 指数退避重试
+
+    GET 请求在连接失败、超时和 429/5xx 时依次等待 RETRY_DELAY、2 倍、4 倍……秒后重试，
+    并遵循 Retry-After；POST 不自动重试，避免重复推送。
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class BackoffRetry(Retry):
+        """第 n 次重试等待 backoff_factor * 2^(n-1) 秒（urllib3 默认第一次重试不等待）
+
+        allowed_methods 只限制读取与状态码重试，连接错误对所有方法都会重试；
+        不在 allowed_methods 中的请求（POST）出错时直接耗尽重试次数，由调用方决定是否重发。
+        """
+
+        def increment(self, method=None, url=None, *args, **kwargs):
+            if method and not self._is_method_retryable(method):
+                return Retry.increment(self.new(total=0), method, url, *args, **kwargs)
+            return super().increment(method, url, *args, **kwargs)
+
+        def get_backoff_time(self):
+            errors = 0
+            for item in reversed(self.history):
+                if item.redirect_location is not None:
+                    break
+                errors += 1
+            if errors == 0:
+                return 0
+            backoff_max = getattr(self, 'backoff_max', Retry.DEFAULT_BACKOFF_MAX)
+            return min(backoff_max, self.backoff_factor * 2 ** (errors - 1))
+
+    if pool_size is None:
+        pool_size = ANALYZE_CONCURRENCY
+    retry = BackoffRetry(
+        total=MAX_RETRIES - 1,  # MAX_RETRIES 为总尝试次数
+        backoff_factor=RETRY_DELAY,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=max(pool_size, 1) + 2,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# 计数文本：可选的千分位逗号、小数和 k/m/b 后缀，例如 "12,345"、"1.2k"、"3M"（后缀后不能紧跟字母，"12 by" 不是 12b）
+_COUNT_PATTERN = r'(\d[\d,]*(?:\.\d+)?)\s*([kKmMbB]?)(?![A-Za-z])'
+_COUNT_RE = re.compile(_COUNT_PATTERN)
+# 批量解析：各段以 \0 分隔，每段恰好产生一个匹配，没有计数时两个分组为空。
+# 惰性前缀逐个位置尝试 _COUNT_PATTERN，与 _COUNT_RE.search 的结果一致（如 "1a 5" 取 5）
+_COUNT_SEGMENT_RE = re.compile(r'(?:[^\0]*?' + _COUNT_PATTERN + r'|)[^\0]*\0')
+_COUNT_MULTIPLIERS = {'': 1, 'k': 1000, 'm': 1000000, 'b': 1000000000}
+
+def _count_value(number, suffix):
+    """正则分组转换为整数"""
+    if not number:
         return 0
+    number = number.replace(',', '')
+    multiplier = _COUNT_MULTIPLIERS[suffix.lower()]
+    if '.' in number or multiplier != 1:
+        return int(round(float(number) * multiplier))
+    return int(number)
 
-    num_str = num_str.replace(',', '').replace('k', '000').replace('K', '000')
+def format_number(num_str):
+    """解析计数文本（例如：12,345 -> 12345，1.2k -> 1200，3M -> 3000000），无法解析时返回 0"""
+    match = _COUNT_RE.search(num_str)
+    return _count_value(*match.groups()) if match else 0
 
-    try:
-        # 处理小数点，例如：1.2k -> 1200
-        if '.' in num_str:
-            parts = num_str.split('.')
-            if len(parts) == 2 and parts[1] == '000':
-                return int(float(num_str))
-        return int(num_str)
-    except:
-        return 0
+def parse_counts(texts):
+    """批量解析计数文本，返回与 texts 等长的整数列表
+
+    将整页的计数文本拼接后用一次正则扫描完成，避免逐个调用的函数与匹配开销。
+    """
+    texts = [text.replace('\0', '') for text in texts]
+    if not texts:
+        return []
+    joined = '\0'.join(texts) + '\0'
+    counts = []
+    for number, suffix in _COUNT_SEGMENT_RE.findall(joined):
+        # 不带后缀和小数的整数（最常见）直接转换，其余交给 _count_value
+        if number and not suffix and '.' not in number:
+            counts.append(int(number.replace(',', '')))
+        else:
+            counts.append(_count_value(number, suffix))
+    return counts
+
+# 榜单周期：页面上的周期星数文本（"stars today"、"stars this week"、"stars this month"）、展示文字与天数
+STAR_PERIODS = {
+    'daily': ('stars today', 'today', 1),
+    'weekly': ('stars this week', 'this week', 7),
+    'monthly': ('stars this month', 'this month', 30),
+}
+
+def star_period(text):
+    """由周期星数文本识别榜单周期，无法识别时返回 None"""
+    for period, (marker, _, _) in STAR_PERIODS.items():
+        if marker in text:
+            return period
+    return None
 
 def format_stars(stars):
     """格式化星数显示"""
@@ -100,6 +318,453 @@ def format_stars(stars):
         return f"{stars / 1000:.1f}k"
     return str(stars)
 
+# ==============================================================================
+# 监控模块 - 分阶段计时与运行报告
+# ==============================================================================
+
+class RunTracer:
+    """轻量级阶段追踪：记录每个阶段的耗时与指标（字节数、重试、token、缓存命中等）
+
+    用法：
+        with tracer.span('fetch_readme', repo=name):
+            ...
+            tracer.add('bytes', 1024)  # 累加到当前线程正在执行的 span
+
+    未处于任何 span 中时，add() 的数值计入全局计数器。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """清空已记录的数据，重新开始计时"""
+        with self._lock:
+            self.started_at = time.time()
+            self.spans = []
+            self.counters = {}
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        """计时上下文，退出时记录耗时；异常会记录到 error 字段后继续抛出"""
+        record = {'stage': stage, 'attrs': dict(attrs), 'metrics': {}}
+        stack = self._stack()
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['duration'] = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self.spans.append(record)
+
+    def traced(self, stage):
+        """装饰器版本的 span"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def add(self, metric, value=1):
+        """累加指标到当前 span（同时计入全局计数器）"""
+        stack = self._stack()
+        if stack:
+            metrics = stack[-1]['metrics']
+            metrics[metric] = metrics.get(metric, 0) + value
+        with self._lock:
+            self.counters[metric] = self.counters.get(metric, 0) + value
+
+    def report(self):
+        """汇总各阶段耗时分位数与指标"""
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+
+        stages = {}
+        for record in spans:
+            stage = stages.setdefault(record['stage'], {'durations': [], 'errors': 0, 'metrics': {}})
+            stage['durations'].append(record['duration'])
+            if 'error' in record:
+                stage['errors'] += 1
+            for metric, value in record['metrics'].items():
+                stage['metrics'][metric] = stage['metrics'].get(metric, 0) + value
+
+        summary = {}
+        for name, stage in stages.items():
+            durations = sorted(stage['durations'])
+            summary[name] = {
+                'count': len(durations),
+                'errors': stage['errors'],
+                'total': round(sum(durations), 4),
+                'p50': round(_percentile(durations, 50), 4),
+                'p95': round(_percentile(durations, 95), 4),
+                'max': round(durations[-1], 4),
+                'metrics': stage['metrics']
+            }
+
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'wall_time': round(time.time() - self.started_at, 4),
+            'stages': summary,
+            'counters': counters,
+            'spans': [
+                {
+                    'stage': record['stage'],
+                    'duration': round(record['duration'], 4),
+                    **record['attrs'],
+                    **record['metrics'],
+                    **({'error': record['error']} if 'error' in record else {})
+                }
+                for record in spans
+            ]
+        }
+
+    def write_report(self, path=None):
+        """输出 JSON 运行报告，并在日志中打印各阶段汇总表"""
+        path = RUN_REPORT_PATH if path is None else path
+        report = self.report()
+
+        log(f"{'stage':<18}{'count':>6}{'total(s)':>11}{'p50':>10}{'p95':>10}{'max':>10}  metrics")
+        for name, stage in report['stages'].items():
+            metrics = ', '.join(f"{key}={value}" for key, value in sorted(stage['metrics'].items()))
+            log(f"{name:<18}{stage['count']:>6}{stage['total']:>11.2f}{stage['p50']:>10.2f}"
+                f"{stage['p95']:>10.2f}{stage['max']:>10.2f}  {metrics}")
+        log(f"总耗时 {report['wall_time']:.2f} 秒")
+
+        if path:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+                log(f"运行报告已写入 {path}")
+            except OSError as e:
+                log(f"写入运行报告失败：{str(e)}", "WARNING")
+        return report
+
+    def _stack(self):
+        """当前线程的 span 栈"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+def _percentile(sorted_values, percent):
+    """最近秩法计算分位数，输入须已排序"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+tracer = RunTracer()
+
+# ==============================================================================
+# README 预处理 - 去除噪音并按 token 预算挑选段落
+# ==============================================================================
+
+_RE_CODE_BLOCK = re.compile(r'^(```|~~~).*?^\1[^\n]*$', re.MULTILINE | re.DOTALL)
+_RE_HTML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_RE_HTML_TAG = re.compile(r'</?[a-zA-Z][^>]*>')
+_RE_BADGE_LINK = re.compile(r'\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)')
+_RE_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)|!\[[^\]]*\]\[[^\]]*\]')
+_RE_LINK = re.compile(r'\[([^\]]+)\]\([^)]*\)|\[([^\]]+)\]\[[^\]]*\]')
+_RE_LINK_DEFINITION = re.compile(r'^\s*\[[^\]]+\]:\s*\S+.*$', re.MULTILINE)
+_RE_BARE_URL = re.compile(r'https?://\S+')
+_RE_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_RE_BLANK_LINES = re.compile(r'\n{3,}')
+_RE_CJK = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]')
+_RE_WORD = re.compile(r'[A-Za-z0-9_]+|[^\sA-Za-z0-9_\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]')
+
+# 章节标题关键词：优先保留介绍类，跳过安装/使用/贡献等与项目定位无关的章节
+# 英文按整词匹配（"Protocol" 不含 toc，"Supported Models" 不是 support），中文匹配标题开头
+_README_PREFERRED_SECTIONS = (
+    ('about', 'overview', 'introduction', 'intro', 'feature', 'features', 'highlight', 'highlights',
+     'why', 'what', 'description', 'motivation', 'key features'),
+    ('简介', '介绍', '概述', '特性', '特点', '功能', '亮点')
+)
+_README_SKIPPED_SECTIONS = (
+    ('table of contents', 'contents', 'toc', 'install', 'installation', 'installing', 'setup', 'set up',
+     'getting started', 'quick start', 'quickstart', 'usage', 'build', 'building', 'development',
+     'test', 'tests', 'testing', 'contributing', 'contribution', 'contributions', 'contributors',
+     'license', 'licence', 'sponsor', 'sponsors', 'backers', 'acknowledgements', 'acknowledgments',
+     'credits', 'changelog', 'faq', 'star history', 'citation', 'contact', 'support', 'community'),
+    ('目录', '安装', '使用', '贡献', '许可', '开源协议', '致谢', '赞助')
+)
+
+def _heading_pattern(keywords):
+    """(英文关键词, 中文关键词) → 正则：英文整词匹配，中文匹配标题开头（忽略序号、emoji 等前缀）"""
+    english, cjk = keywords
+    words = '|'.join(re.escape(keyword) for keyword in english)
+    prefixes = '|'.join(re.escape(keyword) for keyword in cjk)
+    return re.compile(rf"(?<![a-z0-9])(?:{words})(?![a-z0-9])|^[\W\d_]*(?:{prefixes})")
+
+_RE_PREFERRED_SECTION = _heading_pattern(_README_PREFERRED_SECTIONS)
+_RE_SKIPPED_SECTION = _heading_pattern(_README_SKIPPED_SECTIONS)
+
+def estimate_tokens(text):
+    """本地估算 token 数：中日韩字符按 1 个计，英文单词按约 1.3 个计，标点按 1 个计"""
+    cjk = len(_RE_CJK.findall(text))
+    words = _RE_WORD.findall(text)
+    alnum = sum(1 for w in words if w[0].isalnum() or w[0] == '_')
+    return cjk + int(alnum * 1.3) + (len(words) - alnum)
+
+def clean_readme(text):
+    """去除 README 中的徽章、代码块、HTML、链接定义和裸链接"""
+    text = _RE_CODE_BLOCK.sub('', text)
+    text = _RE_HTML_COMMENT.sub('', text)
+    text = _RE_BADGE_LINK.sub('', text)
+    text = _RE_IMAGE.sub('', text)
+    text = _RE_HTML_TAG.sub('', text)
+    text = _RE_LINK_DEFINITION.sub('', text)
+    text = _RE_LINK.sub(lambda m: m.group(1) or m.group(2), text)
+    text = _RE_BARE_URL.sub('', text)
+    lines = [line.rstrip() for line in text.split('\n')]
+    # 去掉清理后只剩符号的行（如徽章之间的分隔符）
+    lines = [line for line in lines if not line.strip() or any(ch.isalnum() for ch in line)]
+    return _RE_BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip()
+
+def _split_sections(text):
+    """按 Markdown 标题拆分章节，返回 [(标题, 正文), ...]，首段标题为空"""
+    sections = [['', []]]
+    for line in text.split('\n'):
+        match = _RE_HEADING.match(line)
+        if match:
+            sections.append([match.group(2), [line]])
+        else:
+            sections[-1][1].append(line)
+    return [(title, '\n'.join(body).strip()) for title, body in sections if '\n'.join(body).strip()]
+
+def _section_score(index, title, body):
+    """章节价值评分：首段和介绍类章节优先，跳过类章节返回 None"""
+    lowered = title.lower()
+    if _RE_SKIPPED_SECTION.search(lowered):
+        return None
+    # 几乎全是列表项的章节多为目录或链接集合
+    lines = [line for line in body.split('\n') if line.strip() and not _RE_HEADING.match(line)]
+    if not lines:
+        return None
+    list_ratio = sum(1 for line in lines if line.lstrip()[:2] in ('- ', '* ', '+ ')) / len(lines)
+    score = 1.0 - 0.5 * list_ratio
+    if index == 0:
+        score += 3.0
+    if _RE_PREFERRED_SECTION.search(lowered):
+        score += 2.0
+    # 越靠前的章节越可能是项目介绍
+    return score - index * 0.05
+
+def _truncate_to_tokens(text, budget):
+    """按 token 预算截断文本（按行累加，最后一行按字符比例截断）"""
+    kept = []
+    used = 0
+    for line in text.split('\n'):
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            remaining = budget - used
+            if remaining > 0 and cost:
+                kept.append(line[:max(1, len(line) * remaining // cost)])
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(kept).strip()
+
+def condense_readme(text, token_budget=None):
+    """清理 README 并在 token 预算内挑选信息量最高的章节，保持原有顺序"""
+    if token_budget is None:
+        token_budget = README_TOKEN_BUDGET
+    if not text:
+        return ""
+
+    cleaned = clean_readme(text)
+    if estimate_tokens(cleaned) <= token_budget:
+        return cleaned
+
+    sections = _split_sections(cleaned)
+    ranked = []
+    for index, (title, body) in enumerate(sections):
+        score = _section_score(index, title, body)
+        if score is not None:
+            ranked.append((score, index))
+    ranked.sort(reverse=True)
+
+    selected = {}
+    used = 0
+    for _, index in ranked:
+        if used >= token_budget:
+            break
+        body = sections[index][1]
+        cost = estimate_tokens(body)
+        if used + cost > token_budget:
+            body = _truncate_to_tokens(body, token_budget - used)
+            cost = estimate_tokens(body)
+        if body:
+            selected[index] = body
+            used += cost
+
+    if not selected:
+        # 所有章节都被跳过（如只有一个很长的 Getting Started），退回按预算截断全文
+        return _truncate_to_tokens(cleaned, token_budget)
+    return '\n\n'.join(selected[index] for index in sorted(selected))
+
+# ==============================================================================
+# 数据模型 - 仓库记录
+# ==============================================================================
+
+_MISSING = object()
+
+class TrendingRepo(MutableMapping):
+    """单个 Trending 仓库的紧凑记录（__slots__），同时提供 dict 兼容的读写接口
+
+    - 存储字段固定在 FIELDS 中，未赋值的字段保存为 _MISSING，视为不存在（'ai_analysis' in repo 为 False）
+    - author、project_name、formatted_stars、formatted_today_stars、period_label、daily_stars 在访问时由其他字段计算，不占存储
+    - today_stars 为所在榜单周期内的新增星数，period 记录周期（未赋值视为 daily）；
+      daily_stars 为折算的日均值，排序和过滤据此比较不同周期的榜单
+    - 其他自定义键（如自定义排序特征写入的字段）保存在 _extra 中，按需创建
+    - to_dict/from_dict 与 JSON（检查点、HTTP 缓存、子命令文件）互转，to_row/from_row 与历史库行互转
+    """
+
+    FIELDS = (
+        'name', 'url', 'description', 'language', 'stars', 'forks', 'today_stars',
+        'period', 'lists', 'score', 'first_seen', 'days_on_list', 'is_new', 'star_velocity',
+        'ai_analysis', 'duplicates'
+    )
+    OPTIONAL_FIELDS = FIELDS[7:]
+    __slots__ = FIELDS + ('_extra',)
+
+    DERIVED = {
+        'author': lambda repo: repo.name.split('/')[0] if '/' in repo.name else "",
+        'project_name': lambda repo: repo.name.split('/')[1] if '/' in repo.name else repo.name,
+        'formatted_stars': lambda repo: format_stars(repo.stars),
+        'formatted_today_stars': lambda repo: format_stars(repo.today_stars),
+        'period_label': lambda repo: STAR_PERIODS.get(repo.period, STAR_PERIODS['daily'])[1],
+        'daily_stars': lambda repo: repo.today_stars / STAR_PERIODS.get(repo.period, STAR_PERIODS['daily'])[2],
+    }
+
+    def __init__(self, name, url='', description='', language='', stars=0, forks=0, today_stars=0, **fields):
+        for key in self.OPTIONAL_FIELDS:
+            setattr(self, key, _MISSING)
+        self.name = name
+        self.url = url or f"https://github.com/{name}"
+        self.description = description
+        self.language = language
+        self.stars = stars
+        self.forks = forks
+        self.today_stars = today_stars
+        self._extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        derived = self.DERIVED.get(key)
+        if derived:
+            return derived(self)
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.DERIVED:
+            raise KeyError(f"{key} 由其他字段计算，不能直接赋值")
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.FIELDS and getattr(self, key) is not _MISSING:
+            setattr(self, key, _MISSING)
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self.DERIVED:
+            return True
+        if key in self.FIELDS:
+            return getattr(self, key) is not _MISSING
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if getattr(self, key) is not _MISSING:
+                yield key
+        yield from self.DERIVED
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"TrendingRepo({self.to_dict()!r})"
+
+    def to_dict(self):
+        """存储字段（不含计算字段）"""
+        data = {
+            'name': self.name, 'url': self.url, 'description': self.description, 'language': self.language,
+            'stars': self.stars, 'forks': self.forks, 'today_stars': self.today_stars
+        }
+        for key in self.OPTIONAL_FIELDS:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                data[key] = value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict() 或旧版 dict 记录构建，忽略计算字段"""
+        return cls(**{key: value for key, value in data.items() if key not in cls.DERIVED})
+
+    @classmethod
+    def load_many(cls, items):
+        """将 JSON 读出的 dict 列表转换为记录，已是记录的原样保留"""
+        return [item if isinstance(item, cls) else cls.from_dict(item) for item in items]
+
+    def to_json(self):
+        """单行 JSON（JSON Lines）"""
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line):
+        return cls.from_dict(json.loads(line))
+
+    def to_row(self, date, rank):
+        """历史库 snapshots 表的一行：(date, repo, rank, lists, language, stars, forks, today_stars)"""
+        return (
+            date, self.name, rank, ','.join(self.get('lists') or []), self.language,
+            self.stars, self.forks, self.today_stars
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        """由历史库查询结果 (repo, lists, language, stars, forks, today_stars) 构建"""
+        name, lists, language, stars, forks, today_stars = row
+        return cls(name, language=language or '', stars=stars or 0, forks=forks or 0,
+                   today_stars=today_stars or 0, lists=lists.split(',') if lists else [])
+
+def _json_default(obj):
+    """json.dump 的 default：仓库记录序列化为 dict"""
+    if isinstance(obj, TrendingRepo):
+        return obj.to_dict()
+    raise TypeError(f"无法序列化 {type(obj).__name__}")
+
 # ==============================================================================
 # 爬虫模块 - GitHub Trending
 # ==============================================================================
@@ -107,13 +772,14 @@ def format_stars(stars):
 class GitHubTrendingCrawler:
     """GitHub Trending 爬虫"""
 
-    def __init__(self):
+    def __init__(self, http_cache=None, session=None):
         self.url = GITHUB_TRENDING_URL
         self.since = GITHUB_SINCE
         self.language = GITHUB_LANGUAGE
         self.timeout = REQUEST_TIMEOUT
         self.max_retries = MAX_RETRIES
         self.retry_delay = RETRY_DELAY
+        self.parser = TRENDING_PARSER
 
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -121,8 +787,20 @@ class GitHubTrendingCrawler:
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
         }
 
+        self.session = session or create_http_session()
+        self.http_cache = http_cache or HttpCache()
+
+    @tracer.traced('fetch_readme')
     def fetch_readme(self, repo_url):
-        """获取项目的 README.md 内容"""
+        """获取项目的 README 内容
+
+        优先通过 GitHub API 的 readme 接口获取默认分支上的 README 原文（自动识别
+        分支和文件名，如 readme.rst、README），失败时再回退到 blob 页面猜测。
+        """
+        readme_content = self._fetch_readme_raw(repo_url)
+        if readme_content is not None:
+            return readme_content
+
         readme_urls = [
             f"{repo_url}/blob/main/README.md",
             f"{repo_url}/blob/master/README.md"
@@ -130,15 +808,12 @@ class GitHubTrendingCrawler:
 
         for readme_url in readme_urls:
             try:
-                response = requests.get(readme_url, headers=self.headers, timeout=20)
-                response.raise_for_status()
-
-                # 解析 HTML 提取 README 内容
-                soup = BeautifulSoup(response.text, 'lxml')
-                readme_div = soup.find('div', {'data-testid': 'raw-content'}) or soup.find('article')
-
-                if readme_div:
-                    return readme_div.get_text().strip()[:5000]  # 限制长度
+                readme_content = self.http_cache.fetch(
+                    readme_url, self._extract_readme, session=self.session,
+                    headers=self.headers, timeout=20
+                )
+                if readme_content:
+                    return readme_content
 
             except Exception as e:
                 log(f"获取 README 失败 {readme_url}：{str(e)}", "DEBUG")
@@ -146,50 +821,141 @@ class GitHubTrendingCrawler:
 
         return ""
 
-    def fetch_trending(self):
-        """爬取 GitHub Trending 数据"""
-        log("开始爬取 GitHub Trending...")
+    def _fetch_readme_raw(self, repo_url):
+        """通过 GitHub API 流式获取 README 原文，达到字节上限即停止下载
 
-        for attempt in range(self.max_retries):
-            try:
-                params = {'since': self.since}
-                if self.language:
-                    params['language'] = self.language
+        仓库确实没有 README（404）时返回空字符串；其他失败（如 API 限流）返回 None，
+        由调用方回退到 blob 页面。
+        """
+        full_name = urlparse(repo_url).path.strip('/')
+        if full_name.count('/') != 1:
+            return None
 
-                log(f"网页爬取（尝试 {attempt + 1}/{self.max_retries}）...")
+        api_url = f"{GITHUB_API_URL}/repos/{full_name}/readme"
+        headers = {
+            'User-Agent': self.headers['User-Agent'],
+            'Accept': 'application/vnd.github.raw',
+        }
+        if GITHUB_TOKEN:
+            headers['Authorization'] = f"Bearer {GITHUB_TOKEN}"
 
-                response = requests.get(
-                    self.url,
-                    params=params,
-                    headers=self.headers,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
+        import requests
 
-                repos = self._parse_html(response.text)
-                log(f"成功爬取 {len(repos)} 个仓库")
-                return repos
+        try:
+            return self.http_cache.fetch(
+                api_url, self._read_limited, session=self.session,
+                headers=headers, timeout=20, stream=True
+            )
+        except requests.exceptions.HTTPError as e:
+            log(f"获取 README 原文失败 {api_url}：{str(e)}", "DEBUG")
+            if e.response is not None and e.response.status_code == 404:
+                return ""
+            return None
+        except Exception as e:
+            log(f"获取 README 原文失败 {api_url}：{str(e)}", "DEBUG")
+            return None
 
-            except requests.exceptions.Timeout:
-                log(f"请求超时（尝试 {attempt + 1}/{self.max_retries}）", "ERROR")
-            except requests.exceptions.ConnectionError:
-                log(f"连接失败（尝试 {attempt + 1}/{self.max_retries}）", "ERROR")
-            except Exception as e:
-                log(f"爬取失败（尝试 {attempt + 1}/{self.max_retries}）：{str(e)}", "ERROR")
+    def _read_limited(self, response):
+        """读取响应体直到 README_MAX_BYTES 字节，随后关闭连接"""
+        chunks = []
+        total = 0
+        try:
+            for chunk in response.iter_content(chunk_size=8192):
+                chunks.append(chunk)
+                total += len(chunk)
+                if total >= README_MAX_BYTES:
+                    break
+        finally:
+            response.close()
+
+        tracer.add('bytes', total)
+        data = b''.join(chunks)[:README_MAX_BYTES]
+        # 截断处可能落在多字节字符中间，忽略不完整的字节
+        return data.decode('utf-8', errors='ignore').strip()
+
+    def _extract_readme(self, response):
+        """解析 README 页面 HTML 提取正文"""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(response.text, 'lxml')
+        readme_div = soup.find('div', {'data-testid': 'raw-content'}) or soup.find('article')
+
+        if readme_div:
+            return readme_div.get_text().strip()[:5000]  # 限制长度
+        return ""
 
-            # 最后一次尝试不等待
-            if attempt < self.max_retries - 1:
-                import time
-                # 指数退避策略
-                wait_time = self.retry_delay * (2 ** attempt)
-                log(f"等待 {wait_time} 秒后重试...", "INFO")
-                time.sleep(wait_time)
+    def fetch_trending_lists(self, combos):
+        """并发爬取多个榜单，按名称去重合并，并在 lists 字段记录项目出现的榜单
+
+        合并后的顺序为：按配置顺序遍历榜单，保留项目首次出现的位置和数据。
+        """
+        if len(combos) == 1:
+            language, since = combos[0]
+            results = [self.fetch_trending(language, since)]
+        else:
+            log(f"并发爬取 {len(combos)} 个榜单...")
+            with ThreadPoolExecutor(max_workers=len(combos)) as executor:
+                results = list(executor.map(lambda combo: self.fetch_trending(*combo), combos))
+
+        merged = {}
+        for (language, since), repos in zip(combos, results):
+            label = f"{language or 'all'}:{since}"
+            for repo in repos:
+                existing = merged.get(repo['name'])
+                if existing is None:
+                    repo['lists'] = [label]
+                    merged[repo['name']] = repo
+                elif label not in existing['lists']:
+                    existing['lists'].append(label)
+
+        total = sum(len(repos) for repos in results)
+        if len(combos) > 1:
+            log(f"榜单合并完成：共 {total} 条，去重后 {len(merged)} 个仓库")
+        return list(merged.values())
+
+    @tracer.traced('fetch_trending')
+    def fetch_trending(self, language=None, since=None):
+        """爬取 GitHub Trending 数据"""
+        language = self.language if language is None else language
+        since = since or self.since
+        log(f"开始爬取 GitHub Trending（语言：{language or '所有'}，周期：{since}）...")
+
+        params = {'since': since}
+        if language:
+            params['language'] = language
+
+        import requests
+
+        # 重试与退避由会话的 Retry 策略处理
+        try:
+            repos = TrendingRepo.load_many(self.http_cache.fetch(
+                self.url,
+                lambda response: self._parse_html(response.text),
+                params=params,
+                session=self.session,
+                headers=self.headers,
+                timeout=self.timeout
+            ))
+            log(f"成功爬取 {len(repos)} 个仓库")
+            return repos
+
+        except requests.exceptions.Timeout:
+            log(f"请求超时（共尝试 {self.max_retries} 次）", "ERROR")
+        except requests.exceptions.ConnectionError:
+            log(f"连接失败（共尝试 {self.max_retries} 次）", "ERROR")
+        except Exception as e:
+            log(f"爬取失败（共尝试 {self.max_retries} 次）：{str(e)}", "ERROR")
 
         log("所有爬取尝试均失败", "ERROR")
         return []
 
     def _parse_html(self, html):
         """解析 HTML 提取仓库信息"""
+        if self.parser == 'lxml':
+            return self._parse_html_lxml(html)
+
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html, 'lxml')
         repos = []
 
@@ -197,17 +963,35 @@ class GitHubTrendingCrawler:
 
         for article in repo_articles:
             try:
-                repo = self._extract_repo_info(article)
-                if repo:
-                    repos.append(repo)
+                fields = self._extract_repo_info(article)
+                if fields:
+                    repos.append(fields)
             except Exception as e:
                 log(f"解析仓库信息失败：{str(e)}", "WARNING")
                 continue
 
-        return repos
+        return self._build_repos(repos)
+
+    def _parse_html_lxml(self, html):
+        """使用 lxml + 预编译 XPath 解析 HTML，结果与 BeautifulSoup 版本一致"""
+        from lxml import html as lxml_html
+
+        tree = lxml_html.fromstring(html)
+        repos = []
+
+        for article in _xpath('articles')(tree):
+            try:
+                fields = self._extract_repo_info_lxml(article)
+                if fields:
+                    repos.append(fields)
+            except Exception as e:
+                log(f"解析仓库信息失败：{str(e)}", "WARNING")
+                continue
+
+        return self._build_repos(repos)
 
     def _extract_repo_info(self, article):
-        """提取单个仓库的信息"""
+        """提取单个仓库的原始文本字段"""
         # 仓库名称和链接
         title_element = article.find('h2', class_='h3')
         if not title_element:
@@ -217,105 +1001,1212 @@ class GitHubTrendingCrawler:
         if not link_element:
             return None
 
-        repo_name = link_element.get_text().strip().replace('\n', '').replace(' ', '')
-        repo_url = 'https://github.com' + link_element.get('href', '')
-
-        # 提取作者和项目名
-        if '/' in repo_name:
-            parts = repo_name.split('/')
-            author = parts[0]
-            project_name = parts[1] if len(parts) > 1 else repo_name
-        else:
-            author = ""
-            project_name = repo_name
-
         # 描述
         desc_element = article.find('p', class_='col-9')
-        description = desc_element.get_text().strip() if desc_element else ""
 
         # 编程语言
         language_element = article.find('span', itemprop='programmingLanguage')
-        language = language_element.get_text().strip() if language_element else ""
 
         # 星数
         stars_element = article.find('a', href=lambda x: x and '/stargazers' in x)
-        stars = 0
-        if stars_element:
-            stars_text = stars_element.get_text().strip()
-            stars = format_number(stars_text)
 
         # Fork 数
         forks_element = article.find('a', href=lambda x: x and '/forks' in x)
-        forks = 0
-        if forks_element:
-            forks_text = forks_element.get_text().strip()
-            forks = format_number(forks_text)
 
         # 今日星数增长
         today_stars_element = article.find('span', class_='d-inline-block float-sm-right')
-        today_stars = 0
-        if today_stars_element:
-            today_stars_text = today_stars_element.get_text().strip()
-            if 'stars today' in today_stars_text:
-                today_stars = format_number(today_stars_text.split('stars')[0].strip())
 
-        return {
-            'name': repo_name,
-            'author': author,
-            'project_name': project_name,
-            'url': repo_url,
-            'description': description,
-            'language': language,
-            'stars': stars,
-            'forks': forks,
-            'today_stars': today_stars,
-            'formatted_stars': format_stars(stars),
-            'formatted_today_stars': format_stars(today_stars)
+        return dict(
+            name_text=link_element.get_text(),
+            href=link_element.get('href', ''),
+            description=desc_element.get_text() if desc_element else "",
+            language=language_element.get_text() if language_element else "",
+            stars_text=stars_element.get_text() if stars_element else "",
+            forks_text=forks_element.get_text() if forks_element else "",
+            today_stars_text=today_stars_element.get_text() if today_stars_element else ""
+        )
+
+    def _extract_repo_info_lxml(self, article):
+        """提取单个仓库的原始文本字段（lxml 版本）"""
+        link_elements = _xpath('title_link')(article)
+        if not link_elements:
+            return None
+        link_element = link_elements[0]
+
+        return dict(
+            name_text=link_element.text_content(),
+            href=link_element.get('href', ''),
+            description=_first_text(_xpath('description')(article)),
+            language=_first_text(_xpath('language')(article)),
+            stars_text=_first_text(_xpath('stars')(article)),
+            forks_text=_first_text(_xpath('forks')(article)),
+            today_stars_text=_first_text(_xpath('today_stars')(article))
+        )
+
+    def _build_repos(self, rows):
+        """根据页面提取的原始文本构建仓库记录，整页的星数、Fork 数和周期星数一次性解析
+
+        周期星数文本为 "N stars today/this week/this month"，周榜、月榜的周期记录在 period 字段。
+        """
+        texts = []
+        periods = []
+        for row in rows:
+            today_stars_text = row['today_stars_text']
+            period = star_period(today_stars_text)
+            periods.append(period)
+            texts.append(row['stars_text'])
+            texts.append(row['forks_text'])
+            texts.append(today_stars_text if period else '')
+        counts = parse_counts(texts)
+
+        return [
+            TrendingRepo(
+                name=row['name_text'].strip().replace('\n', '').replace(' ', ''),
+                url='https://github.com' + row['href'],
+                description=row['description'].strip(),
+                language=row['language'].strip(),
+                stars=counts[i * 3],
+                forks=counts[i * 3 + 1],
+                today_stars=counts[i * 3 + 2],
+                **({'period': periods[i]} if periods[i] not in (None, 'daily') else {})
+            )
+            for i, row in enumerate(rows)
+        ]
+
+# XPath 表达式（与 BeautifulSoup 的 find 规则一一对应），首次使用时编译
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_XPATHS = {
+    'articles': f"//article[{_has_class('Box-row')}]",
+    'title_link': f"(.//h2[{_has_class('h3')}])[1]//a",
+    'description': f"(.//p[{_has_class('col-9')}])[1]",
+    'language': "(.//span[@itemprop='programmingLanguage'])[1]",
+    'stars': "(.//a[contains(@href, '/stargazers')])[1]",
+    'forks': "(.//a[contains(@href, '/forks')])[1]",
+    'today_stars': "(.//span[normalize-space(@class)='d-inline-block float-sm-right'])[1]",
+}
+
+@functools.lru_cache(maxsize=None)
+def _xpath(name):
+    """首次使用时编译 XPath，之后复用编译结果"""
+    from lxml import etree
+    return etree.XPath(_XPATHS[name])
+
+def _first_text(elements):
+    """返回首个元素的文本内容，不存在时返回空字符串"""
+    return elements[0].text_content() if elements else ""
+
+# ==============================================================================
+# 排序模块 - 加权特征打分
+# ==============================================================================
+
+class RepoRanker:
+    """按加权特征为仓库打分排序
+
+    每个特征按列对整批仓库一次性计算，再做 min-max 归一化后加权求和。
+    可通过 register_feature 注册自定义特征：func(repos, ranker) -> 与 repos 等长的数值列表。
+    """
+
+    FEATURES = {}
+
+    def __init__(self, weights=None, languages=None, keywords=None):
+        self.weights = parse_weights(RANK_WEIGHTS) if weights is None else weights
+        languages = RANK_LANGUAGES if languages is None else languages
+        keywords = RANK_KEYWORDS if keywords is None else keywords
+        self.languages = {item.strip().lower() for item in languages.split(',') if item.strip()}
+        self.keywords = [item.strip().lower() for item in keywords.split(',') if item.strip()]
+
+        for name in self.weights:
+            if name not in self.FEATURES:
+                raise ValueError(f"未知的排序特征：{name}（可选：{', '.join(sorted(self.FEATURES))}）")
+
+    @classmethod
+    def register_feature(cls, name):
+        """注册排序特征的装饰器"""
+        def decorator(func):
+            cls.FEATURES[name] = func
+            return func
+        return decorator
+
+    def rank(self, repos):
+        """计算 score 字段并按得分降序返回新列表（同分保持原顺序），未配置权重时原样返回"""
+        if not self.weights or not repos:
+            return repos
+
+        scores = [0.0] * len(repos)
+        for name, weight in self.weights.items():
+            column = _min_max(self.FEATURES[name](repos, self))
+            scores = [score + weight * value for score, value in zip(scores, column)]
+
+        for repo, score in zip(repos, scores):
+            repo['score'] = round(score, 4)
+        ranked = sorted(repos, key=lambda repo: repo['score'], reverse=True)
+        log("排序完成，前 5 名：" + ', '.join(f"{repo['name']}({repo['score']})" for repo in ranked[:5]))
+        return ranked
+
+def parse_weights(value):
+    """解析 "特征:权重" 列表"""
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.strip().partition(':')
+        if not name:
+            continue
+        try:
+            weights[name.strip()] = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise ValueError(f"权重不是数字：{item.strip()}") from None
+    return weights
+
+def _min_max(values):
+    """min-max 归一化到 [0, 1]，全部相等时返回全 0"""
+    low, high = min(values), max(values)
+    if high == low:
+        return [0.0] * len(values)
+    return [(value - low) / (high - low) for value in values]
+
+@RepoRanker.register_feature('today_stars')
+def _feature_today_stars(repos, ranker):
+    return [math.log1p(repo.get('daily_stars', repo.get('today_stars', 0))) for repo in repos]
+
+@RepoRanker.register_feature('stars')
+def _feature_stars(repos, ranker):
+    return [math.log1p(repo.get('stars', 0)) for repo in repos]
+
+@RepoRanker.register_feature('star_fork_ratio')
+def _feature_star_fork_ratio(repos, ranker):
+    return [math.log1p(repo.get('stars', 0) / (repo.get('forks', 0) + 1)) for repo in repos]
+
+@RepoRanker.register_feature('star_velocity')
+def _feature_star_velocity(repos, ranker):
+    return [math.log1p(max(repo.get('star_velocity', repo.get('daily_stars', 0)), 0)) for repo in repos]
+
+@RepoRanker.register_feature('novelty')
+def _feature_novelty(repos, ranker):
+    # 依赖历史模块标注的 days_on_list，没有历史数据时视为新项目
+    return [1.0 / max(repo.get('days_on_list', 1), 1) for repo in repos]
+
+@RepoRanker.register_feature('language')
+def _feature_language(repos, ranker):
+    return [1.0 if repo.get('language', '').lower() in ranker.languages else 0.0 for repo in repos]
+
+@RepoRanker.register_feature('keyword')
+def _feature_keyword(repos, ranker):
+    texts = [f"{repo.get('name', '')} {repo.get('description', '')}".lower() for repo in repos]
+    return [float(sum(1 for keyword in ranker.keywords if keyword in text)) for text in texts]
+
+# ==============================================================================
+# 去重模块 - 近似重复项目聚类
+# ==============================================================================
+
+class RepoDeduplicator:
+    """按 仓库名 + 描述 的向量相似度合并近似重复的项目（fork、克隆、同类 awesome 列表）
+
+    - tfidf：本地 TF-IDF 稀疏向量，无需网络
+    - embedding：硅基流动向量接口，失败时回退到 tfidf
+    TF-IDF 的相似度矩阵通过倒排索引一次性计算（稀疏矩阵 X·Xᵀ），稠密向量在聚类时按需计算点积。
+    按排序顺序贪心聚类：每个项目归入第一个相似度达到阈值的代表项目，代表项目即组内排序最靠前的项目。
+    """
+
+    def __init__(self, mode=None, threshold=None, client=None):
+        self.mode = DEDUP_MODE if mode is None else mode
+        self.threshold = DEDUP_THRESHOLD if threshold is None else threshold
+        self.client = client
+
+    @tracer.traced('dedup')
+    def dedupe(self, repos):
+        """返回代表项目列表（保持原顺序），被合并的项目记录在代表项目的 duplicates 字段"""
+        if self.mode == 'off' or len(repos) < 2:
+            return repos
+        for repo in repos:
+            repo.pop('duplicates', None)
+
+        texts = [self._text(repo) for repo in repos]
+        vectors = None
+        if self.mode == 'embedding':
+            vectors = self._embed(texts)
+        if vectors is None:
+            similarity = self._sparse_similarity(self._tfidf(texts))
+        else:
+            similarity = self._dense_similarity(vectors)
+
+        representatives = []
+        for i, repo in enumerate(repos):
+            leader = next((j for j in representatives if similarity(i, j) >= self.threshold), None)
+            if leader is None:
+                representatives.append(i)
+                continue
+            repos[leader].setdefault('duplicates', []).append({
+                'name': repo['name'],
+                'url': repo['url'],
+                'formatted_stars': repo.get('formatted_stars', ''),
+                'similarity': round(similarity(i, leader), 3)
+            })
+
+        merged = len(repos) - len(representatives)
+        if merged:
+            log(f"合并 {merged} 个近似重复项目，剩余 {len(representatives)} 个")
+            tracer.add('merged', merged)
+        return [repos[i] for i in representatives]
+
+    @staticmethod
+    def _text(repo):
+        """仓库名（不含 owner，fork 与原项目同名）+ 描述"""
+        name = repo['name'].split('/')[-1]
+        return f"{name} {repo.get('description', '')}"
+
+    @staticmethod
+    def _tokenize(text):
+        """拆分驼峰、连字符和下划线；中文按单字切分"""
+        text = re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', text).lower()
+        return re.findall(r'[a-z0-9]+|[\u4e00-\u9fff]', text)
+
+    def _tfidf(self, texts):
+        """L2 归一化的 TF-IDF 稀疏向量 [{term: weight}, ...]"""
+        documents = [self._tokenize(text) for text in texts]
+        document_frequency = {}
+        for tokens in documents:
+            for term in set(tokens):
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        total = len(documents)
+        vectors = []
+        for tokens in documents:
+            counts = {}
+            for term in tokens:
+                counts[term] = counts.get(term, 0) + 1
+            vector = {
+                term: count * (math.log((1 + total) / (1 + document_frequency[term])) + 1)
+                for term, count in counts.items()
+            }
+            vectors.append(self._normalize(vector))
+        return vectors
+
+    def _embed(self, texts):
+        """调用向量接口，返回 L2 归一化的稠密向量 [[float, ...], ...]；失败时返回 None"""
+        try:
+            if self.client is None:
+                from openai import OpenAI
+                self.client = OpenAI(api_key=SILICONFLOW_API_KEY, base_url=SILICONFLOW_BASE_URL,
+                                     timeout=SILICONFLOW_TIMEOUT)
+            response = self.client.embeddings.create(model=SILICONFLOW_EMBEDDING_MODEL, input=texts)
+            data = sorted(response.data, key=lambda item: item.index)
+            vectors = []
+            for item in data:
+                norm = math.sqrt(sum(value * value for value in item.embedding))
+                vectors.append([value / norm for value in item.embedding] if norm else [0.0] * len(item.embedding))
+            return vectors
+        except Exception as e:
+            log(f"获取向量失败，改用 TF-IDF：{str(e)}", "WARNING")
+            return None
+
+    @staticmethod
+    def _normalize(vector):
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {key: value / norm for key, value in vector.items()} if norm else {}
+
+    @staticmethod
+    def _dense_similarity(vectors):
+        """稠密向量的余弦相似度：聚类只比较项目与代表项目，按需计算点积，不构建整个矩阵"""
+        dot = getattr(math, 'sumprod', None)  # Python 3.12+
+        if dot is None:
+            def dot(a, b):
+                return sum(map(operator.mul, a, b))
+
+        def similarity(i, j):
+            return dot(vectors[i], vectors[j])
+        return similarity
+
+    @staticmethod
+    def _sparse_similarity(vectors):
+        """稀疏向量的余弦相似度：按维度建立倒排索引，一次性累加出矩阵的非零项"""
+        postings = {}
+        for i, vector in enumerate(vectors):
+            for key, value in vector.items():
+                postings.setdefault(key, []).append((i, value))
+
+        similarity = [{} for _ in vectors]
+        for entries in postings.values():
+            for a, (i, value_i) in enumerate(entries):
+                row = similarity[i]
+                for j, value_j in entries[a + 1:]:
+                    product = value_i * value_j
+                    row[j] = row.get(j, 0.0) + product
+                    similarity[j][i] = similarity[j].get(i, 0.0) + product
+        return lambda i, j: similarity[i].get(j, 0.0)
+
+# ==============================================================================
+# 缓存模块 - HTTP 条件请求
+# ==============================================================================
+
+class HttpCache:
+    """HTTP 条件请求缓存（本地目录），保存 ETag/Last-Modified 及提取后的结果
+
+    命中 304 时直接返回缓存的提取结果，无需重新下载和解析页面。
+    条目键包含 EXTRACT_VERSION，提取逻辑变化后旧条目不再命中，恢复的旧缓存不会返回旧格式的结果。
+    缓存目录可由 GitHub Actions cache 恢复；每个条目一个文件，文件修改时间即最近使用时间，
+    初始化时删除过期条目，并按最近使用时间保留最多 max_entries 个。
+    """
+
+    def __init__(self, directory=None, ttl_days=None, max_entries=None):
+        self.directory = HTTP_CACHE_DIR if directory is None else directory
+        self.ttl = (HTTP_CACHE_TTL_DAYS if ttl_days is None else ttl_days) * 86400
+        self.max_entries = HTTP_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._prune()
+
+    def fetch(self, url, extract, params=None, session=None, **kwargs):
+        """发起 GET 请求并返回 extract(response) 的结果，未修改时返回缓存结果
+
+        extract 的返回值必须可 JSON 序列化；非 2xx/304 响应抛出 HTTPError。
+        """
+        if session is None:
+            import requests
+            session = requests
+        headers = dict(kwargs.pop('headers', None) or {})
+        path = self._entry_path(url, params)
+        entry = self._load(path) if path else None
+
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = session.get(url, params=params, headers=headers, **kwargs)
+        tracer.add('requests')
+        retries = getattr(getattr(response.raw, 'retries', None), 'history', ())
+        if retries:
+            tracer.add('retries', len(retries))
+
+        # 流式响应不读取响应体时需显式关闭，连接才会归还连接池
+        try:
+            if entry and response.status_code == 304:
+                self.hits += 1
+                tracer.add('http_cache_hits')
+                log(f"HTTP 缓存命中（304）：{url}", "DEBUG")
+                self._touch(path)
+                return entry['value']
+
+            response.raise_for_status()
+            if not kwargs.get('stream'):
+                # 流式响应由 extract 自行统计实际读取的字节数
+                tracer.add('bytes', len(response.content))
+            value = extract(response)
+        finally:
+            response.close()
+        self.misses += 1
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if path and (etag or last_modified):
+            self._store(path, {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'value': value,
+                'stored_at': time.time()
+            })
+        return value
+
+    def _entry_path(self, url, params):
+        """缓存文件路径，禁用缓存时返回 None"""
+        if not self.directory:
+            return None
+        raw = EXTRACT_VERSION + ':' + url + '?' + json.dumps(params or {}, sort_keys=True)
+        return os.path.join(self.directory, hashlib.sha256(raw.encode('utf-8')).hexdigest() + '.json')
+
+    def _load(self, path):
+        """读取缓存条目，不存在或损坏时返回 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, path, entry):
+        """原子写入缓存条目（先写临时文件再替换），避免并发线程读到半截文件"""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, default=_json_default)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log(f"写入 HTTP 缓存失败：{str(e)}", "DEBUG")
+
+    def _touch(self, path):
+        """更新条目的最近使用时间"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _prune(self):
+        """删除过期条目和残留的临时文件，超出 max_entries 时删除最久未使用的条目"""
+        cutoff = time.time() - self.ttl
+        entries = []
+        removed = 0
+        try:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                mtime = os.path.getmtime(path)
+                if not name.endswith('.json') or (self.ttl and mtime < cutoff):
+                    os.remove(path)
+                    removed += 1
+                else:
+                    entries.append((mtime, path))
+            if self.max_entries and len(entries) > self.max_entries:
+                entries.sort()
+                for _, path in entries[:len(entries) - self.max_entries]:
+                    os.remove(path)
+                    removed += 1
+        except OSError as e:
+            log(f"清理 HTTP 缓存失败：{str(e)}", "DEBUG")
+        if removed:
+            log(f"HTTP 缓存清理 {removed} 个条目", "DEBUG")
+
+# ==============================================================================
+# 缓存模块 - AI 分析结果持久化
+# ==============================================================================
+
+class AnalysisCache:
+    """AI 分析结果缓存（SQLite），按 仓库名 + 模型 + prompt 版本 + 内容哈希 索引"""
+
+    def __init__(self, path=None, ttl_days=None, max_entries=None):
+        self.path = ANALYSIS_CACHE_PATH if path is None else path
+        self.ttl = (ANALYSIS_CACHE_TTL_DAYS if ttl_days is None else ttl_days) * 86400
+        self.max_entries = ANALYSIS_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 分析阶段多线程共享同一连接，由 _lock 串行化访问
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            "key TEXT PRIMARY KEY, repo TEXT, result TEXT, created_at REAL, accessed_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_accessed ON analysis (accessed_at)")
+        self.conn.commit()
+        self._purge_expired()
+
+    @staticmethod
+    def make_key(repo, model, readme_content=""):
+        """生成缓存键：内容哈希覆盖描述和 README，任何一项变化都会重新分析"""
+        digest = hashlib.sha256()
+        digest.update(repo.get('description', '').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update((readme_content or '').encode('utf-8'))
+        return f"{repo['name']}|{model}|{PROMPT_VERSION}|{digest.hexdigest()}"
+
+    def get(self, key):
+        """读取缓存，未命中或已过期返回 None"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result, created_at FROM analysis WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] < self.ttl:
+                self.conn.execute("UPDATE analysis SET accessed_at = ? WHERE key = ?", (now, key))
+                self.conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def set(self, key, repo_name, result):
+        """写入缓存，超出容量时淘汰最久未访问的条目"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analysis (key, repo, result, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, repo_name, json.dumps(result, ensure_ascii=False), now, now)
+            )
+            self.conn.execute(
+                "DELETE FROM analysis WHERE key IN ("
+                "SELECT key FROM analysis ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+    def hit_rate(self):
+        """缓存命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _purge_expired(self):
+        """清理过期条目"""
+        with self._lock:
+            self.conn.execute("DELETE FROM analysis WHERE created_at < ?", (time.time() - self.ttl,))
+            self.conn.commit()
+
+# ==============================================================================
+# 历史模块 - 每日榜单快照
+# ==============================================================================
+
+class HistoryStore:
+    """Trending 历史快照（SQLite），支持首次上榜、在榜天数、星数增速和新上榜检测"""
+
+    def __init__(self, path=None):
+        self.path = HISTORY_DB_PATH if path is None else path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " date TEXT NOT NULL, repo TEXT NOT NULL, rank INTEGER, lists TEXT, language TEXT,"
+            " stars INTEGER, forks INTEGER, today_stars INTEGER,"
+            " PRIMARY KEY (date, repo));"
+            "CREATE INDEX IF NOT EXISTS idx_snapshots_repo_date ON snapshots (repo, date);"
+            "CREATE INDEX IF NOT EXISTS idx_snapshots_date ON snapshots (date);"
+        )
+        self.conn.commit()
+
+    def record(self, repos, date=None):
+        """记录当天的榜单快照
+
+        同一天多次记录（多个定时任务或重复运行）时与已有快照合并：lists 取并集，rank 保留最好名次，
+        星数等数值取最新一次，避免后运行的任务覆盖先前任务的榜单来源
+        """
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        rows = [repo.to_row(date, rank) for rank, repo in enumerate(TrendingRepo.load_many(repos), 1)]
+        placeholders = ','.join('?' * len(rows))
+        with self._lock:
+            existing = {
+                repo: (rank, lists)
+                for repo, rank, lists in self.conn.execute(
+                    f"SELECT repo, rank, lists FROM snapshots WHERE date = ? AND repo IN ({placeholders})",
+                    [date] + [row[1] for row in rows]
+                )
+            }
+            rows = [self._merge_row(row, *existing[row[1]]) if row[1] in existing else row for row in rows]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO snapshots "
+                "(date, repo, rank, lists, language, stars, forks, today_stars) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+        log(f"已记录 {date} 榜单快照：{len(rows)} 个仓库")
+
+    @staticmethod
+    def _merge_row(row, rank, lists):
+        """将新快照行与当天已有记录 (rank, lists) 合并"""
+        labels = lists.split(',') if lists else []
+        labels += [label for label in row[3].split(',') if label and label not in labels]
+        best_rank = row[2] if rank is None else min(rank, row[2])
+        return (row[0], row[1], best_rank, ','.join(labels)) + tuple(row[4:])
+
+    def snapshot(self, date=None):
+        """读取某天的榜单快照，按当天排名返回仓库记录"""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        rows = self._query_all(
+            "SELECT repo, lists, language, stars, forks, today_stars FROM snapshots "
+            "WHERE date = ? ORDER BY rank",
+            (date,)
+        )
+        return [TrendingRepo.from_row(row) for row in rows]
+
+    def first_seen(self, name):
+        """首次上榜日期，从未上榜返回 None"""
+        row = self._query_one("SELECT MIN(date) FROM snapshots WHERE repo = ?", (name,))
+        return row[0] if row else None
+
+    def days_on_list(self, name):
+        """累计在榜天数"""
+        row = self._query_one("SELECT COUNT(*) FROM snapshots WHERE repo = ?", (name,))
+        return row[0] if row else 0
+
+    def star_velocity(self, name, days=7, date=None):
+        """最近 days 天的平均每日星数增长；只有一天数据时使用当日新增星数"""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        rows = self._query_all(
+            "SELECT date, stars, today_stars FROM snapshots "
+            "WHERE repo = ? AND date > date(?, ?) AND date <= ? ORDER BY date",
+            (name, date, f"-{days} days", date)
+        )
+        if not rows:
+            return 0.0
+        if len(rows) == 1:
+            return float(rows[0][2])
+        span = (datetime.strptime(rows[-1][0], "%Y-%m-%d") - datetime.strptime(rows[0][0], "%Y-%m-%d")).days
+        return (rows[-1][1] - rows[0][1]) / max(span, 1)
+
+    def annotate(self, repos, date=None, velocity_days=7):
+        """批量为仓库补充 first_seen、days_on_list、star_velocity、is_new 字段（单次查询）"""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        names = [repo['name'] for repo in repos]
+        if not names:
+            return repos
+
+        placeholders = ','.join('?' * len(names))
+        stats = {
+            row[0]: row[1:]
+            for row in self._query_all(
+                "SELECT repo, MIN(date), COUNT(*), "
+                " MIN(CASE WHEN date > date(?, ?) THEN date END), "
+                " MAX(date) "
+                f"FROM snapshots WHERE repo IN ({placeholders}) AND date <= ? GROUP BY repo",
+                [date, f"-{velocity_days} days"] + names + [date]
+            )
         }
+        window_stars = {
+            (row[0], row[1]): row[2]
+            for row in self._query_all(
+                f"SELECT repo, date, stars FROM snapshots WHERE repo IN ({placeholders}) "
+                "AND date > date(?, ?) AND date <= ?",
+                names + [date, f"-{velocity_days} days", date]
+            )
+        }
+
+        for repo in repos:
+            first_seen, days, window_start, last = stats.get(repo['name'], (date, 0, None, None))
+            repo['first_seen'] = first_seen
+            repo['days_on_list'] = days
+            repo['is_new'] = first_seen == date
+            velocity = float(repo.get('daily_stars', repo.get('today_stars', 0)))
+            if window_start and last and window_start != last:
+                span = (datetime.strptime(last, "%Y-%m-%d") - datetime.strptime(window_start, "%Y-%m-%d")).days
+                velocity = (window_stars[(repo['name'], last)] - window_stars[(repo['name'], window_start)]) / max(span, 1)
+            repo['star_velocity'] = velocity
+        return repos
+
+    def _query_one(self, sql, params):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def _query_all(self, sql, params):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+# ==============================================================================
+# 断点模块 - 分阶段持久化，失败后续跑
+# ==============================================================================
+
+class RunCheckpoint:
+    """运行断点：按 日期 + 配置哈希 建立运行目录，保存爬取结果、逐项目分析结果、渲染内容和已推送目标
+
+    - 阶段数据（repos、rendered、delivered）保存为 JSON，原子替换写入
+    - 分析结果逐条追加到 analysis.jsonl，任务中途被终止也不会丢失已完成的项目
+    """
+
+    def __init__(self, directory=None, key=None, resume=None):
+        directory = CHECKPOINT_DIR if directory is None else directory
+        self.key = key or self.default_key()
+        self.path = os.path.join(directory, self.key)
+        self.resume = CHECKPOINT_RESUME if resume is None else resume
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self._prune(directory)
+
+    @staticmethod
+    def default_key(lists=None, limit=None, stamp=None):
+        """运行标识（默认为 CHECKPOINT_RUN_ID，未配置时为当天日期）+ 影响结果的配置的哈希"""
+        config = {
+            'lists': lists or GITHUB_TRENDING_LISTS or f"{GITHUB_LANGUAGE}:{GITHUB_SINCE}",
+            'limit': ANALYZE_LIMIT if limit is None else limit,
+            'rank': [RANK_WEIGHTS, RANK_LANGUAGES, RANK_KEYWORDS],
+            'new_only': HISTORY_NEW_ONLY,
+            'dedup': [DEDUP_MODE, DEDUP_THRESHOLD],
+            'model': SILICONFLOW_MODEL,
+            'prompt': PROMPT_VERSION,
+        }
+        digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        if not stamp:
+            stamp = f"run-{CHECKPOINT_RUN_ID}" if CHECKPOINT_RUN_ID else datetime.now().strftime('%Y-%m-%d')
+        return f"{stamp}-{digest}"
+
+    def load(self, stage):
+        """读取阶段数据，未开启续跑或不存在时返回 None"""
+        if not self.resume:
+            return None
+        try:
+            with open(os.path.join(self.path, f"{stage}.json"), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            log(f"从断点恢复阶段：{stage}")
+            return data
+        except (OSError, ValueError):
+            return None
+
+    def save(self, stage, data):
+        """原子写入阶段数据"""
+        path = os.path.join(self.path, f"{stage}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=_json_default)
+            os.replace(tmp_path, path)
+
+    def record_analysis(self, repo):
+        """追加单个项目的分析结果（降级结果不记录，续跑时会重新分析）"""
+        analysis = repo.get('ai_analysis')
+        if not analysis or analysis.get('fallback'):
+            return
+        line = json.dumps({'name': repo['name'], 'ai_analysis': analysis}, ensure_ascii=False)
+        with self._lock:
+            with open(os.path.join(self.path, 'analysis.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def load_analysis(self):
+        """读取已完成的分析结果 {项目名: ai_analysis}，忽略被截断的最后一行"""
+        if not self.resume:
+            return {}
+        results = {}
+        try:
+            with open(os.path.join(self.path, 'analysis.jsonl'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                        results[item['name']] = item['ai_analysis']
+                    except (ValueError, KeyError):
+                        continue
+        except OSError:
+            pass
+        if results:
+            log(f"从断点恢复 {len(results)} 个项目的分析结果")
+        return results
+
+    def _prune(self, directory):
+        """删除超过保留天数的旧运行目录"""
+        cutoff = time.time() - CHECKPOINT_KEEP_DAYS * 86400
+        try:
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name != self.key and os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                    for filename in os.listdir(path):
+                        os.remove(os.path.join(path, filename))
+                    os.rmdir(path)
+        except OSError as e:
+            log(f"清理旧断点失败：{str(e)}", "DEBUG")
+
+# ==============================================================================
+# 限流模块 - 令牌桶 + AIMD 自适应并发
+# ==============================================================================
+
+class RateLimiter:
+    """API 客户端限流器
+
+    - 令牌桶：按每分钟请求数（rpm）和每分钟 token 数（tpm）限流，0 表示不限
+    - AIMD 并发控制：成功时并发上限缓慢增加，遇到 429/5xx 时减半
+    - Retry-After：服务端要求等待时，所有请求暂停到指定时间
+    """
+
+    def __init__(self, rpm=0, tpm=0, max_concurrency=1, min_concurrency=1):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max(max_concurrency, 1)
+        self.min_concurrency = max(min(min_concurrency, self.max_concurrency), 1)
+        self.concurrency = float(self.max_concurrency)
+        self.in_flight = 0
+        self.pause_until = 0.0
+        self.throttled = 0
+
+        now = time.monotonic()
+        self._request_tokens = float(rpm)
+        self._token_tokens = float(tpm)
+        self._updated_at = now
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens=0):
+        """阻塞直到允许发送请求，返回实际扣除的 token 数（用于 release 时按实际用量退还）"""
+        if self.tpm:
+            tokens = min(tokens, self.tpm)
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                wait = None
+                if self.in_flight >= int(self.concurrency):
+                    wait = None  # 等待其他请求完成
+                elif now < self.pause_until:
+                    wait = self.pause_until - now
+                else:
+                    wait = max(
+                        self._deficit(self._request_tokens, 1, self.rpm),
+                        self._deficit(self._token_tokens, tokens, self.tpm)
+                    )
+                    if wait <= 0:
+                        if self.rpm:
+                            self._request_tokens -= 1
+                        if self.tpm:
+                            self._token_tokens -= tokens
+                        self.in_flight += 1
+                        return tokens
+
+                self._cond.wait(wait)
+
+    def slot(self, tokens=0):
+        """acquire() 并返回 LimiterSlot，由其负责只归还一次"""
+        return LimiterSlot(self, self.acquire(tokens))
+
+    def release(self, outcome='success', retry_after=None, reserved_tokens=0, used_tokens=None):
+        """请求结束：成功时加性增加并发上限，被限流（throttled）时乘性减少并按 Retry-After 暂停
+
+        outcome 为 'success'、'throttled' 或 'error'（与限流无关的失败，不调整并发）。
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == 'success':
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+                if self.tpm and used_tokens is not None:
+                    # 按实际用量退还多扣的 token
+                    self._token_tokens = min(self.tpm, self._token_tokens + max(reserved_tokens - used_tokens, 0))
+            elif outcome == 'throttled':
+                self.throttled += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                if retry_after:
+                    self.pause_until = max(self.pause_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def _refill(self, now):
+        """按流逝时间补充令牌"""
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        if self.rpm:
+            self._request_tokens = min(self.rpm, self._request_tokens + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._token_tokens = min(self.tpm, self._token_tokens + elapsed * self.tpm / 60)
+
+    @staticmethod
+    def _deficit(available, cost, per_minute):
+        """令牌不足时需要等待的秒数"""
+        if not per_minute or available >= cost:
+            return 0
+        return (cost - available) * 60 / per_minute
+
+class LimiterSlot:
+    """一个已占用的并发名额：release() 只生效一次，被取消的请求可由取消方提前归还，不必等待请求线程结束"""
+
+    def __init__(self, limiter, reserved_tokens=0):
+        self.limiter = limiter
+        self.reserved_tokens = reserved_tokens
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self, outcome='success', retry_after=None, used_tokens=None):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.limiter.release(outcome, retry_after=retry_after, reserved_tokens=self.reserved_tokens,
+                             used_tokens=used_tokens)
+
+    def abandon(self):
+        """请求被取消：按 'error' 归还名额（不调整并发上限）"""
+        self.release('error')
+
+def parse_retry_after(value):
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+# ==============================================================================
+# 模型路由 - 多模型对冲请求
+# ==============================================================================
+
+def parse_model_routes(value):
+    """解析备用模型配置，返回 [(模型, 接口地址或 None), ...]"""
+    routes = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        model, _, base_url = item.partition('@')
+        model, base_url = model.strip(), base_url.strip()
+        if not model:
+            raise ValueError(f"缺少模型名称：{item}")
+        if base_url and not urlparse(base_url).scheme.startswith('http'):
+            raise ValueError(f"接口地址无效：{base_url}")
+        routes.append((model, base_url or None))
+    return routes
+
+class RequestCancelled(Exception):
+    """对冲请求中已有其他模型返回有效结果，本请求被取消"""
+
+class CancelScope:
+    """对冲请求的取消信号：set() 时调用已登记的回调（关闭进行中的流、归还限流器名额）
+
+    阻塞在网络读取中的请求无法只靠检查标志及时退出，回调由取消方的线程执行。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def set(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log(f"取消请求时出错：{str(e)}", "DEBUG")
+
+    def register(self, callback):
+        """登记取消时调用的回调，已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+class ModelRoute:
+    """一个可用的模型：模型名、客户端、独立的限流器（硅基流动按模型限流）与最近的成功延迟"""
+
+    def __init__(self, model, client, limiter, window=200):
+        self.model = model
+        self.client = client
+        self.limiter = limiter
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+
+    def percentile(self, percent, min_samples):
+        """最近成功请求延迟的分位数，样本不足时返回 None"""
+        with self._lock:
+            if len(self.latencies) < min_samples:
+                return None
+            return _percentile(sorted(self.latencies), percent)
+
+class ModelRouter:
+    """多模型对冲请求
+
+    按 routes 的顺序发出请求：当前模型超过截止时间（历史延迟的 p95，样本不足时为固定值）
+    仍未返回，或返回错误/无效结果时，向下一个模型发出相同请求；取第一个有效结果，
+    并取消其余仍在进行的请求：立即关闭进行中的流并归还其限流器名额，尚未收到响应的请求结果被丢弃。
+    请求在守护线程中执行，被丢弃的请求不会阻塞进程退出。
+    """
+
+    MIN_SAMPLES = 10
+
+    def __init__(self, routes, percentile=None, initial_delay=None):
+        self.routes = routes
+        self.percentile = SILICONFLOW_HEDGE_PERCENTILE if percentile is None else percentile
+        self.initial_delay = SILICONFLOW_HEDGE_DELAY if initial_delay is None else initial_delay
+
+    def deadline(self, route):
+        """对冲等待时间（秒）"""
+        delay = route.percentile(self.percentile, self.MIN_SAMPLES)
+        return self.initial_delay if delay is None else delay
+
+    def race(self, call, is_valid):
+        """call(route, cancel) 发送请求并返回文本；返回第一个满足 is_valid 的结果
+
+        cancel 为 CancelScope，call 可通过 cancel.register() 登记被取消时的清理回调。
+        全部模型都没有有效结果时，返回第一个无效结果交给调用方兜底解析；全部失败时抛出最后一次异常。
+        """
+        cancel = CancelScope()
+        done = queue.Queue()
+        launched = 0
+        pending = 0
+        deadline = None
+        invalid = None
+        last_error = None
+
+        try:
+            while True:
+                if launched < len(self.routes) and (pending == 0 or time.monotonic() >= deadline):
+                    route = self.routes[launched]
+                    if launched:
+                        tracer.add('hedged_requests')
+                        log(f"模型 {self.routes[launched - 1].model} 未及时返回有效结果，"
+                            f"对冲请求 {route.model}", "DEBUG")
+                    threading.Thread(target=self._run, args=(route, call, cancel, done), daemon=True).start()
+                    launched += 1
+                    pending += 1
+                    deadline = time.monotonic() + self.deadline(route)
+                if pending == 0:
+                    break
+
+                timeout = max(deadline - time.monotonic(), 0) if launched < len(self.routes) else None
+                try:
+                    route, text, error = done.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                pending -= 1
+
+                if error is not None:
+                    last_error = error
+                    deadline = time.monotonic()  # 失败后立即切换到下一个模型
+                elif is_valid(text):
+                    if route is not self.routes[0]:
+                        tracer.add('hedge_wins')
+                    if pending:
+                        tracer.add('cancelled_requests', pending)
+                    return text
+                else:
+                    invalid = invalid if invalid is not None else text
+                    deadline = time.monotonic()
+        finally:
+            cancel.set()
+
+        if invalid is not None:
+            return invalid
+        raise last_error
+
+    def _run(self, route, call, cancel, done):
+        """在守护线程中执行单个模型的请求，结果放入 done 队列"""
+        start = time.monotonic()
+        try:
+            with tracer.span('model_request', model=route.model):
+                text = call(route, cancel)
+        except Exception as e:
+            done.put((route, None, e))
+            return
+        route.record(time.monotonic() - start)
+        done.put((route, text, None))
+
 # ==============================================================================
 # AI 分析模块 - 硅基流动 API
 # ==============================================================================
 
+class JsonBlockScanner:
+    """增量括号匹配：逐段输入文本，找到第一个完整的 JSON 对象/数组后返回其文本
+
+    与一次性解析共用同一套规则，流式输出时可在 JSON 闭合后立即停止读取。
+    """
+
+    def __init__(self, open_char='{', close_char='}'):
+        self.open_char = open_char
+        self.close_char = close_char
+        self.text = ""
+        self.start_idx = -1
+        self.depth = 0
+        self._scanned = 0
+
+    def feed(self, chunk):
+        """追加文本，找到完整的 JSON 块时返回该块文本，否则返回 None"""
+        self.text += chunk
+        if self.start_idx == -1:
+            self.start_idx = self.text.find(self.open_char, self._scanned)
+            if self.start_idx == -1:
+                self._scanned = len(self.text)
+                return None
+            self._scanned = self.start_idx
+
+        for i in range(self._scanned, len(self.text)):
+            char = self.text[i]
+            if char == self.open_char:
+                self.depth += 1
+            elif char == self.close_char and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    self._scanned = i + 1
+                    return self.text[self.start_idx:i + 1]
+        self._scanned = len(self.text)
+        return None
+
 class SiliconFlowSummarizer:
     """硅基流动 AI 分析器"""
     
-    def __init__(self):
+    def __init__(self, cache=None, limiter=None):
         self.api_key = SILICONFLOW_API_KEY
         self.base_url = SILICONFLOW_BASE_URL
         self.model = SILICONFLOW_MODEL
         self.timeout = SILICONFLOW_TIMEOUT
+        self.max_retries = SILICONFLOW_MAX_RETRIES
+        self.stream = SILICONFLOW_STREAM
         
+        from openai import OpenAI
+
+        # 重试由 _complete 结合限流器处理，关闭 SDK 自带重试
         self.client = OpenAI(
             api_key=self.api_key,
             base_url=self.base_url,
-            timeout=self.timeout
+            timeout=self.timeout,
+            max_retries=0
         )
+        
+        self.limiter = limiter or RateLimiter(
+            rpm=SILICONFLOW_RPM,
+            tpm=SILICONFLOW_TPM,
+            max_concurrency=ANALYZE_CONCURRENCY
+        )
+        self.route = ModelRoute(self.model, self.client, self.limiter)
+        
+        # 配置了备用模型时启用对冲请求
+        self.router = None
+        if SILICONFLOW_FALLBACK_MODELS:
+            routes = [self.route]
+            for model, base_url in parse_model_routes(SILICONFLOW_FALLBACK_MODELS):
+                client = self.client
+                if base_url and base_url.rstrip('/') != self.base_url.rstrip('/'):
+                    client = OpenAI(api_key=self.api_key, base_url=base_url, timeout=self.timeout, max_retries=0)
+                routes.append(ModelRoute(model, client, RateLimiter(
+                    rpm=SILICONFLOW_RPM,
+                    tpm=SILICONFLOW_TPM,
+                    max_concurrency=ANALYZE_CONCURRENCY
+                )))
+            self.router = ModelRouter(routes)
+            log(f"已启用对冲请求：{' → '.join(route.model for route in routes)}")
+        
+        self.on_result = None
+        
+        # 分析结果缓存，未配置路径时禁用
+        self.cache = cache
+        if self.cache is None and ANALYSIS_CACHE_PATH:
+            try:
+                self.cache = AnalysisCache()
+            except Exception as e:
+                log(f"分析缓存初始化失败，已禁用缓存：{str(e)}", "WARNING")
     
+    @tracer.traced('analyze_project')
     def analyze_project(self, repo, readme_content=""):
         """对单个项目进行分析：润色描述 + 生成亮点"""
+        cache_key = None
+        if self.cache:
+            cache_key = AnalysisCache.make_key(repo, self.model, readme_content)
+            cached = self.cache.get(cache_key)
+            if cached:
+                tracer.add('analysis_cache_hits')
+                log(f"项目 {repo['name']} 命中分析缓存")
+                return cached
+        
+        return self._request_analysis(repo, readme_content, cache_key)
+    
+    def _request_analysis(self, repo, readme_content="", cache_key=None):
+        """调用 API 分析单个项目，失败时降级为原始描述"""
         log(f"正在分析项目: {repo['name']}")
         
         prompt = self._build_prompt(repo, readme_content)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "你是一个技术分析师，擅长用简洁的中文总结 GitHub 项目。"
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-            
-            result = response.choices[0].message.content
+            result = self._complete(prompt, max_tokens=800)
             parsed = self._parse_result(result)
+            if cache_key and not parsed.get('fallback'):
+                self.cache.set(cache_key, repo['name'], parsed)
             log(f"项目 {repo['name']} 分析完成")
             return parsed
             
@@ -323,33 +2214,269 @@ class SiliconFlowSummarizer:
             log(f"项目分析失败 {repo['name']}：{str(e)}", "ERROR")
             return {
                 'chinese_description': repo['description'][:100] if repo['description'] else "暂无描述",
-                'highlight': "值得关注的开源项目"
+                'highlight': "值得关注的开源项目",
+                'fallback': True  # 降级结果，不写入缓存和断点
             }
     
-    def analyze_repos(self, repos, limit=10, crawler=None):
-        """批量分析项目"""
+    def _complete(self, prompt, max_tokens, json_open='{'):
+        """发送一次对话请求，返回模型输出文本
+
+        配置了备用模型时由 ModelRouter 对冲请求，取第一个包含有效 JSON 块的结果。
+        """
+        if self.router is None:
+            return self._complete_route(self.route, prompt, max_tokens, json_open)
+        return self.router.race(
+            lambda route, cancel: self._complete_route(route, prompt, max_tokens, json_open, cancel),
+            lambda text: self._has_valid_block(text, json_open)
+        )
+    
+    def _complete_route(self, route, prompt, max_tokens, json_open='{', cancel=None):
+        """向指定模型发送对话请求
+
+        请求经过该模型的限流器；遇到 429/5xx/连接错误时按 Retry-After 或指数退避重试，
+        重试耗尽后抛出最后一次异常，由调用方降级处理。
+        流式模式下，json_open 对应的 JSON 块一旦完整有效即关闭连接；cancel（CancelScope）被设置时
+        立即归还限流器名额并关闭进行中的流，请求以 RequestCancelled 结束。
+        """
+        from openai import APIConnectionError, APIStatusError
+
+        estimated_tokens = estimate_tokens(prompt) + max_tokens
+        limiter = route.limiter
+        
+        for attempt in range(self.max_retries + 1):
+            if cancel is not None and cancel.is_set():
+                raise RequestCancelled()
+            slot = limiter.slot(estimated_tokens)
+            if cancel is not None:
+                # 等待名额期间已被取消时，register 会立即归还名额
+                cancel.register(slot.abandon)
+                if cancel.is_set():
+                    raise RequestCancelled()
+            try:
+                response = route.client.chat.completions.create(
+                    model=route.model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "你是一个技术分析师，擅长用简洁的中文总结 GitHub 项目。"
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    stream=self.stream
+                )
+                if self.stream:
+                    if cancel is not None:
+                        cancel.register(response.close)
+                    content = self._read_stream(response, json_open, cancel)
+            except RequestCancelled:
+                slot.release('error')
+                raise
+            except (APIStatusError, APIConnectionError) as e:
+                status = getattr(e, 'status_code', None)
+                retryable = status is None or status == 429 or status >= 500
+                retry_after = None
+                if isinstance(e, APIStatusError):
+                    retry_after = parse_retry_after(e.response.headers.get('retry-after'))
+                if not retryable:
+                    slot.release('error')
+                    raise
+                if retry_after is None:
+                    retry_after = min(2 ** attempt, 30)
+                slot.release('throttled', retry_after=retry_after)
+                
+                if attempt >= self.max_retries:
+                    raise
+                tracer.add('retries')
+                log(f"API 请求受限或失败（{status or '连接错误'}），{retry_after:.0f} 秒后重试 "
+                    f"（{attempt + 1}/{self.max_retries}）", "WARNING")
+                continue
+            except Exception:
+                slot.release('error')
+                raise
+            
+            if self.stream:
+                # 提前结束的流没有 usage，按提示词与已读取输出的估算 token 数退还多扣的部分
+                slot.release('success', used_tokens=estimate_tokens(prompt) + estimate_tokens(content))
+                tracer.add('prompt_tokens', estimate_tokens(prompt))
+                tracer.add('completion_tokens', estimate_tokens(content))
+                tracer.add('estimated_token_calls')
+                return content
+            
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                tracer.add('prompt_tokens', getattr(usage, 'prompt_tokens', 0) or 0)
+                tracer.add('completion_tokens', getattr(usage, 'completion_tokens', 0) or 0)
+            slot.release('success', used_tokens=getattr(usage, 'total_tokens', None))
+            return response.choices[0].message.content
+    
+    def _read_stream(self, stream, json_open='{', cancel=None):
+        """读取流式输出，第一个 JSON 块完整且有效时立即关闭流
+
+        cancel 被设置时（取消方可能已从其他线程关闭流，读取随之出错）抛出 RequestCancelled。
+        """
+        close_char = '}' if json_open == '{' else ']'
+        scanner = JsonBlockScanner(json_open, close_char)
+        parts = []
+        block = None
+        try:
+            for chunk in stream:
+                if cancel is not None and cancel.is_set():
+                    raise RequestCancelled()
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                # 第一个 JSON 块无效时读完整个输出，交给文本解析兜底
+                if block is None:
+                    block = scanner.feed(delta)
+                    if block is not None and self._is_complete_block(block, json_open):
+                        return block
+        except Exception:
+            if cancel is not None and cancel.is_set():
+                raise RequestCancelled()
+            raise
+        finally:
+            stream.close()
+        return "".join(parts)
+    
+    def _has_valid_block(self, text, json_open):
+        """输出中第一个 JSON 块是否完整有效（对冲请求据此判断结果是否可用）"""
+        close_char = '}' if json_open == '{' else ']'
+        block = JsonBlockScanner(json_open, close_char).feed(text)
+        return block is not None and self._is_complete_block(block, json_open)
+    
+    def _is_complete_block(self, block, json_open):
+        """流式提前结束的条件：对象需包含所需字段，数组只需是合法 JSON"""
+        try:
+            parsed = json.loads(block)
+        except ValueError:
+            return False
+        if json_open == '{':
+            return isinstance(parsed, dict) and 'chinese_description' in parsed and 'highlight' in parsed
+        return isinstance(parsed, list)
+    
+    def analyze_repos(self, repos, limit=10, crawler=None, workers=None, batch_size=None, on_result=None):
+        """批量分析项目（README 获取与 AI 分析按项目并发执行，结果保持原顺序）
+
+        已带有 ai_analysis 的项目（如从断点恢复）直接跳过；on_result(repo) 在每个项目分析完成时调用。
+        """
         log(f"开始批量分析 {len(repos)} 个项目...")
         
         # 只分析前 N 个项目
         repos_to_analyze = repos[:limit]
+        self.on_result = on_result
         
-        for repo in repos_to_analyze:
-            # 获取 README 内容
-            readme_content = ""
-            if crawler:
-                readme_content = crawler.fetch_readme(repo['url'])
-            
-            # 分析项目
-            repo['ai_analysis'] = self.analyze_project(repo, readme_content)
+        pending = [repo for repo in repos_to_analyze if 'ai_analysis' not in repo]
+        if len(pending) < len(repos_to_analyze):
+            log(f"跳过 {len(repos_to_analyze) - len(pending)} 个已完成分析的项目")
+        
+        if workers is None:
+            workers = ANALYZE_CONCURRENCY
+        workers = max(1, min(workers, len(pending) or 1))
+        if batch_size is None:
+            batch_size = ANALYZE_BATCH_SIZE
+        
+        if batch_size > 1:
+            self._analyze_batched(pending, crawler, workers, batch_size)
+        elif workers == 1:
+            for repo in pending:
+                self._analyze_one(repo, crawler)
+        else:
+            log(f"并发分析，工作线程数：{workers}")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # list() 等待全部完成；结果直接写回各自的 repo，顺序不受完成先后影响
+                list(executor.map(lambda repo: self._analyze_one(repo, crawler), pending))
         
         log(f"批量分析完成，共分析 {len(repos_to_analyze)} 个项目")
+        if self.cache:
+            log(f"分析缓存命中 {self.cache.hits}/{self.cache.hits + self.cache.misses}"
+                f"（命中率 {self.cache.hit_rate():.0%}）")
         return repos_to_analyze
     
-    def _build_prompt(self, repo, readme_content):
-        """构建分析 prompt"""
-        prompt = f"""请分析以下 GitHub 项目：
-
-项目名称: {repo['name']}
+    def _analyze_one(self, repo, crawler=None):
+        """获取单个项目的 README 并进行分析"""
+        # 分析项目
+        self._set_analysis(repo, self.analyze_project(repo, self._fetch_readme(repo, crawler)))
+        return repo
+    
+    def _set_analysis(self, repo, analysis):
+        """写入分析结果并通知 on_result 回调"""
+        repo['ai_analysis'] = analysis
+        if getattr(self, 'on_result', None):
+            try:
+                self.on_result(repo)
+            except Exception as e:
+                log(f"分析结果回调失败 {repo['name']}：{str(e)}", "WARNING")
+    
+    def _fetch_readme(self, repo, crawler=None):
+        """获取 README 内容，失败时返回空字符串"""
+        if not crawler:
+            return ""
+        try:
+            return crawler.fetch_readme(repo['url'])
+        except Exception as e:
+            log(f"获取 README 异常 {repo['name']}：{str(e)}", "WARNING")
+            return ""
+    
+    def _analyze_batched(self, repos, crawler, workers, batch_size):
+        """合并请求模式：每次请求分析 batch_size 个项目，缺失或无效的条目逐个补分析"""
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            readmes = list(executor.map(lambda repo: self._fetch_readme(repo, crawler), repos))
+            
+            pending = []
+            for repo, readme_content in zip(repos, readmes):
+                cache_key = None
+                if self.cache:
+                    cache_key = AnalysisCache.make_key(repo, self.model, readme_content)
+                    cached = self.cache.get(cache_key)
+                    if cached:
+                        tracer.add('analysis_cache_hits')
+                        self._set_analysis(repo, cached)
+                        continue
+                pending.append((repo, readme_content, cache_key))
+            
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            log(f"合并请求模式：{len(pending)} 个项目分 {len(batches)} 次请求")
+            list(executor.map(self._analyze_batch, batches))
+    
+    @tracer.traced('analyze_batch')
+    def _analyze_batch(self, items):
+        """用一次请求分析多个项目，items 为 [(repo, readme_content, cache_key), ...]"""
+        names = [repo['name'] for repo, _, _ in items]
+        results = {}
+        
+        try:
+            result = self._complete(
+                self._build_batch_prompt(items),
+                max_tokens=min(4000, 400 * len(items)),
+                json_open='['
+            )
+            results = self._parse_batch_result(result, names)
+        except Exception as e:
+            log(f"合并分析失败 {', '.join(names)}：{str(e)}", "ERROR")
+        
+        for repo, readme_content, cache_key in items:
+            parsed = results.get(repo['name'])
+            if parsed:
+                if cache_key:
+                    self.cache.set(cache_key, repo['name'], parsed)
+                self._set_analysis(repo, parsed)
+            else:
+                # 批量结果缺失或格式错误，单独重新分析
+                self._set_analysis(repo, self._request_analysis(repo, readme_content, cache_key))
+        
+        log(f"合并分析完成：{len(results)}/{len(items)} 个项目由合并请求返回")
+    
+    def _build_repo_section(self, repo, readme_content):
+        """构建单个项目的信息段落"""
+        section = f"""项目名称: {repo['name']}
 作者: {repo['author']}
 编程语言: {repo['language']}
 Star 数: {repo['stars']}
@@ -357,8 +2484,15 @@ Star 数: {repo['stars']}
 
 """
         
+        readme_content = condense_readme(readme_content)
         if readme_content:
-            prompt += f"README 内容（部分）:\n{readme_content[:2000]}\n\n"
+            section += f"README 内容（节选）:\n{readme_content}\n\n"
+        
+        return section
+    
+    def _build_prompt(self, repo, readme_content):
+        """构建分析 prompt"""
+        prompt = "请分析以下 GitHub 项目：\n\n" + self._build_repo_section(repo, readme_content)
         
         prompt += """请完成以下两个任务：
 
@@ -378,32 +2512,75 @@ Star 数: {repo['stars']}
 """
         return prompt
     
-    def _parse_result(self, result_text):
-        """解析 AI 返回的结果"""
+    def _build_batch_prompt(self, items):
+        """构建合并分析 prompt，items 为 [(repo, readme_content, cache_key), ...]"""
+        prompt = f"请分析以下 {len(items)} 个 GitHub 项目：\n\n"
+        for i, (repo, readme_content, _) in enumerate(items, 1):
+            prompt += f"### 项目 {i}\n" + self._build_repo_section(repo, readme_content)
+        
+        prompt += """请对每个项目完成以下两个任务：
+
+1. **润色描述**：将原英文描述润色并翻译成中文，保留核心信息，表达简洁易懂
+2. **生成亮点**：基于项目信息，用一句话概括项目的亮点或特色
+
+请按以下 JSON 数组格式返回，每个项目一个对象，name 必须与项目名称完全一致：
+[
+  {
+    "name": "项目名称",
+    "chinese_description": "润色的中文描述",
+    "highlight": "一句话的项目亮点"
+  }
+]
+
+注意：
+- 描述要简洁，不超过 100 字
+- 亮点要突出，不超过 50 字
+- 只返回 JSON 数组，不要其他内容
+"""
+        return prompt
+    
+    def _extract_json(self, result_text, open_char='{', close_char='}'):
+        """按括号匹配从文本中提取第一个 JSON 对象/数组并解析，失败返回 None"""
+        block = JsonBlockScanner(open_char, close_char).feed(result_text)
+        if block is None:
+            return None
         try:
-            # 尝试提取 JSON
-            start_idx = result_text.find('{')
-            if start_idx != -1:
-                stack = []
-                end_idx = start_idx
-                for i in range(start_idx, len(result_text)):
-                    char = result_text[i]
-                    if char == '{':
-                        stack.append(char)
-                    elif char == '}':
-                        if stack:
-                            stack.pop()
-                            if not stack:
-                                end_idx = i + 1
-                                break
-                
-                if end_idx > start_idx:
-                    json_str = result_text[start_idx:end_idx]
-                    parsed = json.loads(json_str)
-                    if 'chinese_description' in parsed and 'highlight' in parsed:
-                        return parsed
-        except:
-            pass
+            return json.loads(block)
+        except ValueError:
+            return None
+    
+    def _is_valid_analysis(self, parsed):
+        """检查分析结果是否包含所需字段"""
+        return (
+            isinstance(parsed, dict)
+            and isinstance(parsed.get('chinese_description'), str)
+            and isinstance(parsed.get('highlight'), str)
+            and bool(parsed['chinese_description'].strip())
+        )
+    
+    def _parse_batch_result(self, result_text, names):
+        """解析合并分析返回的 JSON 数组，返回 {项目名: 分析结果}，只保留有效条目"""
+        parsed = self._extract_json(result_text, '[', ']')
+        if not isinstance(parsed, list):
+            return {}
+        
+        expected = set(names)
+        results = {}
+        for item in parsed:
+            if not self._is_valid_analysis(item) or item.get('name') not in expected:
+                continue
+            results[item['name']] = {
+                'chinese_description': item['chinese_description'],
+                'highlight': item['highlight']
+            }
+        return results
+    
+    def _parse_result(self, result_text):
+        """解析 AI 返回的结果；没有有效 JSON 时从文本中提取，并标记为降级结果"""
+        # 尝试提取 JSON
+        parsed = self._extract_json(result_text)
+        if isinstance(parsed, dict) and 'chinese_description' in parsed and 'highlight' in parsed:
+            return parsed
         
         # 如果解析失败，尝试从文本中提取
         lines = result_text.split('\n')
@@ -423,30 +2600,195 @@ Star 数: {repo['stars']}
         
         return {
             'chinese_description': chinese_desc,
-            'highlight': highlight
+            'highlight': highlight,
+            'fallback': True  # 未返回有效 JSON，与请求失败一样不写入缓存和断点
         }
 
 # ==============================================================================
 # 美化模块 - AgentSkills frontend-design
 # ==============================================================================
 
+# 编程语言元数据：卡片中的 emoji 与 HTML 归档页的语言色块
+LANGUAGE_META = {
+    'Python': {'emoji': '🐍', 'color': '#3572A5'},
+    'JavaScript': {'emoji': '📜', 'color': '#f1e05a'},
+    'TypeScript': {'emoji': '📘', 'color': '#3178c6'},
+    'Java': {'emoji': '☕', 'color': '#b07219'},
+    'Go': {'emoji': '🐹', 'color': '#00ADD8'},
+    'Rust': {'emoji': '🦀', 'color': '#dea584'},
+    'C++': {'emoji': '⚡', 'color': '#f34b7d'},
+    'C': {'emoji': '🔧', 'color': '#555555'},
+    'PHP': {'emoji': '🐘', 'color': '#4F5D95'},
+    'Ruby': {'emoji': '💎', 'color': '#701516'},
+    'Swift': {'emoji': '🦉', 'color': '#F05138'},
+    'Kotlin': {'emoji': '🎯', 'color': '#A97BFF'},
+    'Dart': {'emoji': '🎯', 'color': '#00B4AB'},
+    'HTML': {'emoji': '🌐', 'color': '#e34c26'},
+    'CSS': {'emoji': '🎨', 'color': '#563d7c'},
+    'Vue': {'emoji': '💚', 'color': '#41b883'},
+    'React': {'emoji': '⚛️', 'color': '#61dafb'},
+    'Angular': {'emoji': '🅰️', 'color': '#dd0031'},
+    'Shell': {'emoji': '💻', 'color': '#89e051'},
+    'Jupyter Notebook': {'emoji': '📓', 'color': '#DA5B0B'},
+}
+DEFAULT_LANGUAGE_META = {'emoji': '💻', 'color': '#8b949e'}
+
+def language_meta(language):
+    """编程语言的 emoji 与颜色，未知语言使用默认值"""
+    return LANGUAGE_META.get(language, DEFAULT_LANGUAGE_META)
+
+def _fragment_key(repo):
+    """卡片片段的缓存键：只包含渲染用到的字段，分析结果或星数变化后自动失效"""
+    analysis = repo.get('ai_analysis') or {}
+    return (
+        repo['name'], repo['url'], repo.get('stars', 0), repo.get('today_stars', 0), repo.get('period', 'daily'),
+        repo.get('language', ''),
+        analysis.get('chinese_description', ''),
+        tuple(item['name'] for item in repo.get('duplicates') or ())
+    )
+
+class DigestRenderer(ABC):
+    """摘要渲染器基类：每个项目的卡片片段只渲染一次，多份摘要（多个推送目标）共用
+
+    子类实现 _build_fragment(repo)（不含序号的单个项目片段）和 render(repos, date)。
+    """
+
+    name = None
+
+    def __init__(self):
+        self._fragments = {}
+
+    def fragment(self, repo):
+        """返回单个项目的片段（缓存）"""
+        key = _fragment_key(repo)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = self._fragments[key] = self._build_fragment(repo)
+            tracer.add('fragments')
+        else:
+            tracer.add('fragment_hits')
+        return fragment
+
+    @abstractmethod
+    def render(self, repos, date=None):
+        """渲染整份摘要"""
+
+    @abstractmethod
+    def _build_fragment(self, repo):
+        """渲染单个项目的片段（不含序号）"""
+
+class MarkdownRenderer(DigestRenderer):
+    """Markdown 摘要（飞书 lark_md 与文本消息共用）"""
+
+    name = 'markdown'
+
+    _TITLE = "# 🚀 GitHub 热榜日报 - {date}".format
+    _CARD = "**[{name}]({url})**\n⭐ **{stars}** stars\n{emoji} **{language}**\n📈 **+{today_stars}** {period}".format
+    _DUPLICATES = "🔗 相似项目：{links}".format
+    _LINK = "[{name}]({url})".format
+
+    def render(self, repos, date=None):
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        parts = [self._TITLE(date=date), ""]
+        for index, repo in enumerate(repos, 1):
+            parts.append(self.card(repo, index))
+            parts.append("")
+        return "\n".join(parts)
+
+    def card(self, repo, index):
+        """带序号的单个项目卡片"""
+        return f"{index}. {self.fragment(repo)}"
+
+    def _build_fragment(self, repo):
+        lines = [self._CARD(
+            name=repo['name'], url=repo['url'], stars=repo['formatted_stars'],
+            emoji=language_meta(repo['language'])['emoji'], language=repo['language'],
+            today_stars=repo['formatted_today_stars'], period=repo['period_label']
+        )]
+
+        # 润色的中文描述
+        chinese_desc = (repo.get('ai_analysis') or {}).get('chinese_description', '')
+        if chinese_desc:
+            lines.append(chinese_desc)
+
+        # 合并的近似重复项目
+        duplicates = repo.get('duplicates')
+        if duplicates:
+            lines.append(self._DUPLICATES(links="、".join(self._LINK(**item) for item in duplicates)))
+
+        return "\n".join(lines)
+
+class HtmlRenderer(DigestRenderer):
+    """HTML 归档页（单文件，内联样式）"""
+
+    name = 'html'
+
+    _PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>GitHub 热榜日报 - {date}</title>
+<style>
+body {{ font-family: -apple-system, "Segoe UI", "PingFang SC", sans-serif; max-width: 860px; margin: 2em auto; padding: 0 1em; color: #1f2328; }}
+ol {{ padding-left: 1.5em; }}
+li {{ margin-bottom: 1.2em; }}
+.meta {{ color: #59636e; font-size: 0.9em; }}
+.lang {{ display: inline-block; width: 0.8em; height: 0.8em; border-radius: 50%; margin-right: 0.3em; }}
+</style>
+</head>
+<body>
+<h1>🚀 GitHub 热榜日报 - {date}</h1>
+<ol>
+{items}
+</ol>
+<p class="meta">数据来源：<a href="https://github.com/trending">GitHub Trending</a></p>
+</body>
+</html>
+""".format
+    _ITEM = """<li>
+<a href="{url}"><strong>{name}</strong></a>
+<div class="meta"><span class="lang" style="background:{color}"></span>{language} · ⭐ {stars} · 📈 +{today_stars} {period}</div>
+{extra}</li>""".format
+
+    def render(self, repos, date=None):
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        return self._PAGE(date=escape(date), items="\n".join(self.fragment(repo) for repo in repos))
+
+    def _build_fragment(self, repo):
+        extra = []
+        chinese_desc = (repo.get('ai_analysis') or {}).get('chinese_description', '')
+        if chinese_desc:
+            extra.append(f"<p>{escape(chinese_desc)}</p>\n")
+        duplicates = repo.get('duplicates')
+        if duplicates:
+            links = "、".join(f'<a href="{escape(item["url"])}">{escape(item["name"])}</a>' for item in duplicates)
+            extra.append(f'<div class="meta">🔗 相似项目：{links}</div>\n')
+
+        return self._ITEM(
+            url=escape(repo['url']), name=escape(repo['name']),
+            color=language_meta(repo['language'])['color'], language=escape(repo['language'] or '未知'),
+            stars=repo['formatted_stars'], today_stars=repo['formatted_today_stars'], period=repo['period_label'],
+            extra=''.join(extra)
+        )
+
+# 可选的文本输出格式（飞书卡片由 FeishuCardBuilder 生成）
+DIGEST_FORMATS = {renderer.name: renderer for renderer in (MarkdownRenderer, HtmlRenderer)}
+
 class AgentSkillsBeautifier:
-    """AgentSkills 内容美化器"""
+    """AgentSkills 内容美化器（Markdown 输出，片段由 MarkdownRenderer 缓存）"""
     
-    def __init__(self):
+    def __init__(self, renderer=None):
         self.enabled = True
+        self.renderer = renderer or MarkdownRenderer()
     
+    @tracer.traced('beautify')
     def beautify(self, repos):
         """使用 AgentSkills 进行内容美化"""
         log("开始使用 AgentSkills 进行内容美化...")
         
         try:
-            # 构建 Markdown 格式的美化内容
-            date = datetime.now().strftime("%Y-%m-%d")
-            
-            # 构建 Markdown 内容
-            markdown_content = self._build_markdown(repos, date)
-            
+            markdown_content = self.renderer.render(repos)
             log("内容美化完成")
             return markdown_content
             
@@ -455,247 +2797,806 @@ class AgentSkillsBeautifier:
             # 返回降级方案
             return self._fallback_beautify(repos)
     
-    def _build_markdown(self, repos, date):
-        """构建 Markdown 格式的内容"""
-        lines = []
-        
-        # 标题（带日期）
-        lines.append(f"# 🚀 GitHub 热榜日报 - {date}")
-        lines.append("")
-        
-        # 按顺序展示所有项目
-        for i, repo in enumerate(repos, 1):
-            lines.append(self._build_repo_card(repo, i))
-            lines.append("")
-        
-        return "\n".join(lines)
-    
     def _build_repo_card(self, repo, index):
         """构建单个项目的卡片"""
-        lines = []
-        
-        # 项目标题
-        lines.append(f"{index}. **[{repo['name']}]({repo['url']})**")
-        
-        # 基本信息分行显示
-        language_emoji = self._get_language_emoji(repo['language'])
-        lines.append(f"⭐ **{repo['formatted_stars']}** stars")
-        lines.append(f"{language_emoji} **{repo['language']}**")
-        lines.append(f"📈 **+{repo['formatted_today_stars']}** today")
-        
-        # AI 分析信息
-        ai_analysis = repo.get('ai_analysis', {})
-        
-        # 润色的中文描述
-        chinese_desc = ai_analysis.get('chinese_description', '')
-        if chinese_desc:
-            lines.append(chinese_desc)
-        
-        return "\n".join(lines)
+        return self.renderer.card(repo, index)
     
     def _get_language_emoji(self, language):
         """获取编程语言的 emoji"""
-        emoji_map = {
-            'Python': '🐍',
-            'JavaScript': '📜',
-            'TypeScript': '📘',
-            'Java': '☕',
-            'Go': '🐹',
-            'Rust': '🦀',
-            'C++': '⚡',
-            'C': '🔧',
-            'PHP': '🐘',
-            'Ruby': '💎',
-            'Swift': '🦉',
-            'Kotlin': '🎯',
-            'Dart': '🎯',
-            'HTML': '🌐',
-            'CSS': '🎨',
-            'Vue': '💚',
-            'React': '⚛️',
-            'Angular': '🅰️',
-            'Shell': '💻',
-            'Jupyter Notebook': '📓',
-        }
-        return emoji_map.get(language, '💻')
+        return language_meta(language)['emoji']
     
     def _fallback_beautify(self, repos):
         """降级美化方案"""
         date = datetime.now().strftime("%Y-%m-%d")
         
-        content = f"🚀 GitHub 热榜日报 - {date}\n\n"
+        lines = [f"🚀 GitHub 热榜日报 - {date}", ""]
         
         for i, repo in enumerate(repos[:10], 1):
-            content += f"{i}. [{repo['name']}]({repo['url']}) by {repo['author']}\n"
-            content += f"   ⭐ {repo['formatted_stars']} stars\n"
-            content += f"   {self._get_language_emoji(repo['language'])} {repo['language']}\n"
-            content += f"   📈 +{repo['formatted_today_stars']} today\n"
-            content += "\n"
+            lines.append(f"{i}. [{repo['name']}]({repo['url']}) by {repo['author']}")
+            lines.append(f"   ⭐ {repo['formatted_stars']} stars")
+            lines.append(f"   {self._get_language_emoji(repo['language'])} {repo['language']}")
+            lines.append(f"   📈 +{repo['formatted_today_stars']} {repo['period_label']}")
+            lines.append("")
         
-        content += f"---\n📊 数据来源：https://github.com/trending\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        lines.append(f"---\n📊 数据来源：https://github.com/trending\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
-        return content
+        return "\n".join(lines)
 
 # ==============================================================================
 # 飞书推送模块
 # ==============================================================================
 
 class FeishuNotifier:
-    """飞书机器人通知器"""
+    """飞书机器人通知器：推送由 FeishuDelivery 渲染好的单条消息"""
     
-    def __init__(self):
-        self.webhook_url = FEISHU_WEBHOOK_URL
-        self.message_type = FEISHU_MESSAGE_TYPE
+    def __init__(self, session=None, webhook_url=None, secret=None, max_retries=None):
+        self.webhook_url = FEISHU_WEBHOOK_URL if webhook_url is None else webhook_url
+        self.secret = FEISHU_WEBHOOK_SECRET if secret is None else secret
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.session = session or create_http_session(pool_size=1)
+        self.last_error = None
+        self.attempts = 0
     
-    def send(self, content):
-        """发送消息到飞书"""
+    @tracer.traced('send')
+    def post(self, data):
+        """发送一条已构建好的消息；连接失败、429 和 5xx 按指数退避重试
+
+        Webhook 推送不是幂等的：读取响应超时、连接中途断开等错误发生时飞书可能已收到消息，
+        重试会重复推送，因此只重试连接尚未建立的错误（见 _is_undelivered）。
+        """
         log("开始发送飞书消息...")
         
-        try:
-            if self.message_type == "interactive":
-                # 发送富文本卡片
-                data = self._build_card_message(content)
+        self.last_error = None
+        for attempt in range(max(self.max_retries, 1)):
+            self.attempts = attempt + 1
+            try:
+                response = self.session.post(
+                    self.webhook_url,
+                    json=self._sign(data),
+                    headers={'Content-Type': 'application/json'},
+                    timeout=FEISHU_TIMEOUT
+                )
+            except Exception as e:
+                if not self._is_undelivered(e):
+                    self.last_error = f"飞书消息发送异常（可能已送达，不重试）：{str(e)}"
+                    log(self.last_error, "ERROR")
+                    return False
+                self.last_error = f"飞书消息发送异常：{str(e)}"
+                log(self.last_error, "ERROR")
             else:
-                # 发送文本消息
-                data = {
-                    "msg_type": "text",
-                    "content": {
-                        "text": content
-                    }
-                }
-            
-            response = requests.post(
-                self.webhook_url,
-                json=data,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
+                if response.status_code == 429 or response.status_code >= 500:
+                    self.last_error = f"飞书消息发送失败：HTTP {response.status_code}"
+                    log(self.last_error, "ERROR")
+                else:
+                    return self._check_response(response)
             
+            if attempt < self.max_retries - 1:
+                wait_time = RETRY_DELAY * (2 ** attempt)
+                tracer.add('retries')
+                log(f"等待 {wait_time} 秒后重试发送（{attempt + 1}/{self.max_retries}）...")
+                time.sleep(wait_time)
+        
+        return False
+
+    @staticmethod
+    def _is_undelivered(error):
+        """连接尚未建立（连接被拒绝、DNS 失败、连接超时）时请求一定没有发出，可以安全重发
+
+        requests 的 ConnectionError 也包括请求发出后连接被断开（ProtocolError、RemoteDisconnected），
+        这类错误与读取超时一样视为可能已送达。
+        """
+        import requests
+        from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if not isinstance(error, requests.exceptions.ConnectionError):
+            return False
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def _check_response(self, response):
+        """检查不可重试的响应：HTTP 错误和业务错误（如签名、关键词校验失败）重试无意义"""
+        try:
             response.raise_for_status()
             result = response.json()
-            
-            if result.get('StatusCode') == 0 or result.get('code') == 0:
-                log("飞书消息发送成功")
-                return True
-            else:
-                log(f"飞书消息发送失败：{result}", "ERROR")
-                return False
-                
         except Exception as e:
-            log(f"飞书消息发送异常：{str(e)}", "ERROR")
+            self.last_error = f"飞书消息发送异常：{str(e)}"
+            log(self.last_error, "ERROR")
             return False
+
+        if result.get('StatusCode') == 0 or result.get('code') == 0:
+            self.last_error = None
+            log("飞书消息发送成功")
+            return True
+
+        self.last_error = f"飞书消息发送失败：{result}"
+        log(self.last_error, "ERROR")
+        return False
     
-    def _build_card_message(self, markdown_content):
-        """构建富文本卡片消息"""
-        # 解析 Markdown 内容
-        lines = markdown_content.split('\n')
-        
-        # 提取标题
-        title = "🚀 GitHub 热榜日报"
-        
-        # 构建卡片元素
-        elements = []
-        
-        # 简化内容：只显示前 5 个项目 + 底部信息
-        simplified_lines = self._simplify_content(lines, max_repos=5)
-        
-        elements.append({
-            "tag": "div",
-            "text": {
-                "tag": "lark_md",
-                "content": "\n".join(simplified_lines)
-            }
-        })
-        
-        # 构建完整消息
-        card = {
-            "config": {
-                "wide_screen_mode": True
-            },
-            "header": {
-                "title": {
-                    "tag": "plain_text",
-                    "content": title
+    def _sign(self, data):
+        """配置了签名密钥时附加 timestamp 和 sign 字段"""
+        if not self.secret:
+            return data
+        timestamp = str(int(time.time()))
+        string_to_sign = f"{timestamp}\n{self.secret}"
+        digest = hmac.new(string_to_sign.encode('utf-8'), digestmod=hashlib.sha256).digest()
+        return dict(data, timestamp=timestamp, sign=base64.b64encode(digest).decode('utf-8'))
+
+class FeishuCardBuilder:
+    """由仓库列表直接构建飞书卡片：每个项目一个 div 元素，按消息体大小自动拆分为多条消息"""
+
+    name = 'feishu'
+
+    def __init__(self, beautifier=None, max_bytes=None):
+        self.beautifier = beautifier or AgentSkillsBeautifier()
+        self.max_bytes = FEISHU_CARD_MAX_BYTES if max_bytes is None else max_bytes
+
+    def render(self, repos, date=None):
+        """与 DigestRenderer 一致的接口"""
+        return self.build(repos, date)
+
+    @tracer.traced('beautify')
+    def build(self, repos, date=None):
+        """返回卡片消息列表，每条消息序列化后不超过 max_bytes"""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        title = f"🚀 GitHub 热榜日报 - {date}"
+        # 签名字段和多条消息的页码会增加少量字节，预留余量
+        budget = self.max_bytes - self._size(self._message(title + "（99/99）", [])) - 200
+
+        pages = [[]]
+        used = 0
+        for index, repo in enumerate(repos, 1):
+            element = self._repo_element(repo, index, budget)
+            size = self._size(element) + 1  # 元素之间的逗号
+            if pages[-1] and used + size > budget:
+                pages.append([])
+                used = 0
+            pages[-1].append(element)
+            used += size
+
+        if len(pages) == 1:
+            return [self._message(title, pages[0])]
+        log(f"卡片内容超过 {self.max_bytes} 字节，拆分为 {len(pages)} 条消息")
+        return [
+            self._message(f"{title}（{i}/{len(pages)}）", elements)
+            for i, elements in enumerate(pages, 1)
+        ]
+
+    def _repo_element(self, repo, index, budget):
+        """单个项目的卡片元素，超出预算时截断内容"""
+        content = self.beautifier._build_repo_card(repo, index)
+        element = {"tag": "div", "text": {"tag": "lark_md", "content": content}}
+        if self._size(element) <= budget:
+            return element
+
+        # 引号、换行等字符序列化后占 2 字节以上，无法由超出的字节数直接算出截断位置，
+        # 二分查找序列化后不超过预算的最长前缀（按 UTF-8 字节截断，多字节字符不完整时丢弃）
+        encoded = content.encode('utf-8')
+        low, high = 0, len(encoded)
+        while low < high:
+            middle = (low + high + 1) // 2
+            element["text"]["content"] = encoded[:middle].decode('utf-8', errors='ignore') + "…"
+            if self._size(element) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        element["text"]["content"] = encoded[:low].decode('utf-8', errors='ignore') + "…"
+        return element
+
+    @staticmethod
+    def _message(title, elements):
+        return {
+            "msg_type": "interactive",
+            "card": {
+                "config": {
+                    "wide_screen_mode": True
+                },
+                "header": {
+                    "title": {
+                        "tag": "plain_text",
+                        "content": title
+                    },
+                    "template": "blue"
                 },
-                "template": "blue"
-            },
-            "elements": elements
+                "elements": elements
+            }
         }
-        
+
+    @staticmethod
+    def _size(data):
+        return len(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+def parse_feishu_targets(value):
+    """解析 FEISHU_TARGETS（JSON 数组），返回推送目标列表"""
+    try:
+        targets = json.loads(value)
+    except ValueError as e:
+        raise ValueError(f"不是合法的 JSON：{str(e)}")
+    if not isinstance(targets, list) or not targets:
+        raise ValueError("应为非空 JSON 数组")
+
+    names = set()
+    for i, target in enumerate(targets, 1):
+        if not isinstance(target, dict) or not target.get('url'):
+            raise ValueError(f"第 {i} 个目标缺少 url")
+        target.setdefault('name', f"target-{i}")
+        # 计划按名称查找推送目标，名称不能重复
+        if target['name'] in names:
+            raise ValueError(f"推送目标名称重复：{target['name']}")
+        names.add(target['name'])
+        _validate_target_filters(target)
+    return targets
+
+def _validate_target_filters(target):
+    """校验推送目标的过滤条件，并统一为 _filter 使用的类型"""
+    name = target['name']
+    for field in ('languages', 'lists', 'keywords'):
+        values = target.get(field)
+        if isinstance(values, str):
+            # 单个字符串视为只有一项的数组，避免被逐字符当作多个条件
+            values = target[field] = [values]
+        if values is not None and not (isinstance(values, list) and all(isinstance(item, str) for item in values)):
+            raise ValueError(f"推送目标 {name} 的 {field} 应为字符串数组")
+
+    limit = target.get('limit')
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0):
+        raise ValueError(f"推送目标 {name} 的 limit 应为正整数")
+
+    min_today_stars = target.get('min_today_stars')
+    if min_today_stars is not None and (isinstance(min_today_stars, bool)
+                                        or not isinstance(min_today_stars, (int, float))):
+        raise ValueError(f"推送目标 {name} 的 min_today_stars 应为数字")
+
+def load_feishu_targets():
+    """读取推送目标：优先 FEISHU_TARGETS，否则使用单个 FEISHU_WEBHOOK_URL"""
+    if FEISHU_TARGETS:
+        return parse_feishu_targets(FEISHU_TARGETS)
+    return [{'name': 'default', 'url': FEISHU_WEBHOOK_URL, 'secret': FEISHU_WEBHOOK_SECRET}]
+
+class FeishuDelivery:
+    """多群推送：按目标过滤仓库，相同内容只渲染一次，并发推送并汇总每个目标的结果"""
+
+    def __init__(self, targets=None, session=None, beautifier=None, checkpoint=None):
+        self.checkpoint = checkpoint
+        self.targets = load_feishu_targets() if targets is None else targets
+        self.session = session  # 首次推送时创建，仅渲染时不导入 requests
+        self.beautifier = beautifier or AgentSkillsBeautifier()
+        self.card_builder = FeishuCardBuilder(self.beautifier)
+        self._lock = threading.Lock()
+
+    def deliver(self, repos):
+        """渲染并推送到所有目标，返回 [{'target', 'repos', 'success', 'attempts', 'error'}, ...]"""
+        return self.send(self.render(repos))
+
+    def render(self, repos):
+        """按目标过滤并渲染消息，返回 [(target, selected, messages), ...]"""
+        # 相同的内容只渲染一次（断点中已有的渲染结果直接复用）
+        previous = (self.checkpoint and self.checkpoint.load('rendered')) or {}
+        rendered = {}
+        rendered_count = 0
+        plans = []
+        for target in self.targets:
+            selected = self._filter(repos, target)
+            key = self._content_key(selected)
+            if selected and key not in rendered:
+                if key in previous:
+                    rendered[key] = previous[key]
+                else:
+                    rendered[key] = self._render(selected)
+                    rendered_count += 1
+            plans.append((target, selected, rendered.get(key)))
+        log(f"共 {len(self.targets)} 个推送目标，渲染 {rendered_count} 份内容")
+        if self.checkpoint:
+            self.checkpoint.save('rendered', rendered)
+        return plans
+
+    @staticmethod
+    def _content_key(repos):
+        """渲染内容的缓存键：项目名 + 分析结果的哈希，续跑时重新分析过的项目（如上次降级）会重新渲染"""
+        analyses = json.dumps([repo.get('ai_analysis') for repo in repos], ensure_ascii=False,
+                              sort_keys=True, default=_json_default)
+        digest = hashlib.sha256(analyses.encode('utf-8')).hexdigest()[:16]
+        return '|'.join(repo['name'] for repo in repos) + '#' + digest
+
+    def send(self, plans):
+        """并发推送 render() 的结果，返回每个目标的推送结果"""
+        delivered = set((self.checkpoint and self.checkpoint.load('delivered')) or [])
+        if self.session is None:
+            self.session = create_http_session(pool_size=len(plans))
+
+        with ThreadPoolExecutor(max_workers=max(len(plans), 1)) as executor:
+            outcomes = list(executor.map(lambda plan: self._deliver_one(*plan, delivered), plans))
+
+        for outcome in outcomes:
+            status = "成功" if outcome['success'] else f"失败（{outcome['error']}）"
+            log(f"推送目标 {outcome['target']}：{outcome['repos']} 个项目，"
+                f"尝试 {outcome['attempts']} 次，{status}")
+        return outcomes
+
+    def _render(self, repos):
+        """渲染消息列表：卡片模式直接由仓库构建卡片元素，文本模式使用美化后的 Markdown"""
+        if FEISHU_MESSAGE_TYPE == "interactive":
+            return self.card_builder.build(repos)
+        return [{"msg_type": "text", "content": {"text": self.beautifier.beautify(repos)}}]
+
+    def _deliver_one(self, target, selected, messages, delivered):
+        """按顺序推送单个目标的全部消息，已推送成功的消息（断点中记录）跳过"""
+        if not selected:
+            return {'target': target['name'], 'repos': 0, 'success': True, 'attempts': 0, 'error': '无匹配项目，跳过'}
+
+        # 以 名称 + URL 哈希 + 消息序号 标识，更换 Webhook 后会重新推送
+        target_id = f"{target['name']}|{hashlib.sha256(target['url'].encode('utf-8')).hexdigest()[:8]}"
+        notifier = FeishuNotifier(session=self.session, webhook_url=target['url'], secret=target.get('secret', ''))
+        attempts = 0
+        sent = 0
+        for index, message in enumerate(messages):
+            message_id = f"{target_id}#{index}"
+            if message_id in delivered:
+                log(f"推送目标 {target['name']} 第 {index + 1} 条消息已在上次运行中推送成功，跳过")
+                sent += 1
+                continue
+            success = notifier.post(message)
+            attempts += notifier.attempts
+            if not success:
+                break
+            sent += 1
+            if self.checkpoint:
+                with self._lock:
+                    delivered.add(message_id)
+                    self.checkpoint.save('delivered', sorted(delivered))
+
         return {
-            "msg_type": "interactive",
-            "card": card
+            'target': target['name'],
+            'repos': len(selected),
+            'success': sent == len(messages),
+            'attempts': attempts,
+            'error': notifier.last_error
         }
-    
-    def _simplify_content(self, lines, max_repos=5):
-        """简化内容，只显示前 N 个项目"""
-        simplified = []
-        repo_count = 0
-        
-        for line in lines:
-            # 保留标题
-            if line.startswith('#'):
-                simplified.append(line)
-            # 保留分隔线
-            elif line.startswith('---'):
-                simplified.append(line)
-            # 统计项目数量
-            elif line.startswith('###'):
-                if repo_count >= max_repos:
+
+    def _filter(self, repos, target):
+        """按目标配置过滤仓库：语言、榜单、关键词、日均新增星数（周/月榜折算），最后截取 limit 个"""
+        languages = {language.lower() for language in target.get('languages', [])}
+        lists = set(target.get('lists', []))
+        keywords = [keyword.lower() for keyword in target.get('keywords', [])]
+        min_today_stars = target.get('min_today_stars', 0)
+
+        selected = []
+        for repo in repos:
+            if languages and repo.get('language', '').lower() not in languages:
+                continue
+            if lists and not lists.intersection(repo.get('lists', [])):
+                continue
+            if keywords:
+                text = f"{repo['name']} {repo.get('description', '')}".lower()
+                if not any(keyword in text for keyword in keywords):
                     continue
-                repo_count += 1
-                simplified.append(line)
-            # 保留项目内容
-            elif repo_count <= max_repos:
-                simplified.append(line)
-        
-        if repo_count > max_repos:
-            simplified.append(f"\n...还有更多项目")
-        
-        return simplified
+            if repo.get('daily_stars', repo.get('today_stars', 0)) < min_today_stars:
+                continue
+            selected.append(repo)
+
+        limit = target.get('limit')
+        return selected[:limit] if limit else selected
+
+# ==============================================================================
+# 常驻进程模块 - 多计划调度
+# ==============================================================================
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+def parse_schedules(value):
+    """解析 SCHEDULES（JSON 数组），返回定时计划列表"""
+    try:
+        schedules = json.loads(value)
+    except ValueError as e:
+        raise ValueError(f"不是合法的 JSON：{str(e)}")
+    if not isinstance(schedules, list) or not schedules:
+        raise ValueError("应为非空 JSON 数组")
+
+    names = set()
+    for i, schedule in enumerate(schedules, 1):
+        if not isinstance(schedule, dict):
+            raise ValueError(f"第 {i} 个计划应为对象")
+        schedule.setdefault('name', f"schedule-{i}")
+        if schedule['name'] in names:
+            raise ValueError(f"计划名称重复：{schedule['name']}")
+        names.add(schedule['name'])
+        if 'every' in schedule:
+            if not isinstance(schedule['every'], (int, float)) or schedule['every'] <= 0:
+                raise ValueError(f"计划 {schedule['name']} 的 every 应为正数（分钟）")
+        elif 'at' in schedule:
+            try:
+                datetime.strptime(schedule['at'], '%H:%M')
+            except (TypeError, ValueError):
+                raise ValueError(f"计划 {schedule['name']} 的 at 应为 HH:MM 格式")
+            weekday = schedule.get('weekday')
+            if weekday is not None and str(weekday).lower()[:3] not in WEEKDAYS:
+                raise ValueError(f"计划 {schedule['name']} 的 weekday 应为 mon…sun")
+        else:
+            raise ValueError(f"计划 {schedule['name']} 缺少 every 或 at")
+        _validate_schedule_overrides(schedule)
+    return schedules
+
+def _validate_schedule_overrides(schedule):
+    """校验计划的 lists、limit、targets，并统一为运行时使用的类型"""
+    name = schedule['name']
+    lists = schedule.get('lists')
+    if isinstance(lists, list) and all(isinstance(item, str) for item in lists):
+        # 也接受数组写法 ["rust:daily", ":weekly"]
+        lists = schedule['lists'] = ','.join(lists)
+    if lists is not None and not isinstance(lists, str):
+        raise ValueError(f"计划 {name} 的 lists 应为字符串（如 rust:daily,:weekly）或字符串数组")
+
+    limit = schedule.get('limit')
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0):
+        raise ValueError(f"计划 {name} 的 limit 应为正整数")
+
+    targets = schedule.get('targets')
+    if isinstance(targets, str):
+        targets = schedule['targets'] = [targets]
+    if targets is not None and not (isinstance(targets, list) and all(isinstance(item, str) for item in targets)):
+        raise ValueError(f"计划 {name} 的 targets 应为推送目标名称数组")
+
+def next_run_time(schedule, after):
+    """计算计划在 after 之后的下一次触发时间
+
+    every 计划按间隔对齐（例如 60 分钟在每个整点触发），at 计划在指定时间触发，
+    配置 weekday 时每周触发一次。
+    """
+    if 'every' in schedule:
+        interval = schedule['every'] * 60
+        return datetime.fromtimestamp((math.floor(after.timestamp() / interval) + 1) * interval)
+
+    at = datetime.strptime(schedule['at'], '%H:%M')
+    candidate = after.replace(hour=at.hour, minute=at.minute, second=0, microsecond=0)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    weekday = schedule.get('weekday')
+    if weekday is not None:
+        target = WEEKDAYS.index(str(weekday).lower()[:3])
+        candidate += timedelta(days=(target - candidate.weekday()) % 7)
+    return candidate
+
+class TrendingDaemon:
+    """常驻进程：保持 HTTP 会话、OpenAI 客户端和各类缓存常驻，按多个计划定时运行流程
+
+    所有计划在同一线程中依次运行，共享限流器和连接池：
+    - 同一计划不会重叠运行，运行超时错过的触发合并为一次
+    - 其他计划在运行期间到期的，当前运行结束后立即补跑
+    """
+
+    def __init__(self, schedules=None, session=None):
+        if schedules is None:
+            schedules = parse_schedules(SCHEDULES) if SCHEDULES else [{'name': 'daily', 'at': DAEMON_AT}]
+        self.schedules = schedules
+        self.targets = load_feishu_targets()
+        self.session = session or create_http_session(pool_size=ANALYZE_CONCURRENCY)
+        self.crawler = GitHubTrendingCrawler(session=self.session)
+        self.summarizer = SiliconFlowSummarizer()
+        self.history = HistoryStore() if HISTORY_DB_PATH else None
+        self._stop = threading.Event()
+
+    def stop(self):
+        """请求停止：当前运行结束后退出"""
+        self._stop.set()
+
+    def run_forever(self):
+        """调度主循环，直到 stop() 被调用"""
+        now = datetime.now()
+        due = {schedule['name']: next_run_time(schedule, now) for schedule in self.schedules}
+        for schedule in self.schedules:
+            log(f"计划 {schedule['name']} 下次运行：{due[schedule['name']]:%Y-%m-%d %H:%M}")
+
+        while not self._stop.is_set():
+            schedule = min(self.schedules, key=lambda item: due[item['name']])
+            scheduled_at = due[schedule['name']]
+            wait = (scheduled_at - datetime.now()).total_seconds()
+            if wait > 0:
+                # 分段等待，避免系统休眠或调整时钟后错过触发
+                self._stop.wait(min(wait, 60))
+                continue
+
+            self.run_once(schedule, scheduled_at)
+
+            now = datetime.now()
+            next_at = next_run_time(schedule, max(scheduled_at, now))
+            if next_run_time(schedule, scheduled_at) < now:
+                log(f"计划 {schedule['name']} 运行耗时超过调度间隔，已合并错过的触发", "WARNING")
+            due[schedule['name']] = next_at
+            log(f"计划 {schedule['name']} 下次运行：{next_at:%Y-%m-%d %H:%M}")
+
+        log("常驻进程已停止")
+
+    def run_once(self, schedule, scheduled_at=None):
+        """运行单个计划，返回是否推送成功；异常只记录日志，不中断调度"""
+        scheduled_at = scheduled_at or datetime.now()
+        log("=" * 60)
+        log(f"开始运行计划 {schedule['name']}（{scheduled_at:%Y-%m-%d %H:%M}）")
+        tracer.reset()
+        try:
+            # 不使用断点：每次触发的时间不同，断点无法续跑；失败的计划在下次触发时重新运行，
+            # 已完成的 README 与分析结果由常驻的 HTTP 缓存和分析缓存复用
+            success = run_pipeline(
+                session=self.session,
+                checkpoint=False,
+                crawler=self.crawler,
+                summarizer=self.summarizer,
+                history=self.history,
+                lists=schedule.get('lists'),
+                limit=schedule.get('limit'),
+                targets=self._targets(schedule),
+                label=f"{scheduled_at:%Y-%m-%d-%H%M}-{schedule['name']}"
+            )
+            log(f"计划 {schedule['name']} 运行{'成功' if success else '失败'}")
+            return success
+        except Exception as e:
+            log(f"计划 {schedule['name']} 运行出错：{str(e)}", "ERROR")
+            import traceback
+            log(traceback.format_exc(), "ERROR")
+            return False
+        finally:
+            tracer.write_report()
+
+    def _targets(self, schedule):
+        """计划指定的推送目标（按名称筛选），未指定时推送到全部目标"""
+        names = schedule.get('targets')
+        if not names:
+            return self.targets
+        targets = [target for target in self.targets if target['name'] in names]
+        if not targets:
+            log(f"计划 {schedule['name']} 未匹配到推送目标：{names}", "WARNING")
+        return targets
+
+def run_daemon():
+    """常驻进程入口，收到 SIGINT/SIGTERM 时在当前运行结束后退出"""
+    daemon = TrendingDaemon()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    log(f"常驻进程已启动，共 {len(daemon.schedules)} 个计划")
+    daemon.run_forever()
 
 # ==============================================================================
 # 主程序
 # ==============================================================================
 
-def main():
+def collect_repos(crawler, checkpoint=None, history=None, lists=None):
+    """爬取榜单 → 记录历史 → 排序 → 去重，爬取失败返回 None"""
+    repos = checkpoint.load('repos') if checkpoint else None
+    if repos is not None:
+        repos = TrendingRepo.load_many(repos)
+    else:
+        repos = crawler.fetch_trending_lists(parse_trending_lists(lists or GITHUB_TRENDING_LISTS))
+        if repos and checkpoint:
+            checkpoint.save('repos', repos)
+    
+    if not repos:
+        log("未获取到仓库数据，程序终止", "ERROR")
+        return None
+    
+    # 记录历史快照，并标注首次上榜、在榜天数和星数增速
+    if history is None and HISTORY_DB_PATH:
+        history = HistoryStore()
+    if history:
+        history.record(repos)
+        history.annotate(repos)
+        if HISTORY_NEW_ONLY:
+            repos = [repo for repo in repos if repo['is_new']]
+            log(f"今日新上榜项目 {len(repos)} 个")
+    
+    # 按配置的特征权重排序，分析预算优先给得分高的项目；再合并近似重复的项目
+    if not repos:
+        return repos
+    return RepoDeduplicator().dedupe(RepoRanker().rank(repos))
+
+def write_archive(repos, label=None):
+    """输出 HTML 归档页到 HTML_ARCHIVE_DIR，失败只记录警告"""
+    path = os.path.join(HTML_ARCHIVE_DIR, f"{label or datetime.now().strftime('%Y-%m-%d')}.html")
+    try:
+        write_text(path, HtmlRenderer().render(repos))
+    except OSError as e:
+        log(f"写入 HTML 归档页失败：{str(e)}", "WARNING")
+
+def run_pipeline(session=None, checkpoint=None, crawler=None, summarizer=None, history=None,
+                 lists=None, limit=None, targets=None, label=None):
+    """执行一次完整流程：爬取 → AI 分析 → 美化 → 推送，返回是否推送成功
+
+    配置了 CHECKPOINT_DIR 时每个阶段都会写入断点，失败后重新运行会跳过已完成的阶段和项目；
+    checkpoint 为 False 时不使用断点。
+    常驻进程传入已创建的 crawler、summarizer 和 history 以复用连接和缓存；
+    lists、limit、targets 覆盖 GITHUB_TRENDING_LISTS、ANALYZE_LIMIT 和推送目标；
+    label 为 HTML 归档页的文件名（默认为当天日期）。
+    """
+    limit = ANALYZE_LIMIT if limit is None else limit
+    # 共享 HTTP 会话（连接池大小与分析并发数一致）
+    if session is None:
+        session = create_http_session(pool_size=ANALYZE_CONCURRENCY)
+    if checkpoint is None and CHECKPOINT_DIR:
+        checkpoint = RunCheckpoint()
+        log(f"断点目录：{checkpoint.path}")
+    
+    # 1. 爬取 GitHub Trending
+    crawler = crawler or GitHubTrendingCrawler(session=session)
+    repos = collect_repos(crawler, checkpoint=checkpoint, history=history, lists=lists)
+    if repos is None:
+        return False
+    if not repos:
+        log("今日没有新上榜项目，跳过分析和推送")
+        return True
+    
+    # 2. AI 分析（Top N，传入 crawler 以获取 README；断点中已完成的项目直接复用）
+    on_result = None
+    if checkpoint:
+        completed = checkpoint.load_analysis()
+        for repo in repos:
+            if repo['name'] in completed:
+                repo['ai_analysis'] = completed[repo['name']]
+        on_result = checkpoint.record_analysis
+    summarizer = summarizer or SiliconFlowSummarizer()
+    analyzed_repos = summarizer.analyze_repos(
+        repos, limit=limit, crawler=crawler, on_result=on_result
+    )
+    
+    if HTML_ARCHIVE_DIR:
+        write_archive(analyzed_repos, label)
+    
+    # 3. 内容美化 + 4. 飞书推送（按目标过滤，相同内容只渲染一次）
+    delivery = FeishuDelivery(targets=targets, session=session, checkpoint=checkpoint)
+    outcomes = delivery.deliver(analyzed_repos)
+    return all(outcome['success'] for outcome in outcomes)
+
+def read_json(path):
+    """读取子命令的输入文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_json(path, data):
+    """原子写入子命令的输出文件"""
+    write_text(path, json.dumps(data, ensure_ascii=False, indent=2, default=_json_default))
+
+def write_text(path, text):
+    """原子写入文本文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    log(f"已写入 {path}")
+
+def command_run(args):
+    """完整流程"""
+    return run_pipeline()
+
+def command_daemon(args):
+    """常驻进程"""
+    run_daemon()
+    return True
+
+def command_crawl(args):
+    """爬取榜单、记录历史并排序，输出仓库列表"""
+    repos = collect_repos(GitHubTrendingCrawler())
+    if repos is None:
+        return False
+    write_json(args.output, repos)
+    return True
+
+def command_analyze(args):
+    """读取仓库列表，分析前 ANALYZE_LIMIT 个项目，输出分析结果"""
+    repos = TrendingRepo.load_many(read_json(args.input))
+    analyzed_repos = SiliconFlowSummarizer().analyze_repos(
+        repos, limit=ANALYZE_LIMIT, crawler=GitHubTrendingCrawler()
+    )
+    write_json(args.output, analyzed_repos)
+    return True
+
+def command_render(args):
+    """读取分析结果并渲染
+
+    feishu：按推送目标渲染消息（输出中只记录目标名称，不含 Webhook 地址和密钥）；
+    markdown/html：渲染全部项目为单个文件。
+    """
+    repos = TrendingRepo.load_many(read_json(args.input))
+    if args.format in DIGEST_FORMATS:
+        write_text(args.output or f"digest.{'md' if args.format == 'markdown' else 'html'}",
+                   DIGEST_FORMATS[args.format]().render(repos))
+        return True
+
+    plans = FeishuDelivery().render(repos)
+    write_json(args.output or 'messages.json', [
+        {'target': target['name'], 'repos': [repo['name'] for repo in selected], 'messages': messages}
+        for target, selected, messages in plans
+    ])
+    return True
+
+def command_send(args):
+    """读取渲染结果，按目标名称推送"""
+    targets = {target['name']: target for target in load_feishu_targets()}
+    plans = []
+    for item in read_json(args.input):
+        if item['target'] not in targets:
+            log(f"推送目标 {item['target']} 不在当前配置中，跳过", "ERROR")
+            return False
+        plans.append((targets[item['target']], item['repos'], item['messages']))
+    outcomes = FeishuDelivery(targets=[plan[0] for plan in plans]).send(plans)
+    return all(outcome['success'] for outcome in outcomes)
+
+def command_dry_run(args):
+    """校验配置并输出运行计划，不访问网络；指定 --input 时额外渲染消息并统计大小"""
+    lists = [f"{language or '所有'}:{since}" for language, since in parse_trending_lists(GITHUB_TRENDING_LISTS)]
+    log(f"榜单：{', '.join(lists)}")
+    log(f"分析数量：{ANALYZE_LIMIT}，并发：{ANALYZE_CONCURRENCY}，合并：{ANALYZE_BATCH_SIZE}，模型：{SILICONFLOW_MODEL}")
+    if RANK_WEIGHTS:
+        log(f"排序权重：{parse_weights(RANK_WEIGHTS)}")
+    for target in load_feishu_targets():
+        filters = {key: value for key, value in target.items() if key not in ('name', 'url', 'secret')}
+        log(f"推送目标 {target['name']}：{urlparse(target['url']).netloc or '（未配置）'}"
+            f"{'，签名' if target.get('secret') else ''}{f'，过滤 {filters}' if filters else ''}")
+    if SCHEDULES:
+        now = datetime.now()
+        for schedule in parse_schedules(SCHEDULES):
+            log(f"计划 {schedule['name']} 下次运行：{next_run_time(schedule, now):%Y-%m-%d %H:%M}")
+
+    if args.input:
+        for target, selected, messages in FeishuDelivery().render(TrendingRepo.load_many(read_json(args.input))):
+            sizes = [len(json.dumps(message, ensure_ascii=False).encode('utf-8')) for message in messages or []]
+            log(f"推送目标 {target['name']}：{len(selected)} 个项目，{len(sizes)} 条消息，字节数 {sizes}")
+    return True
+
+# 子命令：(处理函数, 是否需要 AI 配置, 是否需要飞书配置（或按参数判断的函数）, 帮助)
+COMMANDS = {
+    'run': (command_run, True, True, "完整流程：爬取 → AI 分析 → 渲染 → 推送（默认）"),
+    'daemon': (command_daemon, True, True, "常驻进程，按 SCHEDULES 定时运行"),
+    'crawl': (command_crawl, False, False, "爬取榜单并排序，输出仓库 JSON"),
+    'analyze': (command_analyze, True, False, "分析仓库 JSON，输出分析结果"),
+    # markdown/html 格式不涉及飞书，只有 feishu 格式需要推送目标配置
+    'render': (command_render, False, lambda args: args.format == 'feishu', "按推送目标渲染消息，输出消息 JSON"),
+    'send': (command_send, False, True, "推送已渲染的消息"),
+    'dry-run': (command_dry_run, True, True, "校验配置并输出运行计划，不访问网络"),
+}
+
+def build_parser():
+    """命令行参数：各子命令只导入自己需要的依赖"""
+    parser = argparse.ArgumentParser(description="GitHub Trending 每日推送机器人")
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    for name, (_, _, _, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text)
+    subparsers.choices['crawl'].add_argument('-o', '--output', default='repos.json')
+    subparsers.choices['analyze'].add_argument('-i', '--input', default='repos.json')
+    subparsers.choices['analyze'].add_argument('-o', '--output', default='analyzed.json')
+    subparsers.choices['render'].add_argument('-i', '--input', default='analyzed.json')
+    subparsers.choices['render'].add_argument('-o', '--output', help="默认 messages.json（feishu）、digest.md 或 digest.html")
+    subparsers.choices['render'].add_argument('-f', '--format', choices=['feishu', *DIGEST_FORMATS], default='feishu')
+    subparsers.choices['send'].add_argument('-i', '--input', default='messages.json')
+    subparsers.choices['dry-run'].add_argument('-i', '--input', help="可选，分析结果 JSON，用于检查渲染后的消息大小")
+    return parser
+
+def main(argv=None):
     """主程序入口"""
+    args = build_parser().parse_args(argv)
+    command = args.command or 'run'
+    handler, needs_ai, needs_feishu, _ = COMMANDS[command]
+    if callable(needs_feishu):
+        needs_feishu = needs_feishu(args)
+
     log("=" * 60)
-    log("GitHub Trending 每日推送机器人启动")
+    log(f"GitHub Trending 每日推送机器人启动（{command}）")
     log("=" * 60)
 
     # 验证环境变量
-    validate_env()
+    validate_env(ai=needs_ai, feishu=needs_feishu)
 
     try:
-        # 1. 爬取 GitHub Trending
-        crawler = GitHubTrendingCrawler()
-        repos = crawler.fetch_trending()
-        
-        if not repos:
-            log("未获取到仓库数据，程序终止", "ERROR")
-            sys.exit(1)
-        
-        # 2. AI 分析（Top 10，传入 crawler 以获取 README）
-        summarizer = SiliconFlowSummarizer()
-        analyzed_repos = summarizer.analyze_repos(repos, limit=10, crawler=crawler)
-        
-        # 3. 内容美化
-        beautifier = AgentSkillsBeautifier()
-        beautified_content = beautifier.beautify(analyzed_repos)
-        
-        # 4. 飞书推送
-        notifier = FeishuNotifier()
-        success = notifier.send(beautified_content)
+        success = handler(args)
         
         if success:
             log("=" * 60)
-            log("✅ GitHub Trending 推送成功！")
+            log(f"✅ GitHub Trending {command} 成功！")
             log("=" * 60)
             sys.exit(0)
         else:
             log("=" * 60)
-            log("❌ GitHub Trending 推送失败！")
+            log(f"❌ GitHub Trending {command} 失败！")
             log("=" * 60)
             sys.exit(1)
             
@@ -704,6 +3605,11 @@ def main():
         import traceback
         log(traceback.format_exc(), "ERROR")
         sys.exit(1)
+    
+    finally:
+        # 无论成功与否都输出运行报告（常驻进程每次运行单独输出，dry-run 不输出）
+        if command not in ('daemon', 'dry-run'):
+            tracer.write_report()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,33 @@
+import os
+import sys
+
+# 模块在导入时读取配置，须在导入前设置
+os.environ.setdefault('LOG_ENABLED', 'false')
+os.environ.setdefault('RUN_REPORT_PATH', '')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import github_trending_bot as bot  # noqa: E402
+
+
+@pytest.fixture
+def make_repo():
+    """TrendingRepo 工厂：make_repo(名称, 中文描述, **字段)，传入中文描述时附带分析结果，其余字段取固定默认值"""
+    def make(name='octo/widget', analysis=None, highlight='', **fields):
+        fields = {'url': f"https://github.com/{name}", 'description': '', 'language': 'Python',
+                  'stars': 1000, 'forks': 10, 'today_stars': 5, **fields}
+        if analysis is not None:
+            fields['ai_analysis'] = {'chinese_description': analysis, 'highlight': highlight}
+        return bot.TrendingRepo(name=name, **fields)
+    return make
+
+
+@pytest.fixture(autouse=True)
+def no_local_state(monkeypatch):
+    """禁用默认落盘的缓存、历史库和断点，避免测试在工作目录下生成 .cache；需要时由测试显式传入 tmp_path"""
+    monkeypatch.setattr(bot, 'HTTP_CACHE_DIR', '')
+    monkeypatch.setattr(bot, 'ANALYSIS_CACHE_PATH', '')
+    monkeypatch.setattr(bot, 'HISTORY_DB_PATH', '')
+    monkeypatch.setattr(bot, 'CHECKPOINT_DIR', '')
@@ -0,0 +1,67 @@
+"""合并分析：解析批量返回的 JSON 数组，缺失或无效的条目逐个补分析"""
+
+import json
+
+import pytest
+
+import github_trending_bot as bot
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    monkeypatch.setattr(bot, 'SILICONFLOW_API_KEY', 'test')
+    monkeypatch.setattr(bot, 'SILICONFLOW_FALLBACK_MODELS', '')
+    monkeypatch.setattr(bot, 'ANALYSIS_CACHE_PATH', '')
+    return bot.SiliconFlowSummarizer()
+
+
+def item(name, description="一个小部件", highlight="亮点"):
+    return {'name': name, 'chinese_description': description, 'highlight': highlight}
+
+
+def test_parses_array_surrounded_by_prose(summarizer):
+    text = "结果如下：\n" + json.dumps([item('a/one'), item('b/two')], ensure_ascii=False) + "\n以上"
+
+    assert summarizer._parse_batch_result(text, ['a/one', 'b/two']) == {
+        'a/one': {'chinese_description': '一个小部件', 'highlight': '亮点'},
+        'b/two': {'chinese_description': '一个小部件', 'highlight': '亮点'},
+    }
+
+
+def test_skips_invalid_and_unexpected_entries(summarizer):
+    text = json.dumps([
+        item('a/one'),
+        item('b/two', description='  '),
+        {'name': 'c/three', 'chinese_description': '缺少亮点'},
+        item('x/unknown'),
+        'not an object',
+    ], ensure_ascii=False)
+
+    assert list(summarizer._parse_batch_result(text, ['a/one', 'b/two', 'c/three'])) == ['a/one']
+
+
+@pytest.mark.parametrize('text', [
+    '没有 JSON',
+    '[{"name": "a/one", ',
+    json.dumps(item('a/one'), ensure_ascii=False),
+])
+def test_unparseable_output(summarizer, text):
+    assert summarizer._parse_batch_result(text, ['a/one']) == {}
+
+
+def test_missing_entries_are_analyzed_individually(summarizer, monkeypatch, make_repo):
+    repos = [make_repo('a/one'), make_repo('b/two')]
+    monkeypatch.setattr(summarizer, '_complete',
+                        lambda prompt, max_tokens, json_open: json.dumps([item('a/one')], ensure_ascii=False))
+    retried = []
+
+    def request_analysis(repo, readme_content="", cache_key=None):
+        retried.append(repo['name'])
+        return {'chinese_description': '单独分析', 'highlight': '亮点'}
+
+    monkeypatch.setattr(summarizer, '_request_analysis', request_analysis)
+    summarizer._analyze_batch([(repo, "", None) for repo in repos])
+
+    assert retried == ['b/two']
+    assert repos[0]['ai_analysis']['chinese_description'] == '一个小部件'
+    assert repos[1]['ai_analysis']['chinese_description'] == '单独分析'
@@ -0,0 +1,30 @@
+"""断点目录的键：按运行标识和影响结果的配置区分"""
+
+import github_trending_bot as bot
+
+
+def test_key_defaults_to_date(monkeypatch):
+    monkeypatch.setattr(bot, 'CHECKPOINT_RUN_ID', '')
+
+    assert bot.RunCheckpoint.default_key().startswith(bot.datetime.now().strftime('%Y-%m-%d-'))
+
+
+def test_run_id_separates_runs_on_the_same_day(monkeypatch):
+    monkeypatch.setattr(bot, 'CHECKPOINT_RUN_ID', '101')
+    first = bot.RunCheckpoint.default_key()
+    monkeypatch.setattr(bot, 'CHECKPOINT_RUN_ID', '102')
+    second = bot.RunCheckpoint.default_key()
+
+    assert first.startswith('run-101-')
+    assert first != second
+
+
+def test_dedup_settings_change_the_key(monkeypatch):
+    monkeypatch.setattr(bot, 'DEDUP_MODE', 'off')
+    keys = {bot.RunCheckpoint.default_key()}
+    monkeypatch.setattr(bot, 'DEDUP_MODE', 'tfidf')
+    keys.add(bot.RunCheckpoint.default_key())
+    monkeypatch.setattr(bot, 'DEDUP_THRESHOLD', 0.9)
+    keys.add(bot.RunCheckpoint.default_key())
+
+    assert len(keys) == 3
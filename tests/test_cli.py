@@ -0,0 +1,35 @@
+"""命令行子命令"""
+
+import json
+
+import pytest
+
+import github_trending_bot as bot
+
+@pytest.fixture
+def analyzed(tmp_path, monkeypatch, make_repo):
+    monkeypatch.setattr(bot, 'FEISHU_WEBHOOK_URL', '')
+    monkeypatch.setattr(bot, 'FEISHU_TARGETS', '')
+    path = tmp_path / 'analyzed.json'
+    repos = [make_repo('octo/widget', '一个小部件', highlight='亮点').to_dict()]
+    path.write_text(json.dumps(repos, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+@pytest.mark.parametrize('fmt, marker', [('markdown', '**[octo/widget]'), ('html', '<!DOCTYPE html>')])
+def test_render_text_formats_without_feishu_config(analyzed, tmp_path, fmt, marker):
+    output = tmp_path / f"digest.{fmt}"
+
+    with pytest.raises(SystemExit) as exit_info:
+        bot.main(['render', '-i', str(analyzed), '-o', str(output), '-f', fmt])
+
+    assert exit_info.value.code == 0
+    assert marker in output.read_text(encoding='utf-8')
+
+
+def test_render_feishu_requires_webhook(analyzed, tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        bot.main(['render', '-i', str(analyzed), '-o', str(tmp_path / 'messages.json')])
+
+    assert exit_info.value.code == 1
+    assert not (tmp_path / 'messages.json').exists()
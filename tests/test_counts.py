@@ -0,0 +1,74 @@
+"""星数/Fork 数解析：固定用例、往返校验，以及批量与逐个解析一致（随机种子生成的输入）"""
+
+import random
+
+import pytest
+
+import github_trending_bot as bot
+
+SEEDS = range(20)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('12,345', 12345),
+    ('\n        12,345\n', 12345),
+    ('1,018 stars today', 1018),
+    ('1.2k', 1200),
+    ('1.2K stars', 1200),
+    ('3M', 3000000),
+    ('2.5b', 2500000000),
+    ('987', 987),
+    ('12 by', 12),  # "by" 不是 b 后缀
+    ('1a 5', 5),
+    ('', 0),
+    ('stars today', 0),
+])
+def test_known_texts(text, expected):
+    assert bot.format_number(text) == expected
+    assert bot.parse_counts([text]) == [expected]
+
+
+def format_count(rng, value):
+    """按 GitHub 页面可能出现的写法格式化计数，返回 (文本, 允许误差)"""
+    style = rng.choice(['plain', 'comma', 'short'])
+    if style == 'plain':
+        text, tolerance = str(value), 0
+    elif style == 'comma':
+        text, tolerance = f"{value:,}", 0
+    elif value >= 1000000:
+        text, tolerance = f"{value / 1000000:.1f}M", 50000
+    elif value >= 1000:
+        text, tolerance = f"{value / 1000:.1f}k", 50
+    else:
+        text, tolerance = str(value), 0
+    padding = rng.choice(['', ' ', '\n        '])
+    return padding + text + rng.choice(['', ' stars today', ' stars this week', '\n']), tolerance
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_round_trip(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        value = int(10 ** rng.uniform(0, 8))
+        text, tolerance = format_count(rng, value)
+        assert abs(bot.format_number(text) - value) <= tolerance, text
+
+
+def random_text(rng):
+    """由数字、分隔符、后缀字母、其他字母、空白和 \\0 组成的任意文本"""
+    alphabet = '0123456789' * 3 + ',,..' + 'kKmMbB' + 'a xyz' + ' \n\t' + '\0' + '星'
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_bulk_matches_single(seed):
+    rng = random.Random(seed)
+    texts = [random_text(rng) for _ in range(500)]
+
+    # \0 为批量解析的分隔符，输入中的 \0 会被移除
+    assert bot.parse_counts(texts) == [bot.format_number(text.replace('\0', '')) for text in texts]
+
+
+def test_bulk_empty():
+    assert bot.parse_counts([]) == []
+    assert bot.parse_counts(['', '']) == [0, 0]
@@ -0,0 +1,75 @@
+"""近似重复项目合并"""
+
+import random
+import time
+from types import SimpleNamespace
+
+import github_trending_bot as bot
+
+
+class FakeEmbeddings:
+    """OpenAI 兼容的向量接口替身：按文本查表返回向量"""
+
+    def __init__(self, vectors=None, error=None):
+        self.vectors = vectors
+        self.error = error
+        self.embeddings = self
+
+    def create(self, model, input):
+        if self.error:
+            raise self.error
+        data = [SimpleNamespace(index=i, embedding=self.vectors(text)) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+def test_tfidf_merges_forks(make_repo):
+    repos = [
+        make_repo('alice/fastgrid', description='A blazing fast data grid for the terminal'),
+        make_repo('bob/notes', description='Personal notes about compilers'),
+        make_repo('carol/fastgrid', description='A blazing fast data grid for the terminal'),
+    ]
+
+    result = bot.RepoDeduplicator(mode='tfidf', threshold=0.8).dedupe(repos)
+
+    assert [repo['name'] for repo in result] == ['alice/fastgrid', 'bob/notes']
+    assert [item['name'] for item in result[0]['duplicates']] == ['carol/fastgrid']
+    assert result[0]['duplicates'][0]['similarity'] == 1.0
+
+
+def test_embedding_merges_similar_vectors(make_repo):
+    table = {'grid': [1.0, 0.0, 0.1], 'grid2': [0.9, 0.0, 0.1], 'notes': [0.0, 1.0, 0.0]}
+    client = FakeEmbeddings(lambda text: table[text.split()[0]])
+    repos = [make_repo('a/grid'), make_repo('b/notes'), make_repo('c/grid2')]
+
+    result = bot.RepoDeduplicator(mode='embedding', threshold=0.95, client=client).dedupe(repos)
+
+    assert [repo['name'] for repo in result] == ['a/grid', 'b/notes']
+    assert result[0]['duplicates'][0]['name'] == 'c/grid2'
+    assert 0.95 <= result[0]['duplicates'][0]['similarity'] <= 1.0
+
+
+def test_embedding_failure_falls_back_to_tfidf(make_repo):
+    client = FakeEmbeddings(error=RuntimeError('unavailable'))
+    repos = [make_repo('a/grid', description='data grid'), make_repo('b/grid', description='data grid')]
+
+    result = bot.RepoDeduplicator(mode='embedding', threshold=0.8, client=client).dedupe(repos)
+
+    assert [repo['name'] for repo in result] == ['a/grid']
+
+
+def test_dense_embeddings_scale(make_repo):
+    rng = random.Random(0)
+    table = {}
+
+    def vectors(text):
+        return table.setdefault(text, [rng.gauss(0, 1) for _ in range(1024)])
+
+    repos = [make_repo(f"owner/repo{i}") for i in range(200)]
+    client = FakeEmbeddings(vectors)
+    client.create('warm-up', [bot.RepoDeduplicator._text(repo) for repo in repos])
+
+    start = time.perf_counter()
+    result = bot.RepoDeduplicator(mode='embedding', threshold=0.8, client=client).dedupe(repos)
+
+    assert len(result) == 200
+    assert time.perf_counter() - start < 3
@@ -0,0 +1,81 @@
+"""飞书推送：断点续跑时的渲染复用"""
+
+import pytest
+
+import github_trending_bot as bot
+
+TARGET = {'name': 'default', 'url': 'https://open.feishu.cn/hook/test', 'secret': '', 'filters': {}}
+
+
+def render(checkpoint, repos):
+    delivery = bot.FeishuDelivery(targets=[TARGET], checkpoint=checkpoint)
+    (_, _, messages), = delivery.render(repos)
+    return bot.json.dumps(messages, ensure_ascii=False)
+
+
+def test_resume_rerenders_reanalyzed_repos(tmp_path, make_repo):
+    checkpoint = bot.RunCheckpoint(directory=str(tmp_path), key='run', resume=True)
+    first = render(checkpoint, [make_repo('octo/widget', 'A widget', highlight='亮点')])
+
+    # 上次为降级结果（英文原文），续跑时重新分析得到中文描述
+    resumed = render(checkpoint, [make_repo('octo/widget', '一个小部件', highlight='亮点')])
+
+    assert 'A widget' in first
+    assert '一个小部件' in resumed
+
+
+def test_resume_reuses_unchanged_render(tmp_path, monkeypatch, make_repo):
+    checkpoint = bot.RunCheckpoint(directory=str(tmp_path), key='run', resume=True)
+    first = render(checkpoint, [make_repo('octo/widget', '一个小部件', highlight='亮点')])
+
+    def fail(*args):
+        raise AssertionError("未变化的内容不应重新渲染")
+
+    monkeypatch.setattr(bot.FeishuDelivery, '_render', fail)
+    assert render(checkpoint, [make_repo('octo/widget', '一个小部件', highlight='亮点')]) == first
+
+
+def parse_targets(*targets):
+    return bot.parse_feishu_targets(bot.json.dumps(list(targets)))
+
+
+def test_single_string_filters_are_normalized():
+    target, = parse_targets({"url": TARGET['url'], "languages": "Python", "keywords": "widget", "lists": "rust:daily"})
+
+    assert target['languages'] == ["Python"]
+    assert target['keywords'] == ["widget"]
+    assert target['lists'] == ["rust:daily"]
+
+
+def test_single_language_string_matches_repos(make_repo):
+    target, = parse_targets({"url": TARGET['url'], "languages": "Python"})
+    repos = [make_repo('octo/widget', '一个小部件')]
+
+    assert bot.FeishuDelivery(targets=[target])._filter(repos, target) == repos
+
+
+@pytest.mark.parametrize('target, field', [
+    ({"languages": [1]}, 'languages'),
+    ({"lists": {"rust": "daily"}}, 'lists'),
+    ({"keywords": 5}, 'keywords'),
+    ({"limit": "5"}, 'limit'),
+    ({"limit": 0}, 'limit'),
+    ({"limit": True}, 'limit'),
+    ({"min_today_stars": "100"}, 'min_today_stars'),
+])
+def test_invalid_target_filters(target, field):
+    with pytest.raises(ValueError, match=field):
+        parse_targets(dict(target, url=TARGET['url']))
+
+
+def test_duplicate_target_names():
+    with pytest.raises(ValueError, match="重复"):
+        parse_targets({"name": "a", "url": TARGET['url']}, {"name": "a", "url": TARGET['url']})
+
+
+def test_min_today_stars_compares_daily_average(make_repo):
+    target, = parse_targets({"url": TARGET['url'], "min_today_stars": 50})
+    weekly = make_repo('octo/weekly', today_stars=700, period='weekly')
+    slow = make_repo('octo/slow', today_stars=300, period='weekly')
+
+    assert bot.FeishuDelivery(targets=[target])._filter([weekly, slow], target) == [weekly]
@@ -0,0 +1,43 @@
+"""飞书卡片：按消息体大小拆分与截断"""
+
+import pytest
+
+import github_trending_bot as bot
+
+
+@pytest.mark.parametrize('description', [
+    '"quoted"\\n' * 800,  # 引号和反斜杠序列化后占 2 字节
+    '\n' * 3000,
+    '\x01' * 3000,  # 控制字符序列化后占 6 字节
+    '中文描述' * 800,
+    'x' * 6000,
+], ids=['quotes', 'newlines', 'control', 'cjk', 'ascii'])
+def test_messages_fit_budget(description, make_repo):
+    builder = bot.FeishuCardBuilder(max_bytes=3000)
+    messages = builder.build([make_repo(f"octo/repo{i}", description) for i in range(3)], '2024-01-01')
+
+    assert len(messages) == 3
+    assert all(builder._size(message) <= 3000 for message in messages)
+    for message in messages:
+        content = message['card']['elements'][0]['text']['content']
+        assert content.endswith('…')
+        # 只截断到刚好满足预算，不会过度截断
+        assert builder._size(message) > 3000 - 400
+
+
+def test_small_repos_share_one_message(make_repo):
+    builder = bot.FeishuCardBuilder(max_bytes=3000)
+    messages = builder.build([make_repo(f"octo/repo{i}", '简短描述') for i in range(5)], '2024-01-01')
+
+    assert len(messages) == 1
+    assert len(messages[0]['card']['elements']) == 5
+
+
+def test_split_messages_are_numbered(make_repo):
+    builder = bot.FeishuCardBuilder(max_bytes=3000)
+    messages = builder.build([make_repo(f"octo/repo{i}", '描述' * 300) for i in range(6)], '2024-01-01')
+
+    titles = [message['card']['header']['title']['content'] for message in messages]
+    assert len(messages) > 1
+    assert titles[0].endswith(f"（1/{len(messages)}）")
+    assert [repo for message in messages for repo in message['card']['elements']][-1]['text']['content'].startswith('6.')
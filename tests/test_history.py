@@ -0,0 +1,32 @@
+"""历史快照：同一天多个定时任务记录时合并榜单来源和名次"""
+
+import github_trending_bot as bot
+
+DATE = '2026-10-16'
+
+
+def test_same_day_records_merge_lists_and_keep_best_rank(tmp_path, make_repo):
+    store = bot.HistoryStore(str(tmp_path / 'history.sqlite3'))
+
+    store.record([make_repo('octo/first', lists=['python:daily']),
+                  make_repo('octo/widget', lists=['python:daily'], stars=100)], date=DATE)
+    store.record([make_repo('octo/widget', lists=[':daily'], stars=120)], date=DATE)
+
+    widget = {repo.name: repo for repo in store.snapshot(DATE)}['octo/widget']
+    assert widget['lists'] == ['python:daily', ':daily']
+    assert widget.stars == 120
+    assert store._query_one("SELECT rank FROM snapshots WHERE repo = 'octo/widget'", ())[0] == 1
+    assert store.days_on_list('octo/widget') == 1
+
+
+def test_repeated_record_does_not_duplicate_lists(tmp_path, make_repo):
+    store = bot.HistoryStore(str(tmp_path / 'history.sqlite3'))
+
+    store.record([make_repo('octo/first', lists=['python:daily']),
+                  make_repo('octo/widget', lists=['python:daily'])], date=DATE)
+    store.record([make_repo('octo/first', lists=['python:daily']),
+                  make_repo('octo/widget', lists=['python:daily'])], date=DATE)
+
+    assert [repo['lists'] for repo in store.snapshot(DATE)] == [['python:daily'], ['python:daily']]
+    assert [repo.name for repo in store.snapshot(DATE)] == ['octo/first', 'octo/widget']
+
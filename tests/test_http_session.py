@@ -0,0 +1,42 @@
+"""共享 HTTP 会话的重试退避"""
+
+from urllib3.util.retry import RequestHistory
+
+import github_trending_bot as bot
+
+
+def backoff_times(retry, attempts):
+    times = []
+    for _ in range(attempts):
+        retry = retry.increment('GET', '/trending', error=OSError('connection reset'))
+        times.append(retry.get_backoff_time())
+    return times
+
+
+def test_backoff_starts_at_retry_delay(monkeypatch):
+    monkeypatch.setattr(bot, 'RETRY_DELAY', 5)
+    monkeypatch.setattr(bot, 'MAX_RETRIES', 5)
+    retry = bot.create_http_session().get_adapter('https://github.com').max_retries
+
+    assert retry.total == 4
+    assert backoff_times(retry, 4) == [5, 10, 20, 40]
+
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(bot, 'RETRY_DELAY', 100)
+    monkeypatch.setattr(bot, 'MAX_RETRIES', 5)
+    retry = bot.create_http_session().get_adapter('https://github.com').max_retries
+
+    assert backoff_times(retry, 3) == [100, retry.backoff_max, retry.backoff_max]
+
+
+def test_redirect_resets_backoff(monkeypatch):
+    monkeypatch.setattr(bot, 'RETRY_DELAY', 5)
+    retry = bot.create_http_session().get_adapter('https://github.com').max_retries
+    retry = retry.new(history=(
+        RequestHistory('GET', '/a', None, 503, None),
+        RequestHistory('GET', '/a', None, 301, '/b'),
+        RequestHistory('GET', '/b', None, 503, None),
+    ))
+
+    assert retry.get_backoff_time() == 5
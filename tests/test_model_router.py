@@ -0,0 +1,126 @@
+"""多模型对冲请求：超时对冲、失败切换、无效结果兜底，以及取消卡住的请求"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import github_trending_bot as bot
+
+VALID = '{"chinese_description": "一个小部件", "highlight": "亮点"}'
+
+
+def make_router(*models, delay=5.0):
+    routes = [bot.ModelRoute(model, None, bot.RateLimiter(max_concurrency=1)) for model in models]
+    return bot.ModelRouter(routes, percentile=95, initial_delay=delay)
+
+
+def is_valid(text):
+    return text.startswith('{')
+
+
+def test_hedges_after_deadline_and_cancels_loser():
+    router = make_router('primary', 'fallback', delay=0.05)
+    cancelled = threading.Event()
+
+    def call(route, cancel):
+        if route.model == 'primary':
+            cancel.register(cancelled.set)
+            cancelled.wait(5)
+            raise bot.RequestCancelled()
+        return VALID
+
+    start = time.monotonic()
+    assert router.race(call, is_valid) == VALID
+    assert time.monotonic() - start < 1
+    assert cancelled.wait(1)
+
+
+def test_error_moves_on_without_waiting_for_deadline():
+    router = make_router('primary', 'fallback', delay=5.0)
+    called = []
+
+    def call(route, cancel):
+        called.append(route.model)
+        if route.model == 'primary':
+            raise RuntimeError('boom')
+        return VALID
+
+    start = time.monotonic()
+    assert router.race(call, is_valid) == VALID
+    assert time.monotonic() - start < 1
+    assert called == ['primary', 'fallback']
+
+
+def test_falls_back_to_first_invalid_result():
+    router = make_router('primary', 'fallback', delay=0.0)
+
+    def call(route, cancel):
+        if route.model == 'fallback':
+            time.sleep(0.05)
+        return f"no json from {route.model}"
+
+    assert router.race(call, is_valid) == "no json from primary"
+
+
+def test_all_errors_raise_last_error():
+    router = make_router('primary', 'fallback', delay=0.0)
+
+    def call(route, cancel):
+        raise RuntimeError(route.model)
+
+    with pytest.raises(RuntimeError):
+        router.race(call, is_valid)
+
+
+def test_cancel_scope_runs_callbacks_once():
+    scope = bot.CancelScope()
+    calls = []
+    scope.register(lambda: calls.append('a'))
+    scope.set()
+    scope.set()
+    scope.register(lambda: calls.append('late'))
+
+    assert calls == ['a', 'late']
+
+
+class StalledClient:
+    """create() 卡住直到测试结束，模拟迟迟不返回响应头的主模型"""
+
+    def __init__(self, release):
+        self.release = release
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.release.wait(5)
+        raise RuntimeError('stalled')
+
+
+class ValidClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        message = SimpleNamespace(content=VALID)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def test_cancelled_stalled_request_frees_limiter_slot(monkeypatch):
+    monkeypatch.setattr(bot, 'SILICONFLOW_API_KEY', 'test')
+    monkeypatch.setattr(bot, 'SILICONFLOW_STREAM', False)
+    monkeypatch.setattr(bot, 'SILICONFLOW_FALLBACK_MODELS', '')
+    monkeypatch.setattr(bot, 'ANALYSIS_CACHE_PATH', '')
+    summarizer = bot.SiliconFlowSummarizer(limiter=bot.RateLimiter(max_concurrency=1))
+    release = threading.Event()
+    primary = summarizer.route
+    primary.client = StalledClient(release)
+    fallback = bot.ModelRoute('fallback', ValidClient(), bot.RateLimiter(max_concurrency=1))
+    summarizer.router = bot.ModelRouter([primary, fallback], percentile=95, initial_delay=0.05)
+
+    try:
+        assert summarizer._complete("prompt", max_tokens=100) == VALID
+        # 主模型的请求线程仍卡在 create() 中，名额已由取消方归还
+        assert primary.limiter.in_flight == 0
+    finally:
+        release.set()
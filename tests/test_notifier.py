@@ -0,0 +1,107 @@
+"""飞书推送：只重试请求尚未送达的错误"""
+
+from http.client import RemoteDisconnected
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+import github_trending_bot as bot
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def connection_error(reason):
+    """与 requests 一致：ConnectionError 包装 urllib3 的 MaxRetryError，reason 为底层错误"""
+    return requests.exceptions.ConnectionError(MaxRetryError(None, '/hook', reason))
+
+
+@pytest.fixture(autouse=True)
+def no_wait(monkeypatch):
+    monkeypatch.setattr(bot, 'RETRY_DELAY', 0)
+
+
+def post(session):
+    notifier = bot.FeishuNotifier(session=session, webhook_url='https://open.feishu.cn/hook/test',
+                                  secret='', max_retries=3)
+    return notifier.post({"msg_type": "text", "content": {"text": "hi"}}), notifier
+
+
+@pytest.mark.parametrize('failure', [
+    connection_error(NewConnectionError(None, 'Connection refused')),
+    requests.exceptions.ConnectTimeout('connect timeout'),
+    FakeResponse(429),
+    FakeResponse(503),
+])
+def test_retries_undelivered_errors(failure):
+    session = FakeSession(failure, FakeResponse(200, {'code': 0}))
+
+    success, notifier = post(session)
+
+    assert success
+    assert session.calls == 2
+    assert notifier.attempts == 2
+
+
+@pytest.mark.parametrize('failure', [
+    requests.exceptions.ReadTimeout('read timeout'),
+    connection_error(ProtocolError('Connection aborted.', RemoteDisconnected('closed'))),
+    requests.exceptions.ConnectionError('no reason'),
+    FakeResponse(400),
+    FakeResponse(200, {'code': 19021, 'msg': 'sign match fail'}),
+])
+def test_does_not_retry_possibly_delivered_or_rejected(failure):
+    session = FakeSession(failure, FakeResponse(200, {'code': 0}))
+
+    success, notifier = post(session)
+
+    assert not success
+    assert session.calls == 1
+    assert notifier.last_error
+
+
+def test_session_does_not_retry_post_on_top_of_notifier(monkeypatch):
+    import socket
+
+    import urllib3.connection
+
+    # 先绑定再关闭，得到一个拒绝连接的本地端口
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    connects = []
+    new_conn = urllib3.connection.HTTPConnection._new_conn
+    monkeypatch.setattr(urllib3.connection.HTTPConnection, '_new_conn',
+                        lambda self: connects.append(1) or new_conn(self))
+    monkeypatch.setattr(bot, 'MAX_RETRIES', 3)
+    notifier = bot.FeishuNotifier(session=bot.create_http_session(pool_size=1),
+                                  webhook_url=f'http://127.0.0.1:{port}/hook', secret='', max_retries=3)
+
+    assert not notifier.post({"msg_type": "text", "content": {"text": "hi"}})
+    assert notifier.attempts == 3
+    assert len(connects) == 3
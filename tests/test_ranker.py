@@ -0,0 +1,35 @@
+"""排序权重配置校验"""
+
+import pytest
+
+import github_trending_bot as bot
+
+
+def test_parse_weights():
+    assert bot.parse_weights("today_stars:1, novelty:0.5,keyword") == {
+        'today_stars': 1.0, 'novelty': 0.5, 'keyword': 1.0
+    }
+
+
+def test_non_numeric_weight():
+    with pytest.raises(ValueError, match="today_stars:high"):
+        bot.parse_weights("today_stars:high")
+
+
+def test_unknown_feature():
+    with pytest.raises(ValueError, match="todays_stars"):
+        bot.RepoRanker(weights=bot.parse_weights("todays_stars:1"))
+
+
+@pytest.mark.parametrize('weights', ["todays_stars:1", "today_stars:x"])
+def test_validate_env_rejects_bad_weights(monkeypatch, weights):
+    monkeypatch.setattr(bot, 'RANK_WEIGHTS', weights)
+
+    with pytest.raises(SystemExit):
+        bot.validate_env(ai=False, feishu=False)
+
+
+def test_validate_env_accepts_weights(monkeypatch):
+    monkeypatch.setattr(bot, 'RANK_WEIGHTS', "today_stars:1,novelty:0.5")
+
+    bot.validate_env(ai=False, feishu=False)
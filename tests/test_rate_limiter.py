@@ -0,0 +1,110 @@
+"""限流器：AIMD 并发调整、Retry-After 暂停与 TPM 按实际用量退还"""
+
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+import github_trending_bot as bot
+
+
+def test_aimd_halves_on_throttle_and_grows_on_success():
+    limiter = bot.RateLimiter(max_concurrency=8, min_concurrency=2)
+
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release('throttled')
+    assert limiter.concurrency == 2  # 8 → 4 → 2，不低于 min_concurrency
+    assert limiter.throttled == 3
+
+    limiter.acquire()
+    limiter.release('success')
+    assert limiter.concurrency == pytest.approx(2.5)
+
+    limiter.acquire()
+    limiter.release('error')  # 与限流无关的失败不调整并发
+    assert limiter.concurrency == pytest.approx(2.5)
+
+
+def test_concurrency_never_exceeds_max():
+    limiter = bot.RateLimiter(max_concurrency=2)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release('success')
+
+    assert limiter.concurrency == 2
+
+
+def test_acquire_blocks_until_release():
+    limiter = bot.RateLimiter(max_concurrency=1)
+    limiter.acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    thread.start()
+
+    assert not acquired.wait(0.1)
+    limiter.release('success')
+    assert acquired.wait(1)
+    thread.join()
+    assert limiter.in_flight == 1
+
+
+def test_retry_after_pauses_all_requests():
+    limiter = bot.RateLimiter(max_concurrency=4)
+    limiter.acquire()
+    limiter.release('throttled', retry_after=0.2)
+
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_tpm_refunds_unused_reservation():
+    limiter = bot.RateLimiter(tpm=1000, max_concurrency=2)
+
+    assert limiter.acquire(600) == 600
+    assert limiter._token_tokens == pytest.approx(400, abs=1)
+    limiter.release('success', reserved_tokens=600, used_tokens=100)
+    assert limiter._token_tokens == pytest.approx(900, abs=1)
+
+
+def test_tpm_does_not_refund_failed_requests():
+    limiter = bot.RateLimiter(tpm=1000, max_concurrency=2)
+
+    limiter.acquire(600)
+    limiter.release('error', reserved_tokens=600, used_tokens=100)
+    assert limiter._token_tokens == pytest.approx(400, abs=1)
+
+
+def test_reservation_is_capped_at_tpm():
+    limiter = bot.RateLimiter(tpm=1000)
+
+    assert limiter.acquire(5000) == 1000
+
+
+def test_slot_releases_once():
+    limiter = bot.RateLimiter(max_concurrency=2)
+    slot = limiter.slot()
+    limiter.acquire()
+
+    slot.abandon()
+    slot.release('throttled')  # 已由取消方归还，不再重复计数
+    assert limiter.in_flight == 1
+    assert limiter.throttled == 0
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('5', 5.0),
+    ('-3', 0.0),
+    ('', None),
+    ('soon', None),
+])
+def test_parse_retry_after(value, expected):
+    assert bot.parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    value = formatdate(time.time() + 30, usegmt=True)
+
+    assert 25 <= bot.parse_retry_after(value) <= 30
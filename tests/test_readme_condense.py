@@ -0,0 +1,42 @@
+"""README 压缩：按章节标题挑选内容，预算不足时截断"""
+
+import pytest
+
+import github_trending_bot as bot
+
+
+def section(title, words=200):
+    return f"## {title}\n\n" + " ".join(f"{title.split()[0].lower()}{i}" for i in range(words))
+
+
+@pytest.mark.parametrize('title', [
+    'Protocol', 'Latest News', 'Supported Models', 'Stock data', 'Developer Experience', '通信协议',
+])
+def test_headings_are_not_skipped_by_substring(title):
+    assert bot._section_score(1, title, "Some body text") is not None
+
+
+@pytest.mark.parametrize('title', [
+    'Installation', 'Getting Started', 'Contributing', 'Table of Contents', 'Running tests', 'License',
+    '1. 安装', '🚀 使用方法',
+])
+def test_low_value_headings_are_skipped(title):
+    assert bot._section_score(1, title, "Some body text") is None
+
+
+def test_skipped_heading_matches_whole_words_only():
+    readme = "\n\n".join([section('Protocol'), section('Installation')])
+
+    condensed = bot.condense_readme(readme, token_budget=300)
+
+    assert 'protocol0' in condensed
+    assert 'installation0' not in condensed
+
+
+def test_falls_back_to_truncation_when_every_section_is_skipped():
+    readme = section('Getting Started', words=500)
+
+    condensed = bot.condense_readme(readme, token_budget=100)
+
+    assert condensed == bot._truncate_to_tokens(bot.clean_readme(readme), 100)
+    assert condensed.startswith('## Getting Started\n\ngetting0 getting1')
@@ -0,0 +1,146 @@
+"""README 获取：API 原文、404、限流回退 blob 页面、304 缓存命中，以及响应关闭"""
+
+import io
+
+import pytest
+import requests
+
+import github_trending_bot as bot
+
+REPO_URL = 'https://github.com/octo/widget'
+API_URL = f"{bot.GITHUB_API_URL}/repos/octo/widget/readme"
+BLOB_HTML = '<html><body><article>Blob README</article></body></html>'
+
+
+class FakeBody(io.BytesIO):
+    """响应体：记录连接是否归还连接池（Response.close() 会调用 release_conn）"""
+
+    released = False
+
+    def release_conn(self):
+        self.released = True
+
+
+def make_response(url, status=200, body=b'', headers=None):
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.headers.update(headers or {})
+    response.raw = FakeBody(body.encode('utf-8') if isinstance(body, str) else body)
+    return response
+
+
+class FakeSession:
+    """按 URL 依次返回预设响应，并记录请求"""
+
+    def __init__(self, routes):
+        self.routes = {url: list(responses) for url, responses in routes.items()}
+        self.calls = []
+        self.responses = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        self.calls.append((url, dict(headers or {})))
+        if not self.routes.get(url):
+            response = make_response(url, 404, 'not found')
+        else:
+            response = self.routes[url].pop(0)
+        self.responses.append(response)
+        return response
+
+
+def make_crawler(session, cache_dir=''):
+    return bot.GitHubTrendingCrawler(http_cache=bot.HttpCache(cache_dir), session=session)
+
+
+def test_raw_readme_from_api():
+    session = FakeSession({API_URL: [make_response(API_URL, 200, '# Widget\n\nRaw README')]})
+
+    assert make_crawler(session).fetch_readme(REPO_URL) == '# Widget\n\nRaw README'
+    assert [url for url, _ in session.calls] == [API_URL]
+    assert session.calls[0][1]['Accept'] == 'application/vnd.github.raw'
+
+
+def test_raw_readme_is_truncated(monkeypatch):
+    monkeypatch.setattr(bot, 'README_MAX_BYTES', 10)
+    session = FakeSession({API_URL: [make_response(API_URL, 200, 'x' * 100)]})
+
+    assert make_crawler(session).fetch_readme(REPO_URL) == 'x' * 10
+
+
+def test_missing_readme_does_not_fall_back_to_blob():
+    session = FakeSession({API_URL: [make_response(API_URL, 404, 'not found')]})
+
+    assert make_crawler(session).fetch_readme(REPO_URL) == ""
+    assert [url for url, _ in session.calls] == [API_URL]
+
+
+@pytest.mark.parametrize('status', [403, 429, 500])
+def test_rate_limited_api_falls_back_to_blob(status):
+    blob_url = f"{REPO_URL}/blob/main/README.md"
+    session = FakeSession({
+        API_URL: [make_response(API_URL, status, 'rate limited')],
+        blob_url: [make_response(blob_url, 200, BLOB_HTML)],
+    })
+
+    assert make_crawler(session).fetch_readme(REPO_URL) == 'Blob README'
+    assert [url for url, _ in session.calls] == [API_URL, blob_url]
+
+
+def test_blob_fallback_tries_master_branch():
+    master_url = f"{REPO_URL}/blob/master/README.md"
+    session = FakeSession({
+        API_URL: [make_response(API_URL, 403, 'rate limited')],
+        master_url: [make_response(master_url, 200, BLOB_HTML)],
+    })
+
+    assert make_crawler(session).fetch_readme(REPO_URL) == 'Blob README'
+    assert [url for url, _ in session.calls] == [API_URL, f"{REPO_URL}/blob/main/README.md", master_url]
+
+
+def test_not_modified_returns_cached_readme(tmp_path):
+    session = FakeSession({API_URL: [
+        make_response(API_URL, 200, 'Cached README', {'ETag': '"v1"'}),
+        make_response(API_URL, 304),
+    ]})
+    crawler = make_crawler(session, str(tmp_path))
+
+    assert crawler.fetch_readme(REPO_URL) == 'Cached README'
+    assert crawler.fetch_readme(REPO_URL) == 'Cached README'
+    assert session.calls[1][1]['If-None-Match'] == '"v1"'
+    assert crawler.http_cache.hits == 1
+
+
+def test_extract_version_change_invalidates_cached_result(tmp_path, monkeypatch):
+    session = FakeSession({API_URL: [
+        make_response(API_URL, 200, 'Old extraction', {'ETag': '"v1"'}),
+        make_response(API_URL, 200, 'New extraction', {'ETag': '"v1"'}),
+    ]})
+    crawler = make_crawler(session, str(tmp_path))
+
+    assert crawler.fetch_readme(REPO_URL) == 'Old extraction'
+    monkeypatch.setattr(bot, 'EXTRACT_VERSION', bot.EXTRACT_VERSION + '-next')
+
+    # 旧条目不再命中：不发送条件请求头，重新下载并提取
+    assert crawler.fetch_readme(REPO_URL) == 'New extraction'
+    assert 'If-None-Match' not in session.calls[1][1]
+    assert crawler.http_cache.hits == 0
+
+
+def test_connections_are_released(tmp_path):
+    blob_url = f"{REPO_URL}/blob/main/README.md"
+    session = FakeSession({
+        API_URL: [
+            make_response(API_URL, 200, 'README', {'ETag': '"v1"'}),
+            make_response(API_URL, 304),
+            make_response(API_URL, 429, 'rate limited'),
+        ],
+        blob_url: [make_response(blob_url, 200, BLOB_HTML)],
+    })
+    crawler = make_crawler(session, str(tmp_path))
+
+    crawler.fetch_readme(REPO_URL)
+    crawler.fetch_readme(REPO_URL)
+    crawler.fetch_readme(REPO_URL)
+
+    assert [response.status_code for response in session.responses] == [200, 304, 429, 200]
+    assert all(response.raw.released for response in session.responses)
@@ -0,0 +1,49 @@
+"""摘要渲染：片段缓存与各输出格式"""
+
+import pytest
+
+import github_trending_bot as bot
+
+
+def test_missing_override_fails_at_construction():
+    class Incomplete(bot.DigestRenderer):
+        def render(self, repos, date=None):
+            return ''
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_fragments_are_reused_across_digests(make_repo):
+    bot.tracer.reset()
+    renderer = bot.MarkdownRenderer()
+    repos = [make_repo(f"octo/repo{i}", '一个小部件') for i in range(4)]
+
+    first = renderer.render(repos[:3], '2024-01-01')
+    second = renderer.render(repos[1:], '2024-01-01')
+
+    assert bot.tracer.counters == {'fragments': 4, 'fragment_hits': 2}
+    assert first.startswith("# 🚀 GitHub 热榜日报 - 2024-01-01")
+    assert "1. **[octo/repo1]" in second
+
+
+def test_changed_analysis_invalidates_fragment(make_repo):
+    renderer = bot.MarkdownRenderer()
+
+    assert '旧描述' in renderer.render([make_repo('octo/repo0', '旧描述')])
+    assert '新描述' in renderer.render([make_repo('octo/repo0', '新描述')])
+
+
+def test_html_escapes_content(make_repo):
+    page = bot.HtmlRenderer().render([make_repo('octo/repo0', '<script>alert(1)</script>')], '2024-01-01')
+
+    assert '<script>alert' not in page
+    assert '&lt;script&gt;' in page
+
+
+@pytest.mark.parametrize('fmt', ['markdown', 'html'])
+def test_digest_formats(fmt, make_repo):
+    output = bot.DIGEST_FORMATS[fmt]().render([make_repo('octo/repo0', '一个小部件')], '2024-01-01')
+
+    assert 'octo/repo0' in output
+    assert '2024-01-01' in output
@@ -0,0 +1,74 @@
+"""常驻进程的定时计划配置"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+import github_trending_bot as bot
+
+
+def parse(*schedules):
+    return bot.parse_schedules(json.dumps(list(schedules)))
+
+
+def test_readme_example():
+    schedules = parse(
+        {"name": "rust-hourly", "every": 60, "lists": "rust:daily", "limit": 5, "targets": ["rust-group"]},
+        {"name": "daily", "at": "09:00", "lists": ":daily"},
+        {"name": "weekly", "at": "10:00", "weekday": "mon", "lists": ":weekly", "limit": 20},
+    )
+
+    assert [schedule['name'] for schedule in schedules] == ['rust-hourly', 'daily', 'weekly']
+
+
+def test_list_and_string_forms_are_normalized():
+    schedule, = parse({"every": 30, "lists": ["rust:daily", ":weekly"], "targets": "rust-group"})
+
+    assert schedule['lists'] == "rust:daily,:weekly"
+    assert schedule['targets'] == ["rust-group"]
+    assert bot.parse_trending_lists(schedule['lists']) == [('rust', 'daily'), ('', 'weekly')]
+
+
+@pytest.mark.parametrize('schedule, field', [
+    ({"every": 30, "lists": 5}, 'lists'),
+    ({"every": 30, "lists": [1, 2]}, 'lists'),
+    ({"every": 30, "limit": "5"}, 'limit'),
+    ({"every": 30, "limit": 0}, 'limit'),
+    ({"every": 30, "limit": True}, 'limit'),
+    ({"every": 30, "targets": {"name": "x"}}, 'targets'),
+    ({"every": 30, "targets": ["a", 1]}, 'targets'),
+    ({"at": "25:00"}, 'at'),
+    ({"at": "09:00", "weekday": "someday"}, 'weekday'),
+    ({"every": -1}, 'every'),
+    ({"lists": ":daily"}, 'every'),
+])
+def test_invalid_schedule(schedule, field):
+    with pytest.raises(ValueError, match=field):
+        parse(schedule)
+
+
+def test_duplicate_names():
+    with pytest.raises(ValueError, match="重复"):
+        parse({"name": "a", "every": 5}, {"name": "a", "every": 10})
+
+
+def test_next_run_time():
+    after = datetime(2024, 1, 1, 9, 30)  # 周一
+
+    assert bot.next_run_time({"at": "10:00"}, after) == datetime(2024, 1, 1, 10, 0)
+    assert bot.next_run_time({"at": "09:00"}, after) == datetime(2024, 1, 2, 9, 0)
+    assert bot.next_run_time({"at": "09:00", "weekday": "wed"}, after) == datetime(2024, 1, 3, 9, 0)
+
+
+def test_daemon_runs_without_checkpoint(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, 'SILICONFLOW_API_KEY', 'test')
+    monkeypatch.setattr(bot, 'ANALYSIS_CACHE_PATH', '')
+    monkeypatch.setattr(bot, 'HISTORY_DB_PATH', '')
+    monkeypatch.setattr(bot, 'CHECKPOINT_DIR', str(tmp_path))
+    calls = []
+    monkeypatch.setattr(bot, 'run_pipeline', lambda **kwargs: calls.append(kwargs) or True)
+    daemon = bot.TrendingDaemon(schedules=parse({"name": "hourly", "every": 60}), session=object())
+
+    assert daemon.run_once(daemon.schedules[0], datetime(2024, 1, 1, 9, 0))
+    assert calls[0]['checkpoint'] is False
@@ -0,0 +1,126 @@
+"""流式对话：JSON 完整后提前结束，并按实际用量退还限流 token"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import github_trending_bot as bot
+
+ANALYSIS = '{"chinese_description": "一个小部件", "highlight": "亮点"}'
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    def __init__(self, parts):
+        self.parts = parts
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for part in self.parts:
+            self.read += 1
+            yield chunk(part)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.stream = stream
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        assert kwargs['stream']
+        return self.stream
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    monkeypatch.setattr(bot, 'SILICONFLOW_API_KEY', 'test')
+    monkeypatch.setattr(bot, 'SILICONFLOW_STREAM', True)
+    monkeypatch.setattr(bot, 'SILICONFLOW_FALLBACK_MODELS', '')
+    monkeypatch.setattr(bot, 'ANALYSIS_CACHE_PATH', '')
+    return bot.SiliconFlowSummarizer(limiter=bot.RateLimiter(tpm=10000, max_concurrency=1))
+
+
+def test_stream_releases_unused_reservation(summarizer):
+    stream = FakeStream(['前言 ', ANALYSIS[:20], ANALYSIS[20:], ' 多余的输出'])
+    summarizer.route.client = FakeClient(stream)
+    prompt = "分析这个项目" * 20
+
+    content = summarizer._complete_route(summarizer.route, prompt, max_tokens=800)
+
+    used = bot.estimate_tokens(prompt) + bot.estimate_tokens(content)
+    assert content == ANALYSIS
+    assert stream.closed
+    assert summarizer.limiter._token_tokens == pytest.approx(10000 - used, abs=1)
+
+
+@pytest.mark.parametrize('chunks', [
+    [ANALYSIS],
+    list(ANALYSIS),
+    ['好的，结果如下：', ANALYSIS[:7], ANALYSIS[7:], '\n以上'],
+])
+def test_scanner_finds_block_across_chunks(chunks):
+    scanner = bot.JsonBlockScanner()
+    blocks = [block for block in map(scanner.feed, chunks) if block is not None]
+
+    assert blocks == [ANALYSIS]
+
+
+def test_scanner_handles_nesting_and_arrays():
+    text = '[{"name": "a/b", "tags": ["x"]}, {"name": "c/d"}] trailing ]'
+    scanner = bot.JsonBlockScanner('[', ']')
+
+    assert scanner.feed(text[:10]) is None
+    assert scanner.feed(text[10:]) == text[:text.index(' trailing')]
+
+
+def test_scanner_without_block():
+    scanner = bot.JsonBlockScanner()
+
+    assert scanner.feed('没有 JSON') is None
+    assert scanner.feed('} 也没有') is None
+
+
+def test_read_stream_returns_full_text_for_invalid_block(summarizer):
+    parts = ['{"chinese_description": "缺少亮点"}', ' 亮点：很快']
+    stream = FakeStream(parts)
+
+    assert summarizer._read_stream(stream) == ''.join(parts)
+    assert stream.read == 2
+    assert stream.closed
+
+
+def test_read_stream_stops_after_valid_block(summarizer):
+    stream = FakeStream([ANALYSIS, ' 多余的输出', ' 更多输出'])
+
+    assert summarizer._read_stream(stream) == ANALYSIS
+    assert stream.read == 1
+    assert stream.closed
+
+
+def test_read_stream_raises_when_cancelled(summarizer):
+    cancel = bot.CancelScope()
+    cancel.set()
+    stream = FakeStream([ANALYSIS])
+
+    with pytest.raises(bot.RequestCancelled):
+        summarizer._read_stream(stream, cancel=cancel)
+    assert stream.closed
+
+
+def test_read_stream_converts_errors_after_cancel(summarizer):
+    cancel = bot.CancelScope()
+
+    class ClosedStream(FakeStream):
+        def __iter__(self):
+            cancel.set()  # 取消方从其他线程关闭流，读取随之出错
+            raise RuntimeError('stream closed')
+
+    with pytest.raises(bot.RequestCancelled):
+        summarizer._read_stream(ClosedStream([]), cancel=cancel)
@@ -0,0 +1,88 @@
+"""Trending 页面解析：lxml 与 BeautifulSoup 两种解析器对同一页面给出相同的记录"""
+
+import os
+
+import pytest
+
+import github_trending_bot as bot
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'trending.html')
+
+
+@pytest.fixture(scope='module')
+def html():
+    with open(FIXTURE, encoding='utf-8') as f:
+        return f.read()
+
+
+def parse_repos(html, parser='lxml'):
+    crawler = bot.GitHubTrendingCrawler(http_cache=bot.HttpCache(''), session=object())
+    crawler.parser = parser
+    return crawler._parse_html(html)
+
+
+def parse(html, parser):
+    return [repo.to_dict() for repo in parse_repos(html, parser)]
+
+
+def test_parsers_are_equivalent(html):
+    records = parse(html, 'lxml')
+
+    assert len(records) == 7
+    assert records == parse(html, 'bs4')
+
+
+def test_parsed_records(html):
+    records = {record['name']: record for record in parse(html, 'lxml')}
+
+    assert records['acme-labs/fastgrid'] == {
+        'name': 'acme-labs/fastgrid',
+        'url': 'https://github.com/acme-labs/fastgrid',
+        'description': 'A blazing fast data grid for the terminal & the web',
+        'language': 'Rust',
+        'stars': 12345,
+        'forks': 1234,
+        'today_stars': 1018,
+    }
+    assert records['openkit/agent-runtime']['description'] == \
+        'Run LLM agents locally 🚀 with tool calling, memory and tracing.'
+    assert records['zh-team/awesome-notes']['description'] == '一个收集中文技术笔记与教程的仓库。'
+    assert records['big-corp/monorepo-tool']['description'] == 'Build system for <large> monorepos'
+    assert records['big-corp/monorepo-tool']['stars'] == 103456
+    assert records['solo/first-project']['language'] == 'Jupyter Notebook'
+
+
+def test_missing_description_and_language(html):
+    record = next(record for record in parse(html, 'bs4') if record['name'] == 'dev-null/dotfiles')
+
+    assert record['description'] == ''
+    assert record['language'] == ''
+    assert (record['stars'], record['forks'], record['today_stars']) == (2001, 98, 312)
+
+
+@pytest.mark.parametrize('parser', ['lxml', 'bs4'])
+def test_article_without_title_is_skipped(html, parser):
+    broken = html.replace('<h2 class="h3 lh-condensed">', '<h2 class="h4">', 1)
+
+    assert [record['name'] for record in parse(broken, parser)][0] == 'openkit/agent-runtime'
+
+
+@pytest.mark.parametrize('text, period, label', [
+    ('stars this week', 'weekly', 'this week'),
+    ('stars this month', 'monthly', 'this month'),
+])
+def test_period_stars(html, text, period, label):
+    repos = {repo['name']: repo for repo in parse_repos(html.replace('stars today', text))}
+    repo = repos['acme-labs/fastgrid']
+    days = bot.STAR_PERIODS[period][2]
+
+    assert (repo['today_stars'], repo['period'], repo['period_label']) == (1018, period, label)
+    assert repo['daily_stars'] == pytest.approx(1018 / days)
+    assert f"+1.0k** {label}" in bot.MarkdownRenderer().fragment(repo)
+
+
+def test_daily_records_have_no_period(html):
+    repo = next(repo for repo in parse_repos(html) if repo['name'] == 'acme-labs/fastgrid')
+
+    assert 'period' not in repo
+    assert (repo['period_label'], repo['daily_stars']) == ('today', 1018)